@@ -6,6 +6,7 @@ from alembic import context
 # Import your database and models
 from sprint2.database import Base
 import sprint2.models as models  # required so Alembic sees all models
+from sprint2.search import include_object
 
 # prevent "unused import" warning in IDE
 models  # noqa: F401
@@ -29,6 +30,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -44,7 +46,7 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
 
         with context.begin_transaction():
             context.run_migrations()
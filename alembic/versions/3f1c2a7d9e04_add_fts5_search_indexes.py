@@ -0,0 +1,76 @@
+"""Add FTS5 trigram search indexes
+
+Revision ID: 3f1c2a7d9e04
+Revises: 8a550480a40b
+Create Date: 2026-10-18 09:12:40.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9e04'
+down_revision: Union[str, Sequence[str], None] = '8a550480a40b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+UPGRADE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5("
+    "first_name, last_name, email, content='students', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS students_fts_ai AFTER INSERT ON students BEGIN "
+    "INSERT INTO students_fts(rowid, first_name, last_name, email) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email); END",
+    "CREATE TRIGGER IF NOT EXISTS students_fts_ad AFTER DELETE ON students BEGIN "
+    "INSERT INTO students_fts(students_fts, rowid, first_name, last_name, email) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); END",
+    "CREATE TRIGGER IF NOT EXISTS students_fts_au AFTER UPDATE ON students BEGIN "
+    "INSERT INTO students_fts(students_fts, rowid, first_name, last_name, email) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name, old.email); "
+    "INSERT INTO students_fts(rowid, first_name, last_name, email) "
+    "VALUES (new.id, new.first_name, new.last_name, new.email); END",
+    "INSERT INTO students_fts(students_fts) VALUES ('rebuild')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS courses_fts USING fts5("
+    "code, title, content='courses', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS courses_fts_ai AFTER INSERT ON courses BEGIN "
+    "INSERT INTO courses_fts(rowid, code, title) VALUES (new.id, new.code, new.title); END",
+    "CREATE TRIGGER IF NOT EXISTS courses_fts_ad AFTER DELETE ON courses BEGIN "
+    "INSERT INTO courses_fts(courses_fts, rowid, code, title) "
+    "VALUES ('delete', old.id, old.code, old.title); END",
+    "CREATE TRIGGER IF NOT EXISTS courses_fts_au AFTER UPDATE ON courses BEGIN "
+    "INSERT INTO courses_fts(courses_fts, rowid, code, title) "
+    "VALUES ('delete', old.id, old.code, old.title); "
+    "INSERT INTO courses_fts(rowid, code, title) VALUES (new.id, new.code, new.title); END",
+    "INSERT INTO courses_fts(courses_fts) VALUES ('rebuild')",
+]
+
+DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS courses_fts_au",
+    "DROP TRIGGER IF EXISTS courses_fts_ad",
+    "DROP TRIGGER IF EXISTS courses_fts_ai",
+    "DROP TABLE IF EXISTS courses_fts",
+    "DROP TRIGGER IF EXISTS students_fts_au",
+    "DROP TRIGGER IF EXISTS students_fts_ad",
+    "DROP TRIGGER IF EXISTS students_fts_ai",
+    "DROP TABLE IF EXISTS students_fts",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # FTS5 is SQLite-only; other dialects keep the ilike fallback
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for statement in UPGRADE:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for statement in DOWNGRADE:
+        op.execute(statement)
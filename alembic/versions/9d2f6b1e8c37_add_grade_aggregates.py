@@ -0,0 +1,139 @@
+"""Add student_gpa and course_stats summary tables
+
+Revision ID: 9d2f6b1e8c37
+Revises: 5b7e0c4f2a18
+Create Date: 2026-10-18 13:41:09.288451
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2f6b1e8c37'
+down_revision: Union[str, Sequence[str], None] = '5b7e0c4f2a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS enrollments_agg_ai AFTER INSERT ON enrollments BEGIN INSERT INTO "
+    "course_stats (course_id, enrolled, graded, grade_sum, grade_1, grade_2, grade_3, grade_4, grade_5) "
+    "VALUES (new.course_id, 1, 1 * (new.grade IS NOT NULL), 1 * coalesce(new.grade, 0), 1 * (new.grade IS"
+    " 1), 1 * (new.grade IS 2), 1 * (new.grade IS 3), 1 * (new.grade IS 4), 1 * (new.grade IS 5)) ON "
+    "CONFLICT (course_id) DO UPDATE SET enrolled = enrolled + excluded.enrolled, graded = graded + "
+    "excluded.graded, grade_sum = grade_sum + excluded.grade_sum, grade_1 = grade_1 + excluded.grade_1, "
+    "grade_2 = grade_2 + excluded.grade_2, grade_3 = grade_3 + excluded.grade_3, grade_4 = grade_4 + "
+    "excluded.grade_4, grade_5 = grade_5 + excluded.grade_5; INSERT INTO student_gpa (student_id, "
+    "graded_credits, grade_points) SELECT new.student_id, 1 * coalesce(credits, 0), 1 * new.grade * "
+    "coalesce(credits, 0) FROM courses WHERE id = new.course_id AND new.grade IS NOT NULL ON CONFLICT "
+    "(student_id) DO UPDATE SET graded_credits = graded_credits + excluded.graded_credits, grade_points ="
+    " grade_points + excluded.grade_points; END",
+    "CREATE TRIGGER IF NOT EXISTS enrollments_agg_ad AFTER DELETE ON enrollments BEGIN INSERT INTO "
+    "course_stats (course_id, enrolled, graded, grade_sum, grade_1, grade_2, grade_3, grade_4, grade_5) "
+    "VALUES (old.course_id, -1, -1 * (old.grade IS NOT NULL), -1 * coalesce(old.grade, 0), -1 * "
+    "(old.grade IS 1), -1 * (old.grade IS 2), -1 * (old.grade IS 3), -1 * (old.grade IS 4), -1 * "
+    "(old.grade IS 5)) ON CONFLICT (course_id) DO UPDATE SET enrolled = enrolled + excluded.enrolled, "
+    "graded = graded + excluded.graded, grade_sum = grade_sum + excluded.grade_sum, grade_1 = grade_1 + "
+    "excluded.grade_1, grade_2 = grade_2 + excluded.grade_2, grade_3 = grade_3 + excluded.grade_3, "
+    "grade_4 = grade_4 + excluded.grade_4, grade_5 = grade_5 + excluded.grade_5; INSERT INTO student_gpa "
+    "(student_id, graded_credits, grade_points) SELECT old.student_id, -1 * coalesce(credits, 0), -1 * "
+    "old.grade * coalesce(credits, 0) FROM courses WHERE id = old.course_id AND old.grade IS NOT NULL ON "
+    "CONFLICT (student_id) DO UPDATE SET graded_credits = graded_credits + excluded.graded_credits, "
+    "grade_points = grade_points + excluded.grade_points; END",
+    "CREATE TRIGGER IF NOT EXISTS enrollments_agg_au AFTER UPDATE OF student_id, course_id, grade ON "
+    "enrollments BEGIN INSERT INTO course_stats (course_id, enrolled, graded, grade_sum, grade_1, "
+    "grade_2, grade_3, grade_4, grade_5) VALUES (old.course_id, -1, -1 * (old.grade IS NOT NULL), -1 * "
+    "coalesce(old.grade, 0), -1 * (old.grade IS 1), -1 * (old.grade IS 2), -1 * (old.grade IS 3), -1 * "
+    "(old.grade IS 4), -1 * (old.grade IS 5)) ON CONFLICT (course_id) DO UPDATE SET enrolled = enrolled +"
+    " excluded.enrolled, graded = graded + excluded.graded, grade_sum = grade_sum + excluded.grade_sum, "
+    "grade_1 = grade_1 + excluded.grade_1, grade_2 = grade_2 + excluded.grade_2, grade_3 = grade_3 + "
+    "excluded.grade_3, grade_4 = grade_4 + excluded.grade_4, grade_5 = grade_5 + excluded.grade_5; INSERT"
+    " INTO student_gpa (student_id, graded_credits, grade_points) SELECT old.student_id, -1 * "
+    "coalesce(credits, 0), -1 * old.grade * coalesce(credits, 0) FROM courses WHERE id = old.course_id "
+    "AND old.grade IS NOT NULL ON CONFLICT (student_id) DO UPDATE SET graded_credits = graded_credits + "
+    "excluded.graded_credits, grade_points = grade_points + excluded.grade_points; INSERT INTO "
+    "course_stats (course_id, enrolled, graded, grade_sum, grade_1, grade_2, grade_3, grade_4, grade_5) "
+    "VALUES (new.course_id, 1, 1 * (new.grade IS NOT NULL), 1 * coalesce(new.grade, 0), 1 * (new.grade IS"
+    " 1), 1 * (new.grade IS 2), 1 * (new.grade IS 3), 1 * (new.grade IS 4), 1 * (new.grade IS 5)) ON "
+    "CONFLICT (course_id) DO UPDATE SET enrolled = enrolled + excluded.enrolled, graded = graded + "
+    "excluded.graded, grade_sum = grade_sum + excluded.grade_sum, grade_1 = grade_1 + excluded.grade_1, "
+    "grade_2 = grade_2 + excluded.grade_2, grade_3 = grade_3 + excluded.grade_3, grade_4 = grade_4 + "
+    "excluded.grade_4, grade_5 = grade_5 + excluded.grade_5; INSERT INTO student_gpa (student_id, "
+    "graded_credits, grade_points) SELECT new.student_id, 1 * coalesce(credits, 0), 1 * new.grade * "
+    "coalesce(credits, 0) FROM courses WHERE id = new.course_id AND new.grade IS NOT NULL ON CONFLICT "
+    "(student_id) DO UPDATE SET graded_credits = graded_credits + excluded.graded_credits, grade_points ="
+    " grade_points + excluded.grade_points; END",
+    "CREATE TRIGGER IF NOT EXISTS courses_agg_au AFTER UPDATE OF credits ON courses WHEN new.credits IS "
+    "NOT old.credits BEGIN UPDATE student_gpa SET graded_credits = graded_credits + coalesce(new.credits,"
+    " 0) - coalesce(old.credits, 0), grade_points = grade_points + (coalesce(new.credits, 0) - "
+    "coalesce(old.credits, 0)) * (SELECT grade FROM enrollments WHERE course_id = new.id AND student_id ="
+    " student_gpa.student_id) WHERE student_id IN (SELECT student_id FROM enrollments WHERE course_id = "
+    "new.id AND grade IS NOT NULL); END",
+    "CREATE TRIGGER IF NOT EXISTS courses_agg_ad AFTER DELETE ON courses BEGIN DELETE FROM course_stats "
+    "WHERE course_id = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS students_agg_ad AFTER DELETE ON students BEGIN DELETE FROM student_gpa "
+    "WHERE student_id = old.id; END",
+]
+
+BACKFILL = [
+    "INSERT INTO student_gpa (student_id, graded_credits, grade_points) SELECT e.student_id, "
+    "sum(coalesce(c.credits, 0)), sum(e.grade * coalesce(c.credits, 0)) FROM enrollments e JOIN courses c"
+    " ON c.id = e.course_id WHERE e.grade IS NOT NULL GROUP BY e.student_id",
+    "INSERT INTO course_stats (course_id, enrolled, graded, grade_sum, grade_1, grade_2, grade_3, "
+    "grade_4, grade_5) SELECT course_id, count(*), count(grade), coalesce(sum(grade), 0), sum(CASE WHEN "
+    "grade = 1 THEN 1 ELSE 0 END), sum(CASE WHEN grade = 2 THEN 1 ELSE 0 END), sum(CASE WHEN grade = 3 "
+    "THEN 1 ELSE 0 END), sum(CASE WHEN grade = 4 THEN 1 ELSE 0 END), sum(CASE WHEN grade = 5 THEN 1 ELSE "
+    "0 END) FROM enrollments GROUP BY course_id",
+]
+
+DROP_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS enrollments_agg_ai",
+    "DROP TRIGGER IF EXISTS enrollments_agg_ad",
+    "DROP TRIGGER IF EXISTS enrollments_agg_au",
+    "DROP TRIGGER IF EXISTS courses_agg_au",
+    "DROP TRIGGER IF EXISTS courses_agg_ad",
+    "DROP TRIGGER IF EXISTS students_agg_ad",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'student_gpa',
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('graded_credits', sa.Integer(), nullable=False),
+        sa.Column('grade_points', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('student_id'),
+    )
+    op.create_table(
+        'course_stats',
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.Column('enrolled', sa.Integer(), nullable=False),
+        sa.Column('graded', sa.Integer(), nullable=False),
+        sa.Column('grade_sum', sa.Integer(), nullable=False),
+        sa.Column('grade_1', sa.Integer(), nullable=False),
+        sa.Column('grade_2', sa.Integer(), nullable=False),
+        sa.Column('grade_3', sa.Integer(), nullable=False),
+        sa.Column('grade_4', sa.Integer(), nullable=False),
+        sa.Column('grade_5', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('course_id'),
+    )
+    for statement in BACKFILL:
+        op.execute(statement)
+    # Triggers keep the totals current on SQLite only; elsewhere they're computed on read
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for statement in TRIGGERS:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in DROP_TRIGGERS:
+            op.execute(statement)
+    op.drop_table('course_stats')
+    op.drop_table('student_gpa')
@@ -0,0 +1,36 @@
+"""End the admin filter indexes in the page order
+
+Revision ID: b6e2d9a4c7f1
+Revises: f3b8d6a1c5e2
+Create Date: 2026-10-18 19:41:07.402215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2d9a4c7f1'
+down_revision: Union[str, Sequence[str], None] = 'f3b8d6a1c5e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_enrollments_course_id_student_id', 'enrollments', ['course_id', 'student_id'])
+    op.create_index('ix_enrollments_course_id_grade_student_id', 'enrollments', ['course_id', 'grade', 'student_id'])
+    op.create_index('ix_enrollments_grade_student_id_course_id', 'enrollments', ['grade', 'student_id', 'course_id'])
+    op.drop_index('ix_enrollments_grade', table_name='enrollments')
+    op.drop_index('ix_enrollments_course_id_grade', table_name='enrollments')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_enrollments_course_id_grade', 'enrollments', ['course_id', 'grade'])
+    op.create_index('ix_enrollments_grade', 'enrollments', ['grade'])
+    op.drop_index('ix_enrollments_grade_student_id_course_id', table_name='enrollments')
+    op.drop_index('ix_enrollments_course_id_grade_student_id', table_name='enrollments')
+    op.drop_index('ix_enrollments_course_id_student_id', table_name='enrollments')
@@ -0,0 +1,33 @@
+"""Add enrollments.version for optimistic concurrency
+
+Revision ID: e4a7c1b9d2f0
+Revises: 9d2f6b1e8c37
+Create Date: 2026-10-18 16:12:45.903117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7c1b9d2f0'
+down_revision: Union[str, Sequence[str], None] = '9d2f6b1e8c37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'enrollments',
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # A plain ALTER TABLE ... DROP COLUMN (SQLite >= 3.35): batch mode would recreate
+    # and rename enrollments, which the aggregate triggers on it don't allow
+    op.drop_column('enrollments', 'version')
@@ -0,0 +1,34 @@
+"""Add indexes behind the admin enrollment filters
+
+Revision ID: f3b8d6a1c5e2
+Revises: e4a7c1b9d2f0
+Create Date: 2026-10-18 17:02:31.118604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d6a1c5e2'
+down_revision: Union[str, Sequence[str], None] = 'e4a7c1b9d2f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_enrollments_course_id_grade', 'enrollments', ['course_id', 'grade'])
+    op.create_index('ix_enrollments_grade', 'enrollments', ['grade'])
+    op.create_index('ix_courses_instructor_id', 'courses', ['instructor_id'])
+    op.create_index('ix_instructors_department', 'instructors', ['department'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_instructors_department', table_name='instructors')
+    op.drop_index('ix_courses_instructor_id', table_name='courses')
+    op.drop_index('ix_enrollments_grade', table_name='enrollments')
+    op.drop_index('ix_enrollments_course_id_grade', table_name='enrollments')
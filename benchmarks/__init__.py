@@ -0,0 +1 @@
+"""Endpoint benchmarks for the StuCoMaS API; see `benchmarks.run`."""
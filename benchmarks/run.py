@@ -0,0 +1,325 @@
+"""Drive every API route through the ASGI app and report latency percentiles.
+
+    python -m benchmarks.run --size small --requests 200 --concurrency 8
+
+The suite seeds a fresh SQLite file (1k, 100k or 1M enrollments), points
+the app's `get_db` dependency at it and runs each scenario from
+`benchmarks.scenarios` in turn with `--concurrency` in-process clients
+sharing `--requests` requests, over ``httpx.ASGITransport`` (no sockets,
+no network). Each route first gets `--warmup` unmeasured requests, then
+is measured `--repeats` times. Per route it reports the median over those
+runs of p50/p95/p99 latency and throughput, plus errors and the peak RSS
+seen while the route ran, writes everything to a JSON file, and compares
+it with the stored baseline for the same size: routes whose median
+latency grew by more than `--threshold` *and* by more than `--noise-floor`
+milliseconds are flagged and make the run exit with status 1, as does a
+route over its scenario's own latency target for the size (e.g. a cold
+analytics snapshot under a second at 1M enrollments).
+``--save-baseline`` stores the run as the new baseline. ``--fast-json``
+runs with `sprint2.fastjson` on, to compare against a standard baseline.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.scenarios import SCENARIOS, Context, Scenario
+from benchmarks.seed import SIZES, seed
+from sprint2 import fastjson
+from sprint2.config import Settings
+from sprint2.database import make_engine, unit_of_work
+
+BASELINES = Path(__file__).parent / "baselines"
+# Medians of warmed-up runs still move 30-40% between identical runs on a shared machine
+THRESHOLD = 0.5
+# ...and a 1ms route moving 30% is scheduler jitter, not a regression
+NOISE_FLOOR_MS = 5.0
+WARMUP = 20
+REPEATS = 3
+
+
+class RSSSampler:
+    """Peak resident set size of this process while a block runs, in MiB."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def current() -> int:
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            # No procfs: fall back to the process-wide high-water mark
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self.current()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+    @property
+    def peak_mib(self) -> float:
+        return round(self.peak / 2 ** 20, 1)
+
+
+async def load(client: httpx.AsyncClient, scenario: Scenario, ctx: Context, requests: int, concurrency: int) -> dict:
+    """One run of `requests` requests over `concurrency` clients: its percentiles, throughput and errors."""
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            kwargs = scenario.build(ctx)
+            started = time.perf_counter()
+            response = await client.request(scenario.method, **kwargs)
+            await response.aread()
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+            scenario.after(ctx, response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "throughput_rps": len(latencies) / elapsed,
+    }
+
+
+async def drive(client: httpx.AsyncClient, scenario: Scenario, ctx: Context, requests: int, concurrency: int,
+                warmup: int = 0, repeats: int = 1) -> dict:
+    """`warmup` unmeasured requests, then the median of `repeats` measured runs."""
+    if warmup:
+        await load(client, scenario, ctx, warmup, concurrency)
+    with RSSSampler() as rss:
+        runs = [await load(client, scenario, ctx, requests, concurrency) for _ in range(repeats)]
+
+    def median(key: str, digits: int) -> float:
+        return round(float(np.median([run[key] for run in runs])), digits)
+
+    return {
+        "requests": requests,
+        "errors": sum(run["errors"] for run in runs),
+        "p50_ms": median("p50_ms", 3),
+        "p95_ms": median("p95_ms", 3),
+        "p99_ms": median("p99_ms", 3),
+        "throughput_rps": median("throughput_rps", 1),
+        "peak_rss_mib": rss.peak_mib,
+    }
+
+
+def uncovered_routes(app) -> List[str]:
+    """Routes of `app` that no scenario exercises."""
+    covered = {(s.method, s.path) for s in SCENARIOS}
+    return sorted(
+        f"{method} {route.path}"
+        for route in app.routes
+        if hasattr(route, "methods") and route.include_in_schema
+        for method in route.methods
+        if method != "HEAD" and (method, route.path) not in covered
+    )
+
+
+def compare(result: dict, baseline: dict, threshold: float = THRESHOLD,
+            noise_floor_ms: float = NOISE_FLOOR_MS) -> List[str]:
+    """Human-readable regressions of `result` against `baseline`.
+
+    A route regresses when its p50 grew by more than `threshold` of the
+    baseline and by more than `noise_floor_ms`. Tails and throughput are
+    reported but not compared: a write's p95 is whichever requests waited
+    on a WAL checkpoint, and doubles between identical runs.
+    """
+    regressions = []
+    for name, now in result["routes"].items():
+        before = baseline.get("routes", {}).get(name)
+        if not before:
+            continue
+        grown = now["p50_ms"] - before["p50_ms"]
+        if grown > before["p50_ms"] * threshold and grown > noise_floor_ms:
+            regressions.append(f"{name}: p50 {before['p50_ms']:.2f} -> {now['p50_ms']:.2f} ms")
+        if now["errors"] > before["errors"]:
+            regressions.append(f"{name}: errors {before['errors']} -> {now['errors']}")
+    return regressions
+
+
+def missed_targets(result: dict) -> List[str]:
+    """Routes whose p95 is over their scenario's latency target."""
+    return [
+        f"{name}: p95 {route['p95_ms']:.2f} ms, target {route['target_ms']:.0f} ms"
+        for name, route in result["routes"].items()
+        if "target_ms" in route and route["p95_ms"] > route["target_ms"]
+    ]
+
+
+async def run_suite(app, get_db, database_url: str, size: str, requests: int, concurrency: int,
+                    profile: str = "prod", only: Optional[str] = None,
+                    warmup: int = 0, repeats: int = 1) -> dict:
+    settings = Settings(database_url=database_url, profile=profile)
+    engine = make_engine(settings)
+    started = time.perf_counter()
+    data = seed(engine, SIZES[size])
+    seed_seconds = time.perf_counter() - started
+    ctx = Context.load(engine, data)
+
+    sessions = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def bench_get_db():
+        with unit_of_work(sessions) as db:
+            yield db
+
+    previous = app.dependency_overrides.get(get_db)
+    app.dependency_overrides[get_db] = bench_get_db
+    routes: Dict[str, dict] = {}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario in SCENARIOS:
+                if only and only not in scenario.name:
+                    continue
+                routes[scenario.name] = await drive(
+                    client, scenario, ctx,
+                    min(requests, scenario.requests or requests),
+                    min(concurrency, scenario.concurrency or concurrency),
+                    min(warmup, scenario.requests or warmup),
+                    repeats,
+                )
+                if size in scenario.targets:
+                    routes[scenario.name]["target_ms"] = scenario.targets[size]
+    finally:
+        if previous is None:
+            app.dependency_overrides.pop(get_db, None)
+        else:
+            app.dependency_overrides[get_db] = previous
+        engine.dispose()
+
+    return {
+        "meta": {
+            "size": size,
+            "enrollments": data.enrollments,
+            "requests": requests,
+            "concurrency": concurrency,
+            "warmup": warmup,
+            "repeats": repeats,
+            "profile": profile,
+            "fast_json": fastjson.enabled,
+            "seed_seconds": round(seed_seconds, 2),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "routes": routes,
+        "uncovered": uncovered_routes(app),
+    }
+
+
+def print_table(result: dict) -> None:
+    print(f"{'route':<78} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'err':>5} {'RSS MiB':>8}")
+    for name, r in result["routes"].items():
+        print(
+            f"{name:<78} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+            f"{r['throughput_rps']:>8.0f} {r['errors']:>5} {r['peak_rss_mib']:>8.1f}"
+        )
+    for name in result["uncovered"]:
+        print(f"not benchmarked: {name}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run")
+    parser.add_argument("--size", choices=sorted(SIZES, key=SIZES.get), default="small")
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent in-process clients")
+    parser.add_argument("--warmup", type=int, default=WARMUP, help="unmeasured requests per route first")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="measured runs per route, medians reported")
+    parser.add_argument("--profile", default="prod", help="engine profile for the benchmark DB")
+    parser.add_argument("--only", help="run only routes whose name contains this")
+    parser.add_argument("--fast-json", action="store_true", help="render opted-in routes with orjson")
+    parser.add_argument("--output", type=Path, default=Path("benchmark-results.json"))
+    parser.add_argument("--baseline", type=Path, help="defaults to benchmarks/baselines/<size>.json")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed relative slowdown")
+    parser.add_argument("--noise-floor", type=float, default=NOISE_FLOOR_MS,
+                        help="slowdowns up to this many ms are never flagged")
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    from sprint2.api import app, get_db
+
+    fastjson.enabled = fastjson.enabled or args.fast_json
+
+    # Statement echo (dev profile) and over-budget warnings would drown the report
+    logging.getLogger("sqlalchemy.engine.Engine").setLevel(logging.WARNING)
+    logging.getLogger("sprint2").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        result = asyncio.run(
+            run_suite(app, get_db, url, args.size, args.requests, args.concurrency, args.profile, args.only,
+                      args.warmup, args.repeats)
+        )
+
+    print_table(result)
+    args.output.write_text(json.dumps(result, indent=2) + "\n")
+    print(f"results written to {args.output}")
+
+    missed = missed_targets(result)
+    for line in missed:
+        print(f"TARGET MISSED {line}")
+
+    baseline_path = args.baseline or BASELINES / f"{args.size}.json"
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"baseline saved to {baseline_path}")
+        return 1 if missed else 0
+    if not baseline_path.exists():
+        print(f"no baseline at {baseline_path}; run with --save-baseline to store one")
+        return 1 if missed else 0
+    baseline = json.loads(baseline_path.read_text())
+    for key in ("size", "requests", "concurrency", "warmup", "repeats", "profile", "fast_json"):
+        if baseline["meta"].get(key) != result["meta"][key]:
+            print(f"warning: baseline was run with {key}={baseline['meta'].get(key)}, this run with {result['meta'][key]}")
+    regressions = compare(result, baseline, args.threshold, args.noise_floor)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions or missed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""One request recipe per API route.
+
+A `Scenario` turns a request number into the keyword arguments of an
+``httpx`` request against a seeded `Dataset`. Ids are drawn from a seeded
+RNG, so reads spread over the data (and over the response cache) the same
+way on every run. Writes that need rows of their own take them from
+earlier scenarios: students created by ``POST /students/`` are the ones
+later enrolled by ``POST /enrollments/``, which is why the order of
+`SCENARIOS` matters.
+"""
+import itertools
+import json
+import random
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+from benchmarks.seed import Dataset
+from sprint2 import analytics
+from sprint2.models import Course, Enrollment
+
+
+@dataclass
+class Context:
+    data: Dataset
+    rng: random.Random
+    # (student_id, course_id) pairs known to exist
+    enrollments: List[Tuple[int, int]]
+    instructors: Dict[int, int]
+    new_students: List[int] = field(default_factory=list)
+    serial: itertools.count = field(default_factory=itertools.count)
+
+    @classmethod
+    def load(cls, engine: Engine, data: Dataset, seed: int = 0, sample: int = 5000) -> "Context":
+        with engine.connect() as conn:
+            pairs = conn.execute(
+                select(Enrollment.student_id, Enrollment.course_id).limit(sample)
+            ).all()
+            instructors = dict(conn.execute(select(Course.id, Course.instructor_id)).all())
+        return cls(data=data, rng=random.Random(seed), enrollments=[tuple(p) for p in pairs], instructors=instructors)
+
+    def student(self) -> int:
+        return self.rng.randint(1, self.data.students)
+
+    def course(self) -> int:
+        return self.rng.randint(1, self.data.courses)
+
+    def instructor_of(self, course_id: int) -> int:
+        return self.instructors[course_id]
+
+    def enrollment(self) -> Tuple[int, int]:
+        return self.rng.choice(self.enrollments)
+
+    def email(self, kind: str) -> str:
+        return f"bench-{kind}{next(self.serial)}@uni.edu"
+
+
+@dataclass(frozen=True)
+class Scenario:
+    method: str
+    path: str
+    build: Callable[[Context], dict]
+    # Called with the response, e.g. to remember created ids
+    after: Callable[[Context, object], None] = lambda ctx, response: None
+    # Tells apart two scenarios on the same route
+    label: str = ""
+    # Caps on the suite's --requests and --concurrency, for routes too slow to run at full settings
+    requests: Optional[int] = None
+    concurrency: Optional[int] = None
+    # p95 latency in ms the route must stay under at a given size, whatever the baseline says
+    targets: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        name = f"{self.method} {self.path}"
+        return f"{name} ({self.label})" if self.label else name
+
+
+def _student_body(ctx: Context) -> dict:
+    return {"first_name": "Bench", "last_name": "Mark", "email": ctx.email("student")}
+
+
+def _remember_student(ctx: Context, response) -> None:
+    if response.status_code == 200:
+        ctx.new_students.append(response.json()["id"])
+
+
+def _roster(ctx: Context) -> dict:
+    course = ctx.course()
+    return {"url": f"/instructors/{ctx.instructor_of(course)}/courses/{course}/students"}
+
+
+def _instructor_grade(ctx: Context) -> dict:
+    student, course = ctx.enrollment()
+    return {
+        "url": f"/instructors/{ctx.instructor_of(course)}/courses/{course}/students/{student}/grade",
+        "params": {"grade": ctx.rng.randint(1, 5)},
+    }
+
+
+def _bulk_grades(ctx: Context) -> dict:
+    student, course = ctx.enrollment()
+    rows = [{"student_id": s, "grade": ctx.rng.randint(1, 5)} for s, c in ctx.enrollments if c == course][:50]
+    return {"url": f"/instructors/{ctx.instructor_of(course)}/courses/{course}/grades", "json": rows}
+
+
+def _bulk_students(ctx: Context) -> dict:
+    rows = [_student_body(ctx) for _ in range(20)]
+    return {"url": "/students/bulk", "content": json.dumps(rows), "headers": {"content-type": "application/json"}}
+
+
+def _enroll(ctx: Context) -> dict:
+    student = ctx.new_students.pop() if ctx.new_students else ctx.student()
+    return {"url": "/enrollments/", "json": {"student_id": student, "course_id": ctx.course()}}
+
+
+def _grade(ctx: Context) -> dict:
+    student, course = ctx.enrollment()
+    return {"url": f"/enrollments/{student}/{course}/grade", "json": {"grade": ctx.rng.randint(1, 5)}}
+
+
+def _cold_distribution(ctx: Context) -> dict:
+    # Drop the cached snapshot so the request reads every enrollment again
+    analytics.snapshots.clear()
+    return {"url": "/admin/analytics/distribution"}
+
+
+def _admin_grade(ctx: Context) -> dict:
+    student, course = ctx.enrollment()
+    return {"url": f"/admin/students/{student}/courses/{course}/grade", "params": {"grade": ctx.rng.randint(1, 5)}}
+
+
+SCENARIOS: List[Scenario] = [
+    # Reads
+    Scenario("GET", "/students/", lambda ctx: {"url": "/students/", "params": {"limit": 100}}),
+    Scenario("GET", "/students/search", lambda ctx: {"url": "/students/search", "params": {"query": ctx.rng.choice(["chen", "alice", "uni.edu"])}}),
+    Scenario("GET", "/students/{student_id}/grades", lambda ctx: {"url": f"/students/{ctx.student()}/grades"}),
+    Scenario("GET", "/students/{student_id}/gpa", lambda ctx: {"url": f"/students/{ctx.student()}/gpa"}),
+    Scenario("GET", "/instructors/{instructor_id}/courses", lambda ctx: {"url": f"/instructors/{ctx.instructor_of(ctx.course())}/courses"}),
+    Scenario("GET", "/instructors/{instructor_id}/courses/{course_id}/students", _roster),
+    Scenario("GET", "/admin/enrollments", lambda ctx: {"url": "/admin/enrollments", "params": {"limit": 100}}),
+    Scenario("GET", "/admin/enrollments/export", lambda ctx: {"url": "/admin/enrollments/export"}),
+    Scenario("GET", "/admin/analytics/distribution", lambda ctx: {"url": "/admin/analytics/distribution"}),
+    # One at a time: concurrent requests would queue on the snapshot lock, each rebuilding it
+    Scenario("GET", "/admin/analytics/distribution", _cold_distribution, label="cold snapshot",
+             requests=20, concurrency=1, targets={"large": 1000.0}),
+    Scenario("GET", "/admin/analytics/departments", lambda ctx: {"url": "/admin/analytics/departments"}),
+    Scenario("GET", "/admin/analytics/instructors", lambda ctx: {"url": "/admin/analytics/instructors"}),
+    Scenario("GET", "/admin/analytics/correlations", lambda ctx: {"url": "/admin/analytics/correlations"}),
+    Scenario("GET", "/admin/analytics/report", lambda ctx: {"url": "/admin/analytics/report"}),
+    Scenario("GET", "/courses/search", lambda ctx: {"url": "/courses/search", "params": {"query": ctx.rng.choice(["calc", "mechanics", "PHY1"])}}),
+    Scenario("GET", "/courses/{course_id}/stats", lambda ctx: {"url": f"/courses/{ctx.course()}/stats"}),
+    # Writes
+    Scenario("POST", "/students/", lambda ctx: {"url": "/students/", "json": _student_body(ctx)}, _remember_student),
+    Scenario("POST", "/students/bulk", _bulk_students),
+    Scenario("POST", "/instructors/", lambda ctx: {"url": "/instructors/", "json": {
+        "first_name": "Bench", "last_name": "Mark", "email": ctx.email("instructor"), "department": "Physics",
+    }}),
+    Scenario("POST", "/courses/", lambda ctx: {"url": "/courses/", "json": {
+        "code": f"B{next(ctx.serial)}", "title": "Benchmarking", "credits": 3, "instructor_id": 1,
+    }}),
+    Scenario("POST", "/enrollments/", _enroll),
+    Scenario("PUT", "/enrollments/{student_id}/{course_id}/grade", _grade),
+    Scenario("PUT", "/instructors/{instructor_id}/courses/{course_id}/students/{student_id}/grade", _instructor_grade),
+    Scenario("PUT", "/instructors/{instructor_id}/courses/{course_id}/grades", _bulk_grades),
+    Scenario("PUT", "/admin/students/{student_id}/courses/{course_id}/grade", _admin_grade),
+]
@@ -0,0 +1,39 @@
+"""Benchmark data sizes, generated with `sprint2.seed`.
+
+Sizes are given in enrollments; the other tables scale with them (about
+ten enrollments per student, a thousand per course, five courses per
+instructor).
+"""
+from dataclasses import dataclass
+
+from sqlalchemy.engine import Engine
+
+from sprint2 import seed as generator
+
+SIZES = {"small": 1_000, "medium": 100_000, "large": 1_000_000}
+
+
+@dataclass(frozen=True)
+class Dataset:
+    students: int
+    instructors: int
+    courses: int
+    enrollments: int
+
+
+def config_for(enrollments: int, seed: int = 0) -> generator.SeedConfig:
+    students = max(enrollments // 10, 1)
+    courses = max(enrollments // 1000, 10)
+    return generator.SeedConfig(
+        students=students,
+        instructors=max(courses // 5, 1),
+        courses=courses,
+        avg_enrollments=enrollments / students,
+        seed=seed,
+    )
+
+
+def seed(engine: Engine, enrollments: int, seed: int = 0) -> Dataset:
+    """Create the schema on `engine` and fill it with about `enrollments` enrollments."""
+    report = generator.seed(engine, config_for(enrollments, seed), reset=True)
+    return Dataset(report.students, report.instructors, report.courses, report.enrollments)
@@ -0,0 +1,137 @@
+"""Summary tables behind student GPAs and course grade statistics.
+
+``student_gpa`` keeps each student's graded credits and credit-weighted
+grade points; ``course_stats`` keeps each course's enrollment count, graded
+count, grade sum and a histogram of grades 1–5. On SQLite, triggers on
+``enrollments`` apply every insert, delete and grade change to both as a
+constant-time delta, inside the statement (and so the transaction) that
+made it, whichever code path issued it. Changing a course's credits
+re-weights the GPAs of the students graded in it.
+
+Other dialects get no triggers and `crud` computes the figures from
+``enrollments`` instead. `rebuild` recomputes both tables from scratch;
+run it with ``python -m sprint2.aggregates rebuild``.
+"""
+import argparse
+from typing import List
+
+from sqlalchemy import DDL, MetaData, event
+from sqlalchemy.engine import Connection
+
+GRADES = range(1, 6)
+HISTOGRAM = tuple(f"grade_{g}" for g in GRADES)
+COURSE_COLUMNS = ("enrolled", "graded", "grade_sum") + HISTOGRAM
+TRIGGERS = ("enrollments_agg_ai", "enrollments_agg_ad", "enrollments_agg_au", "courses_agg_au",
+            "courses_agg_ad", "students_agg_ad")
+
+
+def _apply(row: str, sign: int) -> str:
+    """Statements adding (`sign` 1) or removing (-1) enrollment `row` from the totals."""
+    histogram = ", ".join(f"{sign} * ({row}.grade IS {g})" for g in GRADES)
+    course = (
+        f"INSERT INTO course_stats (course_id, {', '.join(COURSE_COLUMNS)}) "
+        f"VALUES ({row}.course_id, {sign}, {sign} * ({row}.grade IS NOT NULL), "
+        f"{sign} * coalesce({row}.grade, 0), {histogram}) "
+        "ON CONFLICT (course_id) DO UPDATE SET "
+        + ", ".join(f"{c} = {c} + excluded.{c}" for c in COURSE_COLUMNS) + ";"
+    )
+    student = (
+        "INSERT INTO student_gpa (student_id, graded_credits, grade_points) "
+        f"SELECT {row}.student_id, {sign} * coalesce(credits, 0), {sign} * {row}.grade * coalesce(credits, 0) "
+        f"FROM courses WHERE id = {row}.course_id AND {row}.grade IS NOT NULL "
+        "ON CONFLICT (student_id) DO UPDATE SET "
+        "graded_credits = graded_credits + excluded.graded_credits, "
+        "grade_points = grade_points + excluded.grade_points;"
+    )
+    return f"{course} {student}"
+
+
+def create_statements() -> List[str]:
+    """SQLite triggers keeping the summary tables in step with their sources."""
+    reweight = (
+        "UPDATE student_gpa SET "
+        "graded_credits = graded_credits + coalesce(new.credits, 0) - coalesce(old.credits, 0), "
+        "grade_points = grade_points + (coalesce(new.credits, 0) - coalesce(old.credits, 0)) * ("
+        "SELECT grade FROM enrollments WHERE course_id = new.id AND student_id = student_gpa.student_id) "
+        "WHERE student_id IN (SELECT student_id FROM enrollments WHERE course_id = new.id AND grade IS NOT NULL);"
+    )
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS enrollments_agg_ai AFTER INSERT ON enrollments BEGIN {_apply('new', 1)} END",
+        f"CREATE TRIGGER IF NOT EXISTS enrollments_agg_ad AFTER DELETE ON enrollments BEGIN {_apply('old', -1)} END",
+        "CREATE TRIGGER IF NOT EXISTS enrollments_agg_au AFTER UPDATE OF student_id, course_id, grade ON enrollments "
+        f"BEGIN {_apply('old', -1)} {_apply('new', 1)} END",
+        "CREATE TRIGGER IF NOT EXISTS courses_agg_au AFTER UPDATE OF credits ON courses "
+        f"WHEN new.credits IS NOT old.credits BEGIN {reweight} END",
+        "CREATE TRIGGER IF NOT EXISTS courses_agg_ad AFTER DELETE ON courses "
+        "BEGIN DELETE FROM course_stats WHERE course_id = old.id; END",
+        "CREATE TRIGGER IF NOT EXISTS students_agg_ad AFTER DELETE ON students "
+        "BEGIN DELETE FROM student_gpa WHERE student_id = old.id; END",
+    ]
+
+
+def drop_statements() -> List[str]:
+    return [f"DROP TRIGGER IF EXISTS {name}" for name in TRIGGERS]
+
+
+def rebuild_statements() -> List[str]:
+    """Recompute both summary tables from ``enrollments``."""
+    histogram = ", ".join(f"sum(CASE WHEN grade = {g} THEN 1 ELSE 0 END)" for g in GRADES)
+    return [
+        "DELETE FROM student_gpa",
+        "DELETE FROM course_stats",
+        "INSERT INTO student_gpa (student_id, graded_credits, grade_points) "
+        "SELECT e.student_id, sum(coalesce(c.credits, 0)), sum(e.grade * coalesce(c.credits, 0)) "
+        "FROM enrollments e JOIN courses c ON c.id = e.course_id "
+        "WHERE e.grade IS NOT NULL GROUP BY e.student_id",
+        f"INSERT INTO course_stats (course_id, {', '.join(COURSE_COLUMNS)}) "
+        f"SELECT course_id, count(*), count(grade), coalesce(sum(grade), 0), {histogram} "
+        "FROM enrollments GROUP BY course_id",
+    ]
+
+
+def rebuild(connection: Connection) -> None:
+    for statement in rebuild_statements():
+        connection.exec_driver_sql(statement)
+
+
+def maintained(dialect_name: str) -> bool:
+    """Whether the summary tables are kept current on this dialect."""
+    return dialect_name == "sqlite"
+
+
+def install(metadata: MetaData) -> None:
+    """Create the triggers with the schema on SQLite.
+
+    A freshly created ``student_gpa`` is filled from whatever enrollments
+    already exist, so adding the tables to a populated DB is safe.
+    """
+    def mark_created(target, connection, **kw):
+        connection.info["aggregates_created"] = True
+
+    def create(target, connection, **kw):
+        if connection.dialect.name != "sqlite":
+            return
+        for statement in create_statements():
+            connection.exec_driver_sql(statement)
+        if connection.info.pop("aggregates_created", False):
+            rebuild(connection)
+
+    event.listen(metadata.tables["student_gpa"], "after_create", mark_created)
+    event.listen(metadata, "after_create", create)
+    for statement in drop_statements():
+        event.listen(metadata, "before_drop", DDL(statement).execute_if(dialect="sqlite"))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m sprint2.aggregates")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+
+    from sprint2.database import engine
+    with engine.begin() as connection:
+        rebuild(connection)
+    print("Rebuilt student_gpa and course_stats.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Cohort analytics over every enrollment, computed with NumPy.
+
+`load` reads ``(student, course, grade, credits, instructor, department)``
+for all enrollments into column arrays, with one query over
+``enrollments`` and one over ``courses``. The resulting
+`Snapshot` is kept in memory and reused for as long as the change counters
+of ``enrollments``, ``courses`` and ``instructors`` (see `sprint2.etags`)
+stay put, so repeated reports between commits cost one small query plus
+the arithmetic. Every statistic below is a handful of vectorized passes
+(``bincount``, ``percentile``, ``searchsorted``) over those arrays.
+"""
+import itertools
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from sprint2 import etags
+from sprint2.models import Course, Instructor
+
+SOURCE_TABLES = ("courses", "enrollments", "instructors")
+PERCENTILES = (10, 25, 50, 75, 90)
+TOP_GRADE = 5
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    student_id: np.ndarray
+    course_id: np.ndarray
+    grade: np.ndarray  # float, NaN when ungraded
+    credits: np.ndarray  # float, 0 when unknown
+    instructor_id: np.ndarray  # -1 when the course has none
+    department: np.ndarray  # index into `departments`
+    departments: Tuple[Optional[str], ...]
+
+    @property
+    def graded(self) -> np.ndarray:
+        return ~np.isnan(self.grade)
+
+
+# Ungraded comes back as 0, below every grade the CHECK constraint allows, so every column is integers
+ENROLLMENTS_SQL = "SELECT student_id, course_id, coalesce(grade, 0) FROM enrollments"
+# SQLite: the same columns as one row of comma-separated lists, built in a single pass so they line up
+SQLITE_COLUMNS_SQL = (
+    "SELECT group_concat(student_id), group_concat(course_id), group_concat(coalesce(grade, 0)) FROM enrollments"
+)
+
+
+def _cursor_columns(connection) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    result = connection.exec_driver_sql(ENROLLMENTS_SQL)
+    try:
+        flat = np.fromiter(itertools.chain.from_iterable(result.cursor), dtype=np.int64)
+    finally:
+        result.close()
+    return tuple(flat.reshape(-1, 3).T)
+
+
+def _sqlite_columns(connection) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    row = connection.exec_driver_sql(SQLITE_COLUMNS_SQL).one()
+    return tuple(np.fromstring(text, dtype=np.int64, sep=",") if text else np.empty(0, np.int64) for text in row)
+
+
+def enrollment_columns(connection) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Student id, course id and grade (0 when ungraded) of every enrollment, as int64 arrays.
+
+    No `Row` is built and no per-row tuple is kept or transposed. On SQLite
+    the rows don't even reach Python one by one: each column arrives as one
+    string that NumPy parses. Elsewhere they're read straight off the DBAPI
+    cursor into one flat array.
+    """
+    if connection.dialect.name == "sqlite":
+        return _sqlite_columns(connection)
+    return _cursor_columns(connection)
+
+
+def courses_statement():
+    return (
+        select(Course.id, Course.credits, Course.instructor_id, Instructor.department)
+        .outerjoin(Instructor, Instructor.id == Course.instructor_id)
+        .order_by(Course.id)
+    )
+
+
+def load(db: Session) -> Snapshot:
+    """Read every enrollment into arrays.
+
+    Credits, instructor and department belong to the course, so they come
+    from a second query over ``courses`` and are spread over the
+    enrollments by array indexing instead of being repeated in every row.
+    Enrollments whose course isn't there are dropped, as a join would.
+    The enrollments come in column by column, see `enrollment_columns`.
+    """
+    connection = db.connection()
+    students, course_id, grades = enrollment_columns(connection)
+    courses = connection.execute(courses_statement()).all()
+    ids, credits, instructors, departments = zip(*courses) if courses else ((), (), (), ())
+
+    names, department = np.unique(np.array([d or "" for d in departments], dtype=object), return_inverse=True)
+    ids = np.array(ids, dtype=np.int64)
+    position = np.searchsorted(ids, course_id)
+    # searchsorted gives where a missing id would go: keep only the rows it found
+    known = position < ids.size
+    known[known] = ids[position[known]] == course_id[known]
+    position = position[known]
+    return Snapshot(
+        student_id=students[known],
+        course_id=course_id[known],
+        grade=np.where(grades > 0, grades, np.nan)[known],
+        credits=np.nan_to_num(np.array(credits, dtype=np.float64))[position],
+        instructor_id=np.nan_to_num(np.array(instructors, dtype=np.float64), nan=-1).astype(np.int64)[position],
+        department=department.astype(np.int64)[position],
+        departments=tuple(name or None for name in names),
+    )
+
+
+class SnapshotCache:
+    """Holds the latest snapshot and the counters it was built at."""
+
+    def __init__(self):
+        self._key = None
+        self._snapshot: Optional[Snapshot] = None
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> Snapshot:
+        key = tuple(sorted(db.execute(etags.versions_statement(SOURCE_TABLES)).all()))
+        with self._lock:
+            if self._snapshot is None or key != self._key:
+                self._snapshot, self._key = load(db), key
+            return self._snapshot
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshot = self._key = None
+
+
+snapshots = SnapshotCache()
+
+
+# ============================================================
+# 📊 STATISTICS
+# ============================================================
+
+def _float(value) -> Optional[float]:
+    """A JSON-safe float: NaN (an empty group) becomes None."""
+    value = float(value)
+    return None if np.isnan(value) else round(value, 4)
+
+
+def _group_means(groups: np.ndarray, values: np.ndarray, weights: Optional[np.ndarray] = None, size: int = 0):
+    """Per-group counts and (weighted) means of `values`, indexed by group number."""
+    weights = np.ones_like(values) if weights is None else weights
+    counts = np.bincount(groups, minlength=size)
+    total_weight = np.bincount(groups, weights=weights, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.bincount(groups, weights=values * weights, minlength=size) / total_weight
+    return counts, means
+
+
+def distribution(snapshot: Snapshot, percentiles: Sequence[float] = PERCENTILES) -> dict:
+    grades = snapshot.grade[snapshot.graded]
+    empty = grades.size == 0
+    values = np.full(len(percentiles), np.nan) if empty else np.percentile(grades, percentiles)
+    return {
+        "enrollments": int(snapshot.grade.size),
+        "graded": int(grades.size),
+        "mean": None if empty else _float(grades.mean()),
+        "std": None if empty else _float(grades.std()),
+        "percentiles": {f"p{p:g}": _float(v) for p, v in zip(percentiles, values)},
+    }
+
+
+def departments(snapshot: Snapshot) -> List[dict]:
+    graded = snapshot.graded
+    size = len(snapshot.departments)
+    enrollments = np.bincount(snapshot.department, minlength=size)
+    group = snapshot.department[graded]
+    counts, means = _group_means(group, snapshot.grade[graded], size=size)
+    _, weighted = _group_means(group, snapshot.grade[graded], snapshot.credits[graded], size=size)
+    return [
+        {
+            "department": name,
+            "enrollments": int(enrollments[i]),
+            "graded": int(counts[i]),
+            "mean": _float(means[i]),
+            "weighted_mean": _float(weighted[i]),
+        }
+        for i, name in enumerate(snapshot.departments)
+    ]
+
+
+def instructors(snapshot: Snapshot) -> List[dict]:
+    """Mean grade per instructor and how far it sits above the same students' other grades.
+
+    `inflation` is the mean, over an instructor's graded enrollments, of the
+    grade minus that student's mean grade in all their other courses;
+    students with no other graded course don't count towards it.
+    """
+    graded = snapshot.graded
+    student_index = np.unique(snapshot.student_id[graded], return_inverse=True)[1]
+    owners, owner_index = np.unique(snapshot.instructor_id[graded], return_inverse=True)
+    grades = snapshot.grade[graded]
+
+    student_count = np.bincount(student_index)
+    student_sum = np.bincount(student_index, weights=grades)
+    others = student_count[student_index] - 1
+    with np.errstate(invalid="ignore", divide="ignore"):
+        lift = grades - (student_sum[student_index] - grades) / others
+    comparable = others > 0
+
+    counts, means = _group_means(owner_index, grades, size=owners.size)
+    lifted, inflation = _group_means(owner_index[comparable], lift[comparable], size=owners.size)
+    _, top_share = _group_means(owner_index, (grades == TOP_GRADE).astype(np.float64), size=owners.size)
+    return [
+        {
+            "instructor_id": None if owner < 0 else int(owner),
+            "graded": int(counts[i]),
+            "mean": _float(means[i]),
+            "inflation": _float(inflation[i]) if lifted[i] else None,
+            "top_grade_share": _float(top_share[i]),
+        }
+        for i, owner in enumerate(owners)
+    ]
+
+
+def correlations(snapshot: Snapshot, limit: int = 20, min_common: int = 3) -> dict:
+    """Pearson correlation of grades between the `limit` most-graded courses.
+
+    Each pair is computed over the students graded in both (pairwise
+    complete); pairs with fewer than `min_common` shared students are
+    reported as null. The sums come from the (student, course) pairs a
+    student actually has, never a dense students x courses matrix, so the
+    work grows with the squared course counts per student, not the roster.
+    """
+    graded = snapshot.graded
+    course_ids, graded_counts = np.unique(snapshot.course_id[graded], return_counts=True)
+    top = np.sort(course_ids[np.argsort(-graded_counts, kind="stable")[:limit]])
+    picked = graded & np.isin(snapshot.course_id, top)
+
+    order = np.argsort(snapshot.student_id[picked], kind="stable")
+    students = snapshot.student_id[picked][order]
+    columns = np.searchsorted(top, snapshot.course_id[picked][order])
+    grades = snapshot.grade[picked][order]
+
+    # Every ordered pair of one student's grades, themselves included: `left` runs over each grade
+    # once per grade of the same student, `right` over that student's grades
+    starts = np.flatnonzero(np.r_[True, students[1:] != students[:-1]])
+    sizes = np.diff(np.r_[starts, students.size])
+    per_grade = np.repeat(sizes, sizes)
+    left = np.repeat(np.arange(students.size), per_grade)
+    first = np.repeat(np.repeat(starts, sizes), per_grade)
+    right = first + np.arange(left.size) - np.repeat(np.cumsum(per_grade) - per_grade, per_grade)
+
+    cells = top.size * top.size
+    pair = columns[left] * top.size + columns[right]
+    x, y = grades[left], grades[right]
+
+    def pair_sums(weights=None):
+        return np.bincount(pair, weights=weights, minlength=cells).reshape(top.size, top.size)
+
+    n = pair_sums()
+    sx = pair_sums(x)  # sx[i, j]: sum of course i grades over students with both i and j
+    sxx = pair_sums(x * x)
+    sxy = pair_sums(x * y)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = (n * sxy - sx * sx.T) / np.sqrt((n * sxx - sx ** 2) * (n * sxx.T - sx.T ** 2))
+    r[n < min_common] = np.nan
+    return {
+        "course_ids": [int(c) for c in top],
+        "common": n.astype(np.int64).tolist(),
+        "matrix": [[_float(v) for v in row] for row in r],
+    }
+
+
+def report(snapshot: Snapshot) -> dict:
+    return {
+        "distribution": distribution(snapshot),
+        "departments": departments(snapshot),
+        "instructors": instructors(snapshot),
+        "correlations": correlations(snapshot),
+    }
@@ -0,0 +1,220 @@
+"""Event-loop versions of the hot routes, backed by AsyncSession.
+
+Enabled with STUCOMAS_DB_MODE=async. `install` swaps these in for the
+threadpool routes of the same path and method, so both modes serve an
+identical API and can be benchmarked against each other. Routes without an
+async counterpart (bulk uploads, exports) keep running on the sync Session.
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from sprint2 import cache, crud, crud_async, database, etags, fastjson, fieldsets, schemas
+from sprint2.api import enrollment_filters
+from sprint2.cache import response_cache
+router = APIRouter()
+
+
+# --- Dependency: Async Database Session, one transaction per request ---
+async def get_async_db(request: Request):
+    async with database.async_unit_of_work(request.app.state.async_sessions) as db:
+        yield db
+
+
+students_etag = etags.conditional_async(get_async_db, "students")
+roster_etag = etags.conditional_async(get_async_db, "courses", "enrollments", "students")
+instructor_courses_etag = etags.conditional_async(get_async_db, "courses", "instructors")
+enrollments_etag = etags.conditional_async(get_async_db, "courses", "enrollments", "instructors", "students")
+
+
+def install(app: FastAPI) -> None:
+    """Replace the app's sync routes with the async ones defined here."""
+    swapped = {(route.path, frozenset(route.methods)) for route in router.routes}
+    app.router.routes[:] = [
+        route for route in app.router.routes
+        if (getattr(route, "path", None), frozenset(getattr(route, "methods", None) or ())) not in swapped
+    ]
+    app.include_router(router)
+
+
+# ============================================================
+# 🧑‍🎓 STUDENT ROUTES
+# ============================================================
+
+@router.post("/students/", response_model=schemas.Student)
+async def create_student(student: schemas.StudentCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.create_student(db, **student.model_dump())
+
+
+@router.get("/students/", response_model=List[schemas.Student], dependencies=[Depends(students_etag)])
+@fastjson.serialized(List[schemas.Student])
+async def get_students(
+    response: Response,
+    after: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    limit: int = Query(crud.PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE),
+    fields: Optional[str] = fieldsets.QUERY,
+    db: AsyncSession = Depends(get_async_db),
+):
+    fieldset = fieldsets.parse(schemas.Student, fields)
+    students = await crud_async.get_students(db, after=after, limit=limit, fields=fieldset)
+    return fieldsets.respond(crud.paginate(response, students, limit, lambda s: (s.id,)), fieldset, response)
+
+
+@router.get("/students/search", response_model=List[schemas.Student])
+@fastjson.serialized(List[schemas.Student])
+async def search_students(
+    query: str = Query(...),
+    limit: int = Query(crud.SEARCH_LIMIT, ge=1, le=crud.MAX_PAGE_SIZE),
+    fields: Optional[str] = fieldsets.QUERY,
+    db: AsyncSession = Depends(get_async_db),
+):
+    fieldset = fieldsets.parse(schemas.Student, fields)
+    return fieldsets.respond(await crud_async.search_students(db, query, limit, fieldset), fieldset)
+
+
+@router.get("/students/{student_id}/grades", response_model=List[schemas.StudentGrade])
+@response_cache.cached(List[schemas.StudentGrade], tags=cache.student_grades_tags)
+async def get_student_grades(student_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.get_student_grades(db, student_id)
+
+
+@router.get("/students/{student_id}/gpa", response_model=schemas.StudentGPA)
+async def get_student_gpa(student_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.get_student_gpa(db, student_id)
+
+
+# ============================================================
+# 👩‍🏫 INSTRUCTOR ROUTES
+# ============================================================
+
+@router.post("/instructors/", response_model=schemas.Instructor)
+async def create_instructor(instructor: schemas.InstructorCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.create_instructor(db, **instructor.model_dump())
+
+
+@router.get(
+    "/instructors/{instructor_id}/courses",
+    response_model=List[schemas.Course],
+    dependencies=[Depends(instructor_courses_etag)],
+)
+@response_cache.cached(List[schemas.Course], tags=cache.instructor_courses_tags)
+async def get_courses_by_instructor(
+    instructor_id: int, fields: Optional[str] = fieldsets.QUERY, db: AsyncSession = Depends(get_async_db)
+):
+    fieldset = fieldsets.parse(schemas.Course, fields)
+    return fieldsets.respond(await crud_async.get_courses_by_instructor(db, instructor_id, fieldset), fieldset)
+
+
+@router.get(
+    "/instructors/{instructor_id}/courses/{course_id}/students",
+    response_model=List[schemas.Student],
+    dependencies=[Depends(roster_etag)],
+)
+@fastjson.serialized(List[schemas.Student])
+async def get_students_in_course(
+    response: Response,
+    instructor_id: int,
+    course_id: int,
+    fields: Optional[str] = fieldsets.QUERY,
+    db: AsyncSession = Depends(get_async_db),
+):
+    fieldset = fieldsets.parse(schemas.Student, fields)
+    await crud_async.get_course_for_instructor(db, instructor_id, course_id)
+    return fieldsets.respond(await crud_async.get_students_in_course(db, course_id, fieldset), fieldset, response)
+
+
+@router.put("/instructors/{instructor_id}/courses/{course_id}/students/{student_id}/grade")
+async def assign_grade_instructor(
+    instructor_id: int,
+    course_id: int,
+    student_id: int,
+    grade: int,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    x_role: Optional[str] = Header(None),
+    if_match: Optional[str] = Header(None),
+):
+    if x_role and x_role.lower() != "instructor":
+        raise HTTPException(status_code=403, detail="Forbidden: Only instructors can assign grades")
+
+    await crud_async.get_course_for_instructor(db, instructor_id, course_id)
+    version = etags.if_match_version(if_match)
+    enrollment = await crud_async.assign_grade(db, student_id, course_id, grade, version, load_related=False)
+    response.headers["ETag"] = etags.version_etag(enrollment.version)
+    return enrollment
+
+
+# ============================================================
+# 🧑‍💼 ADMIN ROUTES
+# ============================================================
+
+@router.get("/admin/enrollments", response_model=List[schemas.Enrollment], dependencies=[Depends(enrollments_etag)])
+@fastjson.serialized(List[schemas.Enrollment])
+async def get_all_enrollments(
+    response: Response,
+    after: Optional[str] = Query(None, description="Cursor from the previous page's X-Next-Cursor header"),
+    limit: int = Query(crud.PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE),
+    fields: Optional[str] = fieldsets.QUERY,
+    filters: crud.EnrollmentFilters = Depends(enrollment_filters),
+    db: AsyncSession = Depends(get_async_db),
+):
+    fieldset = fieldsets.parse(schemas.Enrollment, fields)
+    enrollments = await crud_async.get_all_enrollments(db, after=after, limit=limit, fields=fieldset, filters=filters)
+    page = crud.paginate(response, enrollments, limit, lambda e: (e.student_id, e.course_id))
+    return fieldsets.respond(page, fieldset, response)
+
+
+@router.put("/admin/students/{student_id}/courses/{course_id}/grade")
+async def admin_assign_grade(
+    student_id: int, course_id: int, grade: int = Query(...), db: AsyncSession = Depends(get_async_db)
+):
+    """Admin assigns or updates a grade."""
+    return await crud_async.assign_grade_by_admin(db, student_id, course_id, grade)
+
+
+# ============================================================
+# 📘 COURSE & ENROLLMENT ROUTES
+# ============================================================
+
+@router.post("/courses/", response_model=schemas.Course)
+async def create_course(course: schemas.CourseCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.create_course(db, **course.model_dump())
+
+
+@router.get("/courses/search", response_model=List[schemas.Course])
+@response_cache.cached(List[schemas.Course], tags=cache.course_search_tags)
+async def search_courses(
+    query: str = Query(...),
+    limit: int = Query(crud.SEARCH_LIMIT, ge=1, le=crud.MAX_PAGE_SIZE),
+    fields: Optional[str] = fieldsets.QUERY,
+    db: AsyncSession = Depends(get_async_db),
+):
+    fieldset = fieldsets.parse(schemas.Course, fields)
+    return fieldsets.respond(await crud_async.search_courses(db, query, limit, fieldset), fieldset)
+
+
+@router.get("/courses/{course_id}/stats", response_model=schemas.CourseStats)
+async def get_course_stats(course_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.get_course_stats(db, course_id)
+
+
+@router.post("/enrollments/", response_model=schemas.Enrollment)
+async def enroll_student(enrollment: schemas.EnrollmentCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.enroll_student(db, enrollment.student_id, enrollment.course_id)
+
+
+@router.put("/enrollments/{student_id}/{course_id}/grade", response_model=schemas.Enrollment)
+async def assign_grade(
+    student_id: int,
+    course_id: int,
+    payload: schemas.EnrollmentGradeUpdate,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    if_match: Optional[str] = Header(None),
+):
+    """Set a grade. Send the enrollment's version as If-Match to refuse to overwrite a newer grade (409)."""
+    version = etags.if_match_version(if_match)
+    enrollment = await crud_async.assign_grade(db, student_id, course_id, payload.grade, version)
+    response.headers["ETag"] = etags.version_etag(enrollment.version)
+    return enrollment
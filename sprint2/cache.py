@@ -0,0 +1,268 @@
+"""Read-through cache for GET responses, invalidated on commit.
+
+`ResponseCache.cached` wraps a route: on a miss the route runs, its result
+is rendered to the JSON bytes FastAPI would send (by
+`sprint2.fastjson.Renderer`) and stored with the change tags (see
+`sprint2.changes`) the response depends on. Later requests with the same
+parameters are answered from the stored bytes without touching the DB.
+
+Every commit publishes the tags of the rows it changed and evicts the
+entries depending on them, so entries only outlive the data they were
+built from when the DB is written behind the ORM's back; the TTL bounds
+that case. The in-process `MemoryBackend` can be swapped for any
+`CacheBackend`, e.g. one backed by a store shared across workers.
+"""
+import functools
+import inspect
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from fastapi import Request, Response
+
+from sprint2 import changes, fastjson, querystats
+from sprint2.changes import Tag
+from sprint2.config import settings
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+@dataclass
+class _Entry:
+    value: bytes
+    tags: Set[Tag]
+    expires: float
+
+
+class CacheBackend(ABC):
+    """Storage for rendered responses, indexed by the tags they depend on."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, tags: Set[Tag], generation: int) -> None:
+        """Store `value` unless an invalidation happened since `generation`."""
+
+    @abstractmethod
+    def invalidate(self, tags: Iterable[Tag]) -> int:
+        """Evict entries depending on `tags`; returns how many were evicted."""
+
+    @abstractmethod
+    def generation(self) -> int:
+        """A number that moves forward on every invalidation."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class MemoryBackend(CacheBackend):
+    """An LRU bounded by entry count and total bytes, with a per-entry TTL."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # table -> keys of entries with any dependency on that table
+        self._by_table: Dict[str, Set[str]] = {}
+        self._bytes = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires < time.monotonic():
+                self._evict(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def set(self, key: str, value: bytes, tags: Set[Tag], generation: int) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = _Entry(value, tags, time.monotonic() + self.ttl)
+            self._bytes += len(value)
+            for table, _ in tags:
+                self._by_table.setdefault(table, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._evict(next(iter(self._entries)))
+
+    def invalidate(self, tags: Iterable[Tag]) -> int:
+        evicted = 0
+        with self._lock:
+            self._generation += 1
+            for change in tags:
+                for key in list(self._by_table.get(change[0], ())):
+                    entry = self._entries[key]
+                    if any(changes.matches(dependency, change) for dependency in entry.tags):
+                        self._discard(key)
+                        evicted += 1
+            self.stats.invalidations += evicted
+        return evicted
+
+    def generation(self) -> int:
+        return self._generation
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+
+    def _evict(self, key: str) -> None:
+        self._discard(key)
+        self.stats.evictions += 1
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.value)
+        for table, _ in entry.tags:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+
+# Route parameter types that take part in cache keys
+_KEY_TYPES = (str, int, float, bool, type(None))
+
+
+class ResponseCache:
+    def __init__(self, backend: CacheBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.stats = CacheStats()
+
+    def snapshot(self) -> Dict[str, int]:
+        """Counters from this cache and its backend, for metrics."""
+        backend_stats = getattr(self.backend, "stats", CacheStats())
+        return {
+            "hits": self.stats.hits,
+            "misses": self.stats.misses,
+            "evictions": backend_stats.evictions,
+            "invalidations": backend_stats.invalidations,
+        }
+
+    def invalidate(self, tags: Set[Tag]) -> None:
+        self.backend.invalidate(tags)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def cached(self, response_model, tags: Callable[[dict], Set[Tag]]):
+        """Serve a route from the cache.
+
+        `tags` receives the route's keyword arguments and returns the change
+        tags its response depends on. Headers set on the injected Response
+        (e.g. by dependencies) are carried over to cached responses too.
+
+        With a read replica (`sprint2.database.route`), a request sent to the
+        primary to read its client's own writes skips the lookup, and a
+        response read from a replica that is behind on its tags isn't stored.
+        """
+        renderer = fastjson.Renderer(response_model)
+
+        def decorator(endpoint):
+            signature = inspect.signature(endpoint)
+            name = f"{endpoint.__module__}.{endpoint.__qualname__}"
+            params = list(signature.parameters.values())
+            params.append(inspect.Parameter("cache_sub_response", inspect.Parameter.KEYWORD_ONLY, annotation=Response))
+            params.append(inspect.Parameter("cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+
+            def lookup(kwargs, request) -> Tuple[str, Optional[bytes], int]:
+                key = name + repr(sorted((k, v) for k, v in kwargs.items() if isinstance(v, _KEY_TYPES)))
+                generation = self.backend.generation()
+                if getattr(request.state, "bypass_cache", False):
+                    return key, None, generation
+                return key, self.backend.get(key), generation
+
+            def respond(key, body, generation, result, kwargs, sub_response, request) -> Response:
+                if body is None:
+                    self.stats.misses += 1
+                    if isinstance(result, Response):
+                        # Already rendered by the route, e.g. a sparse fieldset
+                        body = result.body
+                    else:
+                        with querystats.serializing():
+                            body = renderer(result)
+                    entry_tags = tags(kwargs)
+                    replica = getattr(request.state, "read_replica", None)
+                    if replica is None or not replica.behind_on(entry_tags):
+                        self.backend.set(key, body, entry_tags, generation)
+                    state = "MISS"
+                else:
+                    self.stats.hits += 1
+                    state = "HIT"
+                response = Response(content=body, media_type="application/json")
+                response.headers.raw.extend(sub_response.headers.raw)
+                response.headers["X-Cache"] = state
+                return response
+
+            if inspect.iscoroutinefunction(endpoint):
+                @functools.wraps(endpoint)
+                async def wrapper(*args, cache_sub_response: Response, cache_request: Request, **kwargs):
+                    if not self.enabled:
+                        return await endpoint(*args, **kwargs)
+                    key, body, generation = lookup(kwargs, cache_request)
+                    result = await endpoint(*args, **kwargs) if body is None else None
+                    return respond(key, body, generation, result, kwargs, cache_sub_response, cache_request)
+            else:
+                @functools.wraps(endpoint)
+                def wrapper(*args, cache_sub_response: Response, cache_request: Request, **kwargs):
+                    if not self.enabled:
+                        return endpoint(*args, **kwargs)
+                    key, body, generation = lookup(kwargs, cache_request)
+                    result = endpoint(*args, **kwargs) if body is None else None
+                    return respond(key, body, generation, result, kwargs, cache_sub_response, cache_request)
+
+            wrapper.__signature__ = signature.replace(parameters=params)
+            return wrapper
+
+        return decorator
+
+
+# What each cached route's response is built from
+def student_grades_tags(params: dict) -> Set[Tag]:
+    return {("students", params["student_id"]), ("courses", None)}
+
+
+def instructor_courses_tags(params: dict) -> Set[Tag]:
+    return {("instructors", params["instructor_id"])}
+
+
+def course_search_tags(params: dict) -> Set[Tag]:
+    return {("courses", None), ("instructors", None)}
+
+
+response_cache = ResponseCache(
+    MemoryBackend(
+        max_entries=settings.cache_max_entries,
+        max_bytes=settings.cache_max_bytes,
+        ttl=settings.cache_ttl,
+    ),
+    enabled=settings.cache_enabled,
+)
+changes.subscribe(response_cache.invalidate)
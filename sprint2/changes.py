@@ -0,0 +1,119 @@
+"""Which rows a transaction touched, published once it commits.
+
+A change is described by tags of the form ``(table, key)``: the primary
+key of the row that changed, plus ``(parent_table, fk_value)`` for each
+foreign key it holds, so a new enrollment also marks its student and its
+course. A key of ``None`` stands for "any row of the table"; bulk DML
+issued through ``Session.execute`` is tagged that way unless the caller
+passes precise tags in the ``change_tags`` execution option.
+
+Tags collect on the Session while it flushes and are handed to the
+subscribers (cache invalidation, ETag counters, ...) only after the
+outermost transaction commits. A rollback discards them. A session
+whose commit is part of a larger transaction can `defer` them instead.
+"""
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import ORMExecuteState, Session
+
+Tag = Tuple[str, Optional[object]]
+
+_PENDING = "stucomas_changes"
+_DEFERRED = "stucomas_changes_deferred"
+_subscribers: List[Callable[[Set[Tag]], None]] = []
+
+
+def subscribe(callback: Callable[[Set[Tag]], None]) -> Callable[[Set[Tag]], None]:
+    """Call `callback(tags)` after every commit that changed something."""
+    _subscribers.append(callback)
+    return callback
+
+
+def unsubscribe(callback: Callable[[Set[Tag]], None]) -> None:
+    _subscribers.remove(callback)
+
+
+def matches(dependency: Tag, change: Tag) -> bool:
+    """Whether `change` touches what `dependency` stands for; a None key matches any row."""
+    table, key = dependency
+    changed_table, changed_key = change
+    return table == changed_table and (key is None or changed_key is None or key == changed_key)
+
+
+def publish(tags: Set[Tag]) -> None:
+    for callback in _subscribers:
+        callback(tags)
+
+
+def record(session: Session, tags: Iterable[Tag]) -> None:
+    """Add tags to the session's pending set, published on commit."""
+    session.info.setdefault(_PENDING, set()).update(tags)
+
+
+def defer(session: Session, sink: Set[Tag]) -> None:
+    """Collect what `session` commits into `sink` instead of publishing it.
+
+    For sessions whose commit is not the real one, such as those
+    `sprint2.groupcommit` runs inside a larger transaction.
+    """
+    session.info[_DEFERRED] = sink
+
+
+def tags_for(obj) -> Set[Tag]:
+    """Tags for one ORM object: its own key and the parents it points at."""
+    state = inspect(obj)
+    mapper = state.mapper
+    table = mapper.local_table
+    key = tuple(mapper.primary_key_from_instance(obj))
+    tags = {(table.name, key[0] if len(key) == 1 else key)}
+    for fk in table.foreign_keys:
+        attr = mapper.get_property_by_column(fk.parent).key
+        values = state.attrs[attr].history.sum()
+        if not values and not state.deleted and attr in state.unloaded:
+            values = [getattr(obj, attr)]
+        for value in values:
+            if value is not None:
+                tags.add((fk.column.table.name, value))
+    return tags
+
+
+def table_tags(table) -> Set[Tag]:
+    """Tags for an untargeted change to `table`: every row, and every parent."""
+    return {(table.name, None)} | {(fk.column.table.name, None) for fk in table.foreign_keys}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session, flush_context):
+    tags = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        tags |= tags_for(obj)
+    if tags:
+        record(session, tags)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_executed(state: ORMExecuteState):
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    tags = state.execution_options.get("change_tags")
+    record(state.session, tags if tags is not None else table_tags(state.statement.table))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session):
+    if session.in_nested_transaction():
+        return
+    tags = session.info.pop(_PENDING, None)
+    if not tags:
+        return
+    if _DEFERRED in session.info:
+        session.info[_DEFERRED].update(tags)
+    else:
+        publish(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    if not session.in_nested_transaction():
+        session.info.pop(_PENDING, None)
@@ -0,0 +1,203 @@
+"""Runtime settings, read from ``STUCOMAS_*`` environment variables.
+
+Values can also live in a ``.env`` file (path overridable with
+``STUCOMAS_ENV_FILE``); real environment variables win over the file.
+"""
+import os
+from dataclasses import dataclass, field, replace
+from typing import Dict, Mapping, Optional
+
+DB_MODES = ("sync", "async")
+SCHEMA_CHECKS = ("verify", "create", "off")
+
+# Async driver for each sync URL scheme we deploy with
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def async_url(url: str) -> str:
+    """The async-driver equivalent of a sync database URL."""
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+# ============================================================
+# 🗄️ ENGINE PROFILES
+# ============================================================
+
+@dataclass(frozen=True)
+class EngineProfile:
+    echo: bool = False
+    # PRAGMAs run on every new SQLite connection, in order
+    pragmas: Dict[str, object] = field(default_factory=dict)
+    # Pool sizing only applies to server databases (PostgreSQL)
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_pre_ping: bool = False
+    pool_recycle: int = -1
+    # At worker start: "verify" the DB is at the Alembic head, "create" missing tables, or "off"
+    schema_check: str = "verify"
+
+
+PROFILES: Dict[str, EngineProfile] = {
+    # Local development, opt-in: logs every statement with its parameters (student emails included).
+    # Foreign keys are enforced in every profile: a missing student or course is a 404, not an orphan row.
+    "dev": EngineProfile(echo=True, pragmas={"foreign_keys": "ON"}, schema_check="create"),
+    # Test runs: quiet, otherwise SQLite defaults, fixtures own the schema
+    "test": EngineProfile(pragmas={"foreign_keys": "ON"}, schema_check="off"),
+    # The default
+    "prod": EngineProfile(
+        pragmas={
+            # Readers no longer block on the single writer
+            "journal_mode": "WAL",
+            # Durable across application crashes; an fsync per checkpoint, not per commit
+            "synchronous": "NORMAL",
+            "foreign_keys": "ON",
+            "busy_timeout": 5000,
+            "cache_size": -64000,
+            "mmap_size": 268435456,
+            "temp_store": "MEMORY",
+        },
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+    ),
+}
+
+# Changed on the database file itself, so only the primary's engine sets them
+FILE_PRAGMAS = ("journal_mode",)
+
+
+def read_only(profile: EngineProfile) -> EngineProfile:
+    """`profile` for an engine that must never write, such as the read replica's.
+
+    The file-level PRAGMAs are left to the primary: switching to WAL
+    writes to the file, which a ``mode=ro`` connection can't do. Instead
+    ``query_only`` makes any write through the engine fail.
+    """
+    pragmas = {name: value for name, value in profile.pragmas.items() if name not in FILE_PRAGMAS}
+    return replace(profile, pragmas={**pragmas, "query_only": "ON"}, schema_check="off")
+
+
+# ============================================================
+# ⚙️ SETTINGS
+# ============================================================
+
+def read_env_file(path: str) -> Dict[str, str]:
+    """Parse ``KEY=VALUE`` lines; blank lines and ``#`` comments are skipped."""
+    values = {}
+    try:
+        with open(path, encoding="utf-8") as env_file:
+            for line in env_file:
+                line = line.strip()
+                if not line or line.startswith("#") or "=" not in line:
+                    continue
+                key, _, value = line.partition("=")
+                values[key.strip()] = value.strip().strip("'\"")
+    except FileNotFoundError:
+        pass
+    return values
+
+
+def _flag(value: Optional[str]) -> Optional[bool]:
+    if value is None or value == "":
+        return None
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _int(value: Optional[str], default: Optional[int] = None) -> Optional[int]:
+    """`value` as an int, or `default` when unset; an explicit 0 stays 0."""
+    return int(value) if value not in (None, "") else default
+
+
+@dataclass(frozen=True)
+class Settings:
+    database_url: str = "sqlite:///./students.db"
+    # Empty means "derive from database_url"
+    async_database_url: str = ""
+    # "sync": threadpool routes on Session; "async": event-loop routes on AsyncSession
+    db_mode: str = "sync"
+    # Named engine profile, see PROFILES. Quiet unless STUCOMAS_PROFILE=dev asks for SQL logging.
+    profile: str = "prod"
+    # Per-knob overrides of the profile; None keeps the profile's value
+    sql_echo: Optional[bool] = None
+    pool_size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    schema_check: Optional[str] = None
+    # Requests running more SQL statements than this are logged; 0 disables
+    query_budget: int = 10
+    # Read-through response cache, see sprint2.cache
+    cache_enabled: bool = True
+    cache_max_entries: int = 1024
+    cache_max_bytes: int = 32 * 1024 * 1024
+    cache_ttl: float = 60.0
+    # orjson rendering without response-model validation, see sprint2.fastjson
+    fast_json: bool = False
+    # Prometheus metrics at /metrics, see sprint2.metrics
+    metrics_enabled: bool = True
+    # gc.freeze() once the app is built, so preforked workers keep sharing its pages
+    gc_freeze: bool = True
+    # Batch grade and enrollment writes into shared transactions, see sprint2.groupcommit
+    group_commit: bool = False
+    group_commit_window_ms: float = 2.0
+    # Read-only requests go to this database, see sprint2.database.Replica. With a refresh
+    # interval it is a copy of the primary refreshed that often; without, it reads the
+    # primary's own file (a read-only URI).
+    replica_url: str = ""
+    replica_refresh_seconds: float = 0.0
+
+    def __post_init__(self):
+        if self.db_mode not in DB_MODES:
+            raise ValueError(f"STUCOMAS_DB_MODE must be one of {DB_MODES}, got {self.db_mode!r}")
+        if self.profile not in PROFILES:
+            raise ValueError(f"STUCOMAS_PROFILE must be one of {tuple(PROFILES)}, got {self.profile!r}")
+        if self.schema_check is not None and self.schema_check not in SCHEMA_CHECKS:
+            raise ValueError(f"STUCOMAS_SCHEMA_CHECK must be one of {SCHEMA_CHECKS}, got {self.schema_check!r}")
+        if not self.async_database_url:
+            object.__setattr__(self, "async_database_url", async_url(self.database_url))
+
+    @property
+    def engine_profile(self) -> EngineProfile:
+        """The named profile with any per-knob overrides applied."""
+        profile = PROFILES[self.profile]
+        overrides = {
+            "echo": self.sql_echo,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "schema_check": self.schema_check,
+        }
+        return replace(profile, **{key: value for key, value in overrides.items() if value is not None})
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> "Settings":
+        environ = os.environ if environ is None else environ
+        env = {**read_env_file(environ.get("STUCOMAS_ENV_FILE", ".env")), **environ}
+        return cls(
+            database_url=env.get("STUCOMAS_DATABASE_URL", cls.database_url),
+            async_database_url=env.get("STUCOMAS_ASYNC_DATABASE_URL", ""),
+            db_mode=env.get("STUCOMAS_DB_MODE", cls.db_mode).lower(),
+            profile=env.get("STUCOMAS_PROFILE", cls.profile).lower(),
+            sql_echo=_flag(env.get("STUCOMAS_SQL_ECHO")),
+            pool_size=_int(env.get("STUCOMAS_POOL_SIZE")),
+            max_overflow=_int(env.get("STUCOMAS_MAX_OVERFLOW")),
+            schema_check=(env.get("STUCOMAS_SCHEMA_CHECK") or "").lower() or None,
+            query_budget=_int(env.get("STUCOMAS_QUERY_BUDGET"), cls.query_budget),
+            cache_enabled=_flag(env.get("STUCOMAS_CACHE")) is not False,
+            cache_max_entries=_int(env.get("STUCOMAS_CACHE_MAX_ENTRIES"), cls.cache_max_entries),
+            cache_max_bytes=_int(env.get("STUCOMAS_CACHE_MAX_BYTES"), cls.cache_max_bytes),
+            cache_ttl=float(env.get("STUCOMAS_CACHE_TTL") or cls.cache_ttl),
+            fast_json=bool(_flag(env.get("STUCOMAS_FAST_JSON"))),
+            metrics_enabled=_flag(env.get("STUCOMAS_METRICS")) is not False,
+            gc_freeze=_flag(env.get("STUCOMAS_GC_FREEZE")) is not False,
+            group_commit=bool(_flag(env.get("STUCOMAS_GROUP_COMMIT"))),
+            group_commit_window_ms=float(env.get("STUCOMAS_GROUP_COMMIT_WINDOW_MS") or cls.group_commit_window_ms),
+            replica_url=env.get("STUCOMAS_REPLICA_URL", ""),
+            replica_refresh_seconds=float(env.get("STUCOMAS_REPLICA_REFRESH_SECONDS") or cls.replica_refresh_seconds),
+        )
+
+
+settings = Settings.from_env()
@@ -1,6 +1,212 @@
-from fastapi import HTTPException
+import base64
+import json
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from pydantic import ValidationError
+from sqlalchemy import bindparam, case, column, func, insert, or_, select, table, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connectable, Row
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, joinedload
-from sprint2.models import Student, Instructor, Course, Enrollment
+from sprint2 import aggregates, changes, etags, schemas, search
+from sprint2.fieldsets import FieldSet
+from sprint2.models import Student, Instructor, Course, Enrollment, StudentGPA, CourseStats
+
+
+# ============================================================
+# 🔖 KEYSET PAGINATION
+# ============================================================
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+SEARCH_LIMIT = 50
+
+
+def encode_cursor(key: Tuple) -> str:
+    """Turn the sort key of the last row on a page into an opaque token."""
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> Tuple:
+    """Reverse `encode_cursor`, rejecting tokens that don't match the key shape."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        key = json.loads(raw)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+    if not isinstance(key, list) or len(key) != size or not all(type(k) is int for k in key):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+    return tuple(key)
+
+
+def paginate(response: Response, rows: list, limit: int, key: Callable[[object], Tuple]):
+    """Trim the look-ahead row fetched by a page query and expose the next cursor.
+
+    The body stays a plain list; the cursor for the following page travels
+    in the `X-Next-Cursor` header and is absent on the last page.
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(key(rows[-1]))
+    return rows
+
+
+_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def insert_for(dialect_name: str, model):
+    """An INSERT that supports ON CONFLICT on the dialects we deploy to."""
+    return _INSERTS.get(dialect_name, insert)(model)
+
+
+def dialect_insert(db: Session, model):
+    return insert_for(db.get_bind().dialect.name, model)
+
+
+# ============================================================
+# ✍️ SINGLE-STATEMENT WRITES
+# ============================================================
+# Each write is one INSERT ... ON CONFLICT or UPDATE ... RETURNING rather
+# than a SELECT, an INSERT or UPDATE and a refresh. The database decides
+# what exists, so two requests racing for the same row get a clean 409
+# instead of a 500 from the loser's IntegrityError.
+
+DUPLICATE_STUDENT = "Student with this email already exists."
+DUPLICATE_INSTRUCTOR = "Instructor with this email already exists."
+ALREADY_ENROLLED = "Already enrolled."
+ENROLLMENT_NOT_FOUND = "Enrollment not found."
+GRADE_OUT_OF_RANGE = "Grade must be between 1 and 5."
+STUDENT_OR_COURSE_NOT_FOUND = "Student or course not found."
+STALE_ENROLLMENT = "Enrollment has changed since version {version}."
+
+
+def integrity_status(exc: IntegrityError) -> Optional[int]:
+    """404 for a missing parent row, 409 for a duplicate, 400 for a value a CHECK rejects."""
+    message = str(exc.orig).lower()
+    if "foreign key" in message:
+        return 404
+    if "unique" in message or "duplicate key" in message:
+        return 409
+    if "check" in message:
+        return 400
+    return None
+
+
+def integrity_error(exc: IntegrityError, details: Dict[int, str]) -> Optional[HTTPException]:
+    """The HTTPException `exc` maps to, if `details` has a message for its status."""
+    status = integrity_status(exc)
+    if status not in details:
+        return None
+    return HTTPException(status_code=status, detail=details[status])
+
+
+@contextmanager
+def constraint_errors(details: Dict[int, str]):
+    """Raise `integrity_error` for a constraint violation in the block."""
+    try:
+        yield
+    except IntegrityError as exc:
+        error = integrity_error(exc, details)
+        if error is None:
+            raise
+        raise error from exc
+
+
+def write_returning(db: Session, stmt):
+    """Run a single-row INSERT/UPDATE ... RETURNING <entity>: the row written, or None.
+
+    The change is tagged with that row rather than its whole table.
+    """
+    row = db.scalars(stmt, execution_options={"change_tags": set(), "populate_existing": True}).first()
+    if row is not None:
+        changes.record(db, changes.tags_for(row))
+    return row
+
+
+def created(row, duplicate: str):
+    """The row an ``ON CONFLICT DO NOTHING`` insert returned; no row means it already existed."""
+    if row is None:
+        raise HTTPException(status_code=409, detail=duplicate)
+    return row
+
+
+def student_insert(dialect_name: str, first_name: str, last_name: str, email: str):
+    stmt = insert_for(dialect_name, Student).values(first_name=first_name, last_name=last_name, email=email)
+    if hasattr(stmt, "on_conflict_do_nothing"):
+        stmt = stmt.on_conflict_do_nothing(index_elements=[Student.email])
+    return stmt.returning(Student)
+
+
+def instructor_insert(dialect_name: str, first_name: str, last_name: str, email: str, department: str):
+    stmt = insert_for(dialect_name, Instructor).values(
+        first_name=first_name, last_name=last_name, email=email, department=department
+    )
+    if hasattr(stmt, "on_conflict_do_nothing"):
+        stmt = stmt.on_conflict_do_nothing(index_elements=[Instructor.email])
+    return stmt.returning(Instructor)
+
+
+def enrollment_insert(dialect_name: str, student_id: int, course_id: int):
+    stmt = insert_for(dialect_name, Enrollment).values(student_id=student_id, course_id=course_id)
+    if hasattr(stmt, "on_conflict_do_nothing"):
+        stmt = stmt.on_conflict_do_nothing(index_elements=[Enrollment.student_id, Enrollment.course_id])
+    return stmt.returning(Enrollment)
+
+
+def grade_update(student_id: int, course_id: int, grade: int, version: Optional[int] = None):
+    """Set a grade and bump the version; with `version`, only if the row is still at it."""
+    stmt = update(Enrollment).where(Enrollment.student_id == student_id, Enrollment.course_id == course_id)
+    if version is not None:
+        stmt = stmt.where(Enrollment.version == version)
+    return stmt.values(grade=grade, version=Enrollment.version + 1).returning(Enrollment)
+
+
+def grade_upsert(dialect_name: str, student_id: int, course_id: int, grade: int):
+    """Set a grade, enrolling the student first if needed."""
+    stmt = insert_for(dialect_name, Enrollment).values(student_id=student_id, course_id=course_id, grade=grade)
+    return stmt.on_conflict_do_update(
+        index_elements=[Enrollment.student_id, Enrollment.course_id],
+        set_={"grade": stmt.excluded.grade, "version": Enrollment.version + 1},
+    ).returning(Enrollment)
+
+
+def grade_conflict(current: Optional[Enrollment], version: Optional[int],
+                   missing: str = ENROLLMENT_NOT_FOUND) -> HTTPException:
+    """Why a `grade_update` matched no row: 404 without an enrollment, else 409 with the current one."""
+    if current is None:
+        return HTTPException(status_code=404, detail=missing)
+    state = {
+        "student_id": current.student_id,
+        "course_id": current.course_id,
+        "grade": current.grade,
+        "version": current.version,
+    }
+    return HTTPException(
+        status_code=409,
+        detail={"message": STALE_ENROLLMENT.format(version=version), "current": state},
+        headers={"ETag": etags.version_etag(current.version)},
+    )
+
+
+def set_grade(db: Session, student_id: int, course_id: int, grade: int, version: Optional[int] = None,
+              missing: str = ENROLLMENT_NOT_FOUND):
+    # The CHECK constraint only sees rows the UPDATE matched: a missing or stale row wins over a bad grade
+    with constraint_errors({400: GRADE_OUT_OF_RANGE}):
+        enrollment = write_returning(db, grade_update(student_id, course_id, grade, version))
+    if enrollment is None:
+        current = db.get(Enrollment, (student_id, course_id), populate_existing=True)
+        raise grade_conflict(current, version, missing)
+    return enrollment
+
+
+def _first_error(exc: ValidationError) -> str:
+    error = exc.errors()[0]
+    location = ".".join(str(part) for part in error["loc"])
+    return f"{location}: {error['msg']}" if location else error["msg"]
 
 
 # ============================================================
@@ -8,26 +214,111 @@ from sprint2.models import Student, Instructor, Course, Enrollment
 # ============================================================
 
 def create_student(db: Session, first_name: str, last_name: str, email: str):
-    if db.query(Student).filter_by(email=email).first():
-        raise HTTPException(status_code=400, detail="Student with this email already exists.")
-    student = Student(first_name=first_name, last_name=last_name, email=email)
-    db.add(student)
-    db.commit()
-    db.refresh(student)
-    return student
+    with constraint_errors({409: DUPLICATE_STUDENT}):
+        student = write_returning(db, student_insert(db.get_bind().dialect.name, first_name, last_name, email))
+    return created(student, DUPLICATE_STUDENT)
+
+
+def bulk_create_students(db: Session, rows: List[dict], batch_size: int = 1000):
+    """Insert many students with one multi-row INSERT per batch.
+
+    Every row is validated first; rows whose email already exists, in the
+    table or earlier in the same payload, are reported as duplicates via
+    `ON CONFLICT (email) DO NOTHING` instead of a SELECT per row.
+    """
+    results = {}
+    pending = []
+    for index, row in enumerate(rows):
+        try:
+            student = schemas.StudentCreate.model_validate(row)
+        except ValidationError as exc:
+            email = row.get("email") if isinstance(row, dict) else None
+            results[index] = schemas.BulkRowResult(
+                row=index, status="invalid", email=email, detail=_first_error(exc)
+            )
+            continue
+        pending.append((index, student.model_dump()))
+
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        stmt = dialect_insert(db, Student)
+        if hasattr(stmt, "on_conflict_do_nothing"):
+            stmt = stmt.on_conflict_do_nothing(index_elements=[Student.email])
+        created = dict(
+            db.execute(
+                stmt.returning(Student.email, Student.id),
+                [values for _, values in batch],
+            ).all()
+        )
+        for index, values in batch:
+            email = values["email"]
+            student_id = created.pop(email, None)
+            if student_id is not None:
+                results[index] = schemas.BulkRowResult(row=index, status="created", email=email, id=student_id)
+            else:
+                results[index] = schemas.BulkRowResult(
+                    row=index, status="duplicate", email=email, detail=DUPLICATE_STUDENT
+                )
+
+    report = [results[index] for index in sorted(results)]
+    return schemas.BulkStudentReport(
+        created=sum(r.status == "created" for r in report),
+        duplicates=sum(r.status == "duplicate" for r in report),
+        invalid=sum(r.status == "invalid" for r in report),
+        rows=report,
+    )
 
 
-def get_students(db: Session):
-    return db.query(Student).all()
+def students_page(after: Optional[str] = None, limit: Optional[int] = None):
+    """SELECT for a page of students in id order, starting after the `after` cursor.
 
+    One extra row past `limit` is fetched so callers can tell whether
+    another page exists without issuing a COUNT.
+    """
+    stmt = select(Student).order_by(Student.id.asc())
+    if after:
+        (last_id,) = decode_cursor(after, 1)
+        stmt = stmt.where(Student.id > last_id)
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    return stmt
 
-def search_students(db: Session, query: str):
+
+def with_fields(stmt, entity, fields: Optional[FieldSet], *default_options):
+    """`stmt` loading just `fields` of `entity`, or with `default_options` when all are wanted."""
+    return stmt.options(*(fields.options(entity) if fields else default_options))
+
+
+def get_students(db: Session, after: Optional[str] = None, limit: Optional[int] = None,
+                 fields: Optional[FieldSet] = None):
+    return db.scalars(with_fields(students_page(after, limit), Student, fields)).all()
+
+
+def search_statement(dialect_name: str, model, query: str, limit: int):
+    """SELECT for the best-ranked rows of `model` containing `query` in any indexed column.
+
+    Served by the FTS5 trigram index on SQLite; short queries and other
+    dialects fall back to ORed `ilike` filters.
+    """
+    name = model.__tablename__
+    if search.uses_index(dialect_name, query):
+        fts = table(search.fts_name(name), column("rowid"))
+        return (
+            select(model)
+            .join(fts, fts.c.rowid == model.id)
+            .where(search.match(name, query))
+            .order_by(search.rank(name), model.id)
+            .limit(limit)
+        )
+    pattern = f"%{query}%"
+    filters = [getattr(model, c).ilike(pattern) for c in search.FTS_COLUMNS[name]]
+    return select(model).where(or_(*filters)).order_by(model.id).limit(limit)
+
+
+def search_students(db: Session, query: str, limit: int = 50, fields: Optional[FieldSet] = None):
     """Search students by name or email."""
-    return db.query(Student).filter(
-        (Student.first_name.ilike(f"%{query}%")) |
-        (Student.last_name.ilike(f"%{query}%")) |
-        (Student.email.ilike(f"%{query}%"))
-    ).all()
+    stmt = search_statement(db.get_bind().dialect.name, Student, query, limit)
+    return db.scalars(with_fields(stmt, Student, fields)).all()
 
 
 def get_student_by_id(db: Session, student_id: int):
@@ -40,13 +331,53 @@ def get_student_by_id(db: Session, student_id: int):
 def delete_student(db: Session, student_id: int):
     student = get_student_by_id(db, student_id)
     db.delete(student)
-    db.commit()
+    db.flush()
     return {"message": f"Student {student_id} deleted successfully"}
 
 
 def get_student_grades(db: Session, student_id: int):
-    enrollments = db.query(Enrollment).filter_by(student_id=student_id).all()
-    return [{"course": e.course.title, "grade": e.grade} for e in enrollments]
+    rows = (
+        db.query(Course.title, Enrollment.grade)
+        .join(Enrollment.course)
+        .filter(Enrollment.student_id == student_id)
+        .all()
+    )
+    return [{"course": title, "grade": grade} for title, grade in rows]
+
+
+def gpa_statement(dialect_name: str, student_id: int):
+    """(student id, graded credits, grade points), or no row if the student doesn't exist."""
+    if aggregates.maintained(dialect_name):
+        return (
+            select(Student.id, func.coalesce(StudentGPA.graded_credits, 0), func.coalesce(StudentGPA.grade_points, 0))
+            .outerjoin(StudentGPA, StudentGPA.student_id == Student.id)
+            .where(Student.id == student_id)
+        )
+    credits = func.coalesce(Course.credits, 0)
+    return (
+        select(
+            Student.id,
+            func.coalesce(func.sum(case((Enrollment.grade.is_not(None), credits))), 0),
+            func.coalesce(func.sum(Enrollment.grade * credits), 0),
+        )
+        .outerjoin(Enrollment, Enrollment.student_id == Student.id)
+        .outerjoin(Course, Course.id == Enrollment.course_id)
+        .where(Student.id == student_id)
+        .group_by(Student.id)
+    )
+
+
+def gpa_report(row) -> dict:
+    if row is None:
+        raise HTTPException(status_code=404, detail="Student not found.")
+    student_id, graded_credits, grade_points = row
+    gpa = round(grade_points / graded_credits, 2) if graded_credits else None
+    return {"student_id": student_id, "gpa": gpa, "graded_credits": graded_credits}
+
+
+def get_student_gpa(db: Session, student_id: int):
+    """Credit-weighted mean grade over the student's graded courses."""
+    return gpa_report(db.execute(gpa_statement(db.get_bind().dialect.name, student_id)).first())
 
 
 # ============================================================
@@ -54,31 +385,31 @@ def get_student_grades(db: Session, student_id: int):
 # ============================================================
 
 def create_instructor(db: Session, first_name: str, last_name: str, email: str, department: str):
-    if db.query(Instructor).filter_by(email=email).first():
-        raise HTTPException(status_code=400, detail="Instructor with this email already exists.")
-    instructor = Instructor(first_name=first_name, last_name=last_name, email=email, department=department)
-    db.add(instructor)
-    db.commit()
-    db.refresh(instructor)
-    return instructor
+    stmt = instructor_insert(db.get_bind().dialect.name, first_name, last_name, email, department)
+    with constraint_errors({409: DUPLICATE_INSTRUCTOR}):
+        instructor = write_returning(db, stmt)
+    return created(instructor, DUPLICATE_INSTRUCTOR)
 
 
-def get_courses_by_instructor(db: Session, instructor_id: int):
+def get_courses_by_instructor(db: Session, instructor_id: int, fields: Optional[FieldSet] = None):
     return (
-        db.query(Course)
+        with_fields(db.query(Course), Course, fields, joinedload(Course.instructor))
         .filter(Course.instructor_id == instructor_id)
         .order_by(Course.title.asc())
         .all()
     )
 
 
-def get_students_in_course(db: Session, course_id: int):
+def get_students_in_course(db: Session, course_id: int, fields: Optional[FieldSet] = None):
     """Return all students in a course, sorted alphabetically by first name."""
+    student = joinedload(Enrollment.student)
+    if fields:
+        student = student.options(*fields.options(Student))
     enrollments = (
         db.query(Enrollment)
         .join(Student)
         .filter(Enrollment.course_id == course_id)
-        .options(joinedload(Enrollment.student))
+        .options(student)
         .order_by(Student.first_name.asc(), Student.id.asc())
         .all()
     )
@@ -86,59 +417,196 @@ def get_students_in_course(db: Session, course_id: int):
     return students
 
 
-def assign_grade_by_instructor(db: Session, instructor_id: int, student_id: int, course_id: int, grade: int):
-    course = db.query(Course).filter_by(id=course_id, instructor_id=instructor_id).first()
+def assign_grade_by_instructor(db: Session, instructor_id: int, student_id: int, course_id: int, grade: int,
+                               version: Optional[int] = None):
+    course = db.query(Course.id).filter_by(id=course_id, instructor_id=instructor_id).first()
     if not course:
         raise HTTPException(status_code=403, detail="Instructor not authorized for this course.")
-    enrollment = db.query(Enrollment).filter_by(student_id=student_id, course_id=course_id).first()
-    if not enrollment:
-        raise HTTPException(status_code=404, detail="Student not enrolled in this course.")
-    enrollment.grade = grade
-    db.commit()
-    db.refresh(enrollment)
-    return enrollment
+    return set_grade(db, student_id, course_id, grade, version, missing="Student not enrolled in this course.")
+
+
+def bulk_assign_grades_by_instructor(db: Session, instructor_id: int, course_id: int, rows: List[dict]):
+    """Grade a whole course in one transaction.
+
+    Ownership is checked once and every row is validated before anything is
+    written; a single bad grade rejects the batch. Students who aren't
+    enrolled are reported back rather than failing the request, and the
+    rest are written with one executemany UPDATE keyed on the primary key.
+    """
+    if not db.query(Course.id).filter_by(id=course_id, instructor_id=instructor_id).first():
+        raise HTTPException(status_code=404, detail="Course not found or unauthorized")
+
+    grades, errors = {}, []
+    for index, row in enumerate(rows):
+        try:
+            entry = schemas.StudentGradeEntry.model_validate(row)
+        except ValidationError as exc:
+            errors.append({"row": index, "error": _first_error(exc)})
+            continue
+        grades[entry.student_id] = entry.grade
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+
+    student_ids = list(grades)
+    enrolled = set()
+    for start in range(0, len(student_ids), 500):
+        enrolled.update(
+            db.scalars(
+                select(Enrollment.student_id).where(
+                    Enrollment.course_id == course_id,
+                    Enrollment.student_id.in_(student_ids[start:start + 500]),
+                )
+            )
+        )
+
+    params = [
+        {"b_student_id": student_id, "b_course_id": course_id, "b_grade": grade}
+        for student_id, grade in grades.items()
+        if student_id in enrolled
+    ]
+    if params:
+        enrollments = Enrollment.__table__
+        db.execute(
+            update(enrollments)
+            .where(
+                enrollments.c.student_id == bindparam("b_student_id"),
+                enrollments.c.course_id == bindparam("b_course_id"),
+            )
+            .values(grade=bindparam("b_grade"), version=enrollments.c.version + 1),
+            params,
+        )
+    return schemas.BulkGradeReport(
+        updated=len(params),
+        not_enrolled=[student_id for student_id in student_ids if student_id not in enrolled],
+    )
 
 
 # ============================================================
 # 🧑‍💼 ADMIN FEATURES
 # ============================================================
 
-def get_all_enrollments(db: Session):
-    """Return all enrollments with related student and course info."""
-    db.commit()
-    db.expire_all()
-
-    enrollments = (
-        db.query(Enrollment)
-        .options(joinedload(Enrollment.student), joinedload(Enrollment.course))
-        .all()
+@dataclass(frozen=True)
+class EnrollmentFilters:
+    """The admin enrollment view's filters, each pushed down into the WHERE clause.
+
+    Every combination is served from an index (`Enrollment`'s
+    ``ix_enrollments_course_id_student_id``,
+    ``ix_enrollments_course_id_grade_student_id`` and
+    ``ix_enrollments_grade_student_id_course_id``, ``ix_courses_instructor_id``,
+    ``ix_instructors_department``); tests/test_query_plans.py fails on any
+    that would scan a table. The enrollment indexes end in the page order,
+    so a single course or grade needs no sort; a grade range or several
+    courses sort just their matching rows.
+    """
+    course_id: Optional[int] = None
+    instructor_id: Optional[int] = None
+    department: Optional[str] = None
+    grade_min: Optional[int] = None
+    grade_max: Optional[int] = None
+    ungraded: bool = False
+
+    def clauses(self) -> list:
+        clauses = []
+        if self.course_id is not None:
+            clauses.append(Enrollment.course_id == self.course_id)
+        if self.instructor_id is not None:
+            clauses.append(Course.instructor_id == self.instructor_id)
+        if self.department is not None:
+            clauses.append(Instructor.department == self.department)
+        if self.ungraded:
+            clauses.append(Enrollment.grade.is_(None))
+        if self.grade_min is not None or self.grade_max is not None:
+            # Always both bounds (grades are 1-5 anyway): an open range makes SQLite walk the primary key instead
+            clauses.append(Enrollment.grade.between(self.grade_min or 1, self.grade_max or 5))
+        return clauses
+
+    def apply(self, stmt):
+        """`stmt`, a SELECT of enrollments, narrowed to the matching rows."""
+        if self.instructor_id is not None or self.department is not None:
+            # A join, not `course_id IN (SELECT ...)`: on small tables SQLite scans enrollments for the IN
+            stmt = stmt.join(Course, Course.id == Enrollment.course_id)
+        if self.department is not None:
+            stmt = stmt.join(Instructor, Instructor.id == Course.instructor_id)
+        return stmt.where(*self.clauses())
+
+
+def enrollments_page(after: Optional[str] = None, limit: Optional[int] = None, fields: Optional[FieldSet] = None,
+                     filters: Optional[EnrollmentFilters] = None):
+    """SELECT for a page of enrollments with related student and course info.
+
+    Rows come back in primary-key order, `(student_id, course_id)`, so the
+    `after` cursor turns into an index seek instead of an OFFSET scan, on
+    the primary key or on the filter's index (see `EnrollmentFilters`).
+    Like `students_page`, one row past `limit` is fetched.
+    """
+    stmt = (
+        with_fields(
+            select(Enrollment), Enrollment, fields,
+            joinedload(Enrollment.student),
+            joinedload(Enrollment.course).joinedload(Course.instructor),
+        )
+        .order_by(Enrollment.student_id.asc(), Enrollment.course_id.asc())
     )
-
-    if not enrollments:
-        db.commit()
-        enrollments = (
-            db.query(Enrollment)
-            .options(joinedload(Enrollment.student), joinedload(Enrollment.course))
-            .all()
+    if filters is not None:
+        stmt = filters.apply(stmt)
+    if after:
+        stmt = stmt.where(
+            tuple_(Enrollment.student_id, Enrollment.course_id) > tuple_(*decode_cursor(after, 2))
         )
-
-    return enrollments
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    return stmt
+
+
+def get_all_enrollments(db: Session, after: Optional[str] = None, limit: Optional[int] = None,
+                        fields: Optional[FieldSet] = None, filters: Optional[EnrollmentFilters] = None):
+    """Return a page of enrollments, see `enrollments_page`."""
+    return db.scalars(enrollments_page(after, limit, fields, filters)).all()
+
+
+def stream_enrollments(bind: Connectable, chunk_size: int = 1000) -> Iterator[Sequence[Row]]:
+    """Yield enrollment rows flattened with student, course and instructor columns.
+
+    Uses a plain Core SELECT on its own connection with `yield_per`, so rows
+    are fetched `chunk_size` at a time and no ORM objects are built. The
+    connection is opened lazily and released once the generator finishes,
+    which lets a streaming response outlive the request's Session.
+    """
+    stmt = (
+        select(
+            Enrollment.grade,
+            Enrollment.version,
+            Student.id.label("student_id"),
+            Student.first_name.label("student_first_name"),
+            Student.last_name.label("student_last_name"),
+            Student.email.label("student_email"),
+            Course.id.label("course_id"),
+            Course.code.label("course_code"),
+            Course.title.label("course_title"),
+            Course.credits.label("course_credits"),
+            Instructor.id.label("instructor_id"),
+            Instructor.first_name.label("instructor_first_name"),
+            Instructor.last_name.label("instructor_last_name"),
+            Instructor.email.label("instructor_email"),
+            Instructor.department.label("instructor_department"),
+        )
+        .select_from(Enrollment)
+        .outerjoin(Student, Enrollment.student_id == Student.id)
+        .outerjoin(Course, Enrollment.course_id == Course.id)
+        .outerjoin(Instructor, Course.instructor_id == Instructor.id)
+        .order_by(Enrollment.student_id.asc(), Enrollment.course_id.asc())
+    )
+    with bind.connect() as conn:
+        result = conn.execution_options(yield_per=chunk_size).execute(stmt)
+        for chunk in result.partitions():
+            yield chunk
 
 
 def assign_grade_by_admin(db: Session, student_id: int, course_id: int, grade: int):
     """Admin assigns or updates a grade. Creates enrollment if missing."""
-    enrollment = db.query(Enrollment).filter_by(student_id=student_id, course_id=course_id).first()
-
-    if not enrollment:
-        enrollment = Enrollment(student_id=student_id, course_id=course_id)
-        db.add(enrollment)
-        db.commit()
-        db.refresh(enrollment)
-
-    enrollment.grade = grade
-    db.commit()
-    db.refresh(enrollment)
-    return enrollment
+    stmt = grade_upsert(db.get_bind().dialect.name, student_id, course_id, grade)
+    with constraint_errors({400: GRADE_OUT_OF_RANGE, 404: STUDENT_OR_COURSE_NOT_FOUND}):
+        return write_returning(db, stmt)
 
 
 # ============================================================
@@ -151,16 +619,56 @@ def create_course(db: Session, code: str, title: str, credits: int, instructor_i
         raise HTTPException(status_code=404, detail="Instructor not found.")
     course = Course(code=code, title=title, credits=credits, instructor_id=instructor_id)
     db.add(course)
-    db.commit()
-    db.refresh(course)
+    db.flush()
     return course
 
 
-def search_courses(db: Session, query: str):
-    return db.query(Course).filter(
-        (Course.code.ilike(f"%{query}%")) |
-        (Course.title.ilike(f"%{query}%"))
-    ).all()
+def search_courses(db: Session, query: str, limit: int = 50, fields: Optional[FieldSet] = None):
+    """Search courses by code or title."""
+    stmt = search_statement(db.get_bind().dialect.name, Course, query, limit)
+    return db.scalars(with_fields(stmt, Course, fields, joinedload(Course.instructor))).all()
+
+
+def course_stats_statement(dialect_name: str, course_id: int):
+    """(course id, enrolled, graded, grade sum, count of each grade 1-5), or no row if the course doesn't exist."""
+    if aggregates.maintained(dialect_name):
+        counts = [func.coalesce(getattr(CourseStats, c), 0) for c in aggregates.COURSE_COLUMNS]
+        return (
+            select(Course.id, *counts)
+            .outerjoin(CourseStats, CourseStats.course_id == Course.id)
+            .where(Course.id == course_id)
+        )
+    histogram = [func.sum(case((Enrollment.grade == g, 1), else_=0)) for g in aggregates.GRADES]
+    return (
+        select(
+            Course.id,
+            func.count(Enrollment.student_id),
+            func.count(Enrollment.grade),
+            func.coalesce(func.sum(Enrollment.grade), 0),
+            *[func.coalesce(h, 0) for h in histogram],
+        )
+        .outerjoin(Enrollment, Enrollment.course_id == Course.id)
+        .where(Course.id == course_id)
+        .group_by(Course.id)
+    )
+
+
+def course_stats_report(row) -> dict:
+    if row is None:
+        raise HTTPException(status_code=404, detail="Course not found.")
+    course_id, enrolled, graded, grade_sum, *histogram = row
+    return {
+        "course_id": course_id,
+        "enrolled": enrolled,
+        "graded": graded,
+        "mean": round(grade_sum / graded, 2) if graded else None,
+        "histogram": dict(zip(aggregates.GRADES, histogram)),
+    }
+
+
+def get_course_stats(db: Session, course_id: int):
+    """Enrollment count, mean grade and grade histogram of a course."""
+    return course_stats_report(db.execute(course_stats_statement(db.get_bind().dialect.name, course_id)).first())
 
 
 # ============================================================
@@ -168,22 +676,12 @@ def search_courses(db: Session, query: str):
 # ============================================================
 
 def enroll_student(db: Session, student_id: int, course_id: int):
-    if db.query(Enrollment).filter_by(student_id=student_id, course_id=course_id).first():
-        raise HTTPException(status_code=400, detail="Already enrolled.")
-    enrollment = Enrollment(student_id=student_id, course_id=course_id)
-    db.add(enrollment)
-    db.commit()
-    db.refresh(enrollment)
-    return enrollment
+    stmt = enrollment_insert(db.get_bind().dialect.name, student_id, course_id)
+    with constraint_errors({404: STUDENT_OR_COURSE_NOT_FOUND, 409: ALREADY_ENROLLED}):
+        enrollment = write_returning(db, stmt)
+    return created(enrollment, ALREADY_ENROLLED)
 
 
-def assign_grade(db: Session, student_id: int, course_id: int, grade: int):
-    enrollment = db.query(Enrollment).filter_by(student_id=student_id, course_id=course_id).first()
-    if not enrollment:
-        raise HTTPException(status_code=404, detail="Enrollment not found.")
-    if grade < 1 or grade > 5:
-        raise HTTPException(status_code=400, detail="Grade must be between 1 and 5.")
-    enrollment.grade = grade
-    db.commit()
-    db.refresh(enrollment)
-    return enrollment
+def assign_grade(db: Session, student_id: int, course_id: int, grade: int, version: Optional[int] = None):
+    """Set a grade; with `version` (from If-Match), only if nobody changed the enrollment since."""
+    return set_grade(db, student_id, course_id, grade, version)
@@ -0,0 +1,197 @@
+"""Async counterparts of the `crud` functions, for STUCOMAS_DB_MODE=async.
+
+Queries are shared with `crud` where possible (`students_page`,
+`enrollments_page`, `search_statement`, the aggregate statements, the
+single-statement writes). An AsyncSession can't lazy-load,
+so anything a response model reads from a relationship is eager-loaded
+here.
+"""
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+
+from sprint2 import crud
+from sprint2.fieldsets import FieldSet
+from sprint2.models import Student, Instructor, Course, Enrollment
+
+
+async def _load_enrollment(db: AsyncSession, student_id: int, course_id: int):
+    """An enrollment with everything `schemas.Enrollment` renders."""
+    return await db.scalar(
+        select(Enrollment)
+        .options(
+            joinedload(Enrollment.student),
+            joinedload(Enrollment.course).joinedload(Course.instructor),
+        )
+        .filter_by(student_id=student_id, course_id=course_id)
+        .execution_options(populate_existing=True)
+    )
+
+
+async def _write_returning(db: AsyncSession, stmt, details: Dict[int, str]):
+    """`crud.write_returning` with `crud.constraint_errors` around it."""
+    try:
+        return await db.run_sync(crud.write_returning, stmt)
+    except IntegrityError as exc:
+        error = crud.integrity_error(exc, details)
+        if error is None:
+            raise
+        raise error from exc
+
+
+# ============================================================
+# 🎓 STUDENT FEATURES
+# ============================================================
+
+async def create_student(db: AsyncSession, first_name: str, last_name: str, email: str):
+    stmt = crud.student_insert(db.bind.dialect.name, first_name, last_name, email)
+    student = await _write_returning(db, stmt, {409: crud.DUPLICATE_STUDENT})
+    return crud.created(student, crud.DUPLICATE_STUDENT)
+
+
+async def get_students(db: AsyncSession, after: Optional[str] = None, limit: Optional[int] = None,
+                       fields: Optional[FieldSet] = None):
+    return (await db.scalars(crud.with_fields(crud.students_page(after, limit), Student, fields))).all()
+
+
+async def search_students(db: AsyncSession, query: str, limit: int = 50, fields: Optional[FieldSet] = None):
+    stmt = crud.search_statement(db.bind.dialect.name, Student, query, limit)
+    return (await db.scalars(crud.with_fields(stmt, Student, fields))).all()
+
+
+async def get_student_by_id(db: AsyncSession, student_id: int):
+    student = await db.get(Student, student_id)
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found.")
+    return student
+
+
+async def delete_student(db: AsyncSession, student_id: int):
+    student = await db.scalar(
+        select(Student).options(selectinload(Student.enrollments)).filter_by(id=student_id)
+    )
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found.")
+    await db.delete(student)
+    await db.flush()
+    return {"message": f"Student {student_id} deleted successfully"}
+
+
+async def get_student_grades(db: AsyncSession, student_id: int):
+    rows = await db.execute(
+        select(Course.title, Enrollment.grade)
+        .join(Enrollment.course)
+        .where(Enrollment.student_id == student_id)
+    )
+    return [{"course": title, "grade": grade} for title, grade in rows]
+
+
+async def get_student_gpa(db: AsyncSession, student_id: int):
+    row = (await db.execute(crud.gpa_statement(db.bind.dialect.name, student_id))).first()
+    return crud.gpa_report(row)
+
+
+# ============================================================
+# 👩‍🏫 INSTRUCTOR FEATURES
+# ============================================================
+
+async def create_instructor(db: AsyncSession, first_name: str, last_name: str, email: str, department: str):
+    stmt = crud.instructor_insert(db.bind.dialect.name, first_name, last_name, email, department)
+    instructor = await _write_returning(db, stmt, {409: crud.DUPLICATE_INSTRUCTOR})
+    return crud.created(instructor, crud.DUPLICATE_INSTRUCTOR)
+
+
+async def get_course_for_instructor(db: AsyncSession, instructor_id: int, course_id: int):
+    course = await db.scalar(select(Course).filter_by(id=course_id, instructor_id=instructor_id))
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found or unauthorized")
+    return course
+
+
+async def get_courses_by_instructor(db: AsyncSession, instructor_id: int, fields: Optional[FieldSet] = None):
+    return (
+        await db.scalars(
+            crud.with_fields(select(Course), Course, fields, joinedload(Course.instructor))
+            .where(Course.instructor_id == instructor_id)
+            .order_by(Course.title.asc())
+        )
+    ).all()
+
+
+async def get_students_in_course(db: AsyncSession, course_id: int, fields: Optional[FieldSet] = None):
+    """Return all students in a course, sorted alphabetically by first name."""
+    return (
+        await db.scalars(
+            crud.with_fields(select(Student), Student, fields)
+            .join(Enrollment, Enrollment.student_id == Student.id)
+            .where(Enrollment.course_id == course_id)
+            .order_by(Student.first_name.asc(), Student.id.asc())
+        )
+    ).all()
+
+
+# ============================================================
+# 🧑‍💼 ADMIN FEATURES
+# ============================================================
+
+async def get_all_enrollments(db: AsyncSession, after: Optional[str] = None, limit: Optional[int] = None,
+                              fields: Optional[FieldSet] = None, filters: Optional[crud.EnrollmentFilters] = None):
+    return (await db.scalars(crud.enrollments_page(after, limit, fields, filters))).all()
+
+
+async def assign_grade_by_admin(db: AsyncSession, student_id: int, course_id: int, grade: int):
+    """Admin assigns or updates a grade. Creates enrollment if missing."""
+    stmt = crud.grade_upsert(db.bind.dialect.name, student_id, course_id, grade)
+    details = {400: crud.GRADE_OUT_OF_RANGE, 404: crud.STUDENT_OR_COURSE_NOT_FOUND}
+    return await _write_returning(db, stmt, details)
+
+
+# ============================================================
+# 📘 COURSE FEATURES
+# ============================================================
+
+async def create_course(db: AsyncSession, code: str, title: str, credits: int, instructor_id: int):
+    instructor = await db.get(Instructor, instructor_id)
+    if not instructor:
+        raise HTTPException(status_code=404, detail="Instructor not found.")
+    course = Course(code=code, title=title, credits=credits, instructor=instructor)
+    db.add(course)
+    await db.flush()
+    return course
+
+
+async def search_courses(db: AsyncSession, query: str, limit: int = 50, fields: Optional[FieldSet] = None):
+    stmt = crud.search_statement(db.bind.dialect.name, Course, query, limit)
+    return (await db.scalars(crud.with_fields(stmt, Course, fields, joinedload(Course.instructor)))).all()
+
+
+async def get_course_stats(db: AsyncSession, course_id: int):
+    row = (await db.execute(crud.course_stats_statement(db.bind.dialect.name, course_id))).first()
+    return crud.course_stats_report(row)
+
+
+# ============================================================
+# 🧾 ENROLLMENTS
+# ============================================================
+
+async def enroll_student(db: AsyncSession, student_id: int, course_id: int):
+    stmt = crud.enrollment_insert(db.bind.dialect.name, student_id, course_id)
+    details = {404: crud.STUDENT_OR_COURSE_NOT_FOUND, 409: crud.ALREADY_ENROLLED}
+    crud.created(await _write_returning(db, stmt, details), crud.ALREADY_ENROLLED)
+    return await _load_enrollment(db, student_id, course_id)
+
+
+async def assign_grade(db: AsyncSession, student_id: int, course_id: int, grade: int,
+                       version: Optional[int] = None, load_related: bool = True):
+    stmt = crud.grade_update(student_id, course_id, grade, version)
+    enrollment = await _write_returning(db, stmt, {400: crud.GRADE_OUT_OF_RANGE})
+    if enrollment is None:
+        current = await db.get(Enrollment, (student_id, course_id), populate_existing=True)
+        raise crud.grade_conflict(current, version)
+    if load_related:
+        return await _load_enrollment(db, student_id, course_id)
+    return enrollment
@@ -1,9 +1,284 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import logging
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import replace
+from http.cookies import SimpleCookie
+from typing import AsyncIterator, Callable, Iterator, Optional, Set
 
-DATABASE_URL = "sqlite:///./students.db"  # Dev (SQLite file)
+from fastapi import FastAPI, Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from starlette.datastructures import MutableHeaders
+from sprint2 import changes
+from sprint2.changes import Tag
+from sprint2.config import EngineProfile, Settings, read_only, settings
 
-engine = create_engine(DATABASE_URL, echo=True)  # echo=True logs SQL queries
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = settings.database_url  # Dev default: SQLite file
+
+
+def _install_pragmas(engine: Engine, settings: Settings, profile: EngineProfile) -> None:
+    """Run `profile`'s PRAGMAs on every new SQLite connection.
+
+    The values actually in effect are read back and logged once, on the
+    first connection, so a silently ignored PRAGMA shows up in the logs.
+    """
+    pragmas = profile.pragmas
+    logged = []
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            if not logged:
+                effective = {}
+                for name in pragmas:
+                    cursor.execute(f"PRAGMA {name}")
+                    effective[name] = cursor.fetchone()[0]
+                logger.info("SQLite pragmas in effect (profile=%s): %s", settings.profile, effective)
+                logged.append(True)
+        finally:
+            cursor.close()
+
+
+def _engine_options(url: str, profile: EngineProfile) -> dict:
+    options = {"echo": profile.echo}
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(
+            pool_size=profile.pool_size,
+            max_overflow=profile.max_overflow,
+            pool_pre_ping=profile.pool_pre_ping,
+            pool_recycle=profile.pool_recycle,
+        )
+    return options
+
+
+def make_engine(settings: Settings, profile: Optional[EngineProfile] = None) -> Engine:
+    """Build the sync engine described by `settings` and its profile, or `profile` instead."""
+    profile = profile or settings.engine_profile
+    url = settings.database_url
+    options = _engine_options(url, profile)
+    engine = create_engine(url, **options)
+    if engine.dialect.name == "sqlite" and profile.pragmas:
+        _install_pragmas(engine, settings, profile)
+    logger.info(
+        "Database engine: profile=%s url=%s options=%s",
+        settings.profile, engine.url.render_as_string(hide_password=True), options,
+    )
+    return engine
+
+
+def make_async_engine(settings: Settings) -> AsyncEngine:
+    """The AsyncEngine counterpart of `make_engine`."""
+    url = settings.async_database_url
+    profile = settings.engine_profile
+    engine = create_async_engine(url, **_engine_options(url, profile))
+    if engine.dialect.name == "sqlite" and profile.pragmas:
+        _install_pragmas(engine.sync_engine, settings, profile)
+    return engine
+
+
+engine = make_engine(settings)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine, only built in async mode so sync deployments don't need aiosqlite.
+# expire_on_commit=False: an AsyncSession can't lazy-load expired attributes
+# while the response is being serialized.
+async_engine = make_async_engine(settings) if settings.db_mode == "async" else None
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
+
+
+# ============================================================
+# 🧾 UNIT OF WORK
+# ============================================================
+# A request's Session is one transaction: `crud` only flushes, and the
+# request commits once at the end, or rolls back if anything raised.
+
+@contextmanager
+def unit_of_work(sessions: Callable[[], Session]) -> Iterator[Session]:
+    """A Session committed when the block ends, rolled back if it raises."""
+    db = sessions()
+    try:
+        yield db
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def async_unit_of_work(sessions: Callable[[], AsyncSession]) -> AsyncIterator[AsyncSession]:
+    """`unit_of_work` for an AsyncSession."""
+    async with sessions() as db:
+        try:
+            yield db
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+
+
+# ============================================================
+# 🔀 READ REPLICA
+# ============================================================
+# With STUCOMAS_REPLICA_URL set, `route` sends GET and HEAD requests to a
+# second engine and everything else to the primary. A client whose last
+# write (the LAST_COMMIT_COOKIE `read_your_writes` sets) is newer than the
+# replica's copy reads from the primary until the copy catches up.
+
+READ_METHODS = frozenset({"GET", "HEAD"})
+LAST_COMMIT_COOKIE = "stucomas_last_commit"
+
+
+class Replica:
+    """The database read-only requests are served from.
+
+    Without `source`, `engine` reads the primary's own file, e.g. through
+    ``sqlite:///file:students.db?mode=ro&uri=true``, and is never behind.
+    With `source`, `engine` is a separate SQLite file that `refresh`
+    overwrites with a copy of `source` using SQLite's online backup API,
+    every `interval` seconds once `start`ed. After each refresh the change
+    tags it caught up on go to `caught_up` (the response cache), which may
+    have cached responses read from the older copy.
+    """
+
+    def __init__(self, engine: Engine, source: Optional[Engine] = None, interval: float = 0.0,
+                 caught_up: Optional[Callable[[Set[Tag]], None]] = None):
+        self.engine = engine
+        self.sessions = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self.source = source
+        self.interval = interval
+        self.caught_up = caught_up
+        # Commits up to this time are in the copy
+        self.synced_at = 0.0 if source is not None else math.inf
+        self._changed: Set[Tag] = set()
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def serves(self, last_commit: Optional[float]) -> bool:
+        """Whether the replica already has a client's writes up to `last_commit`."""
+        return last_commit is None or last_commit < self.synced_at
+
+    def behind_on(self, tags: Set[Tag]) -> bool:
+        """Whether a commit the copy doesn't have yet touched any of `tags`."""
+        with self._lock:
+            return any(changes.matches(tag, change) for change in self._changed for tag in tags)
+
+    def _record(self, tags: Set[Tag]) -> None:
+        with self._lock:
+            self._changed |= tags
+
+    def refresh(self) -> None:
+        """Copy the primary over the replica."""
+        with self._refreshing:
+            started = time.time()
+            with self._lock:
+                changed, self._changed = self._changed, set()
+            source, target = self.source.raw_connection(), self.engine.raw_connection()
+            try:
+                source.driver_connection.backup(target.driver_connection)
+            finally:
+                target.close()
+                source.close()
+            self.synced_at = started
+        if changed and self.caught_up is not None:
+            self.caught_up(changed)
+
+    def start(self) -> None:
+        """Refresh now, then every `interval` seconds on a daemon thread, until `close`."""
+        if self.source is None:
+            return
+        self._stop.clear()
+        changes.subscribe(self._record)
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, name="replica-refresh", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Refreshing the read replica failed")
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            changes.unsubscribe(self._record)
+        self.engine.dispose()
+
+
+def make_replica(settings: Settings, primary: Engine,
+                 caught_up: Optional[Callable[[Set[Tag]], None]] = None) -> Optional[Replica]:
+    """The `Replica` of `settings`, or None without ``replica_url``."""
+    if not settings.replica_url:
+        return None
+    engine = make_engine(replace(settings, database_url=settings.replica_url), read_only(settings.engine_profile))
+    if settings.replica_refresh_seconds > 0:
+        return Replica(engine, primary, settings.replica_refresh_seconds, caught_up)
+    return Replica(engine)
+
+
+def last_commit(request: Request) -> Optional[float]:
+    try:
+        return float(request.cookies[LAST_COMMIT_COOKIE])
+    except (KeyError, ValueError):
+        return None
+
+
+def route(request: Request, sessions: Callable[[], Session], replica: Optional[Replica]) -> Callable[[], Session]:
+    """The sessionmaker for `request`: the replica's for reads it can serve, else the primary's.
+
+    Notes the choice on ``request.state`` for the response cache: the
+    replica a read went to, or that the client's own writes are newer than
+    the replica, so responses cached from it may predate them.
+    """
+    if replica is None or request.method not in READ_METHODS:
+        return sessions
+    if replica.serves(last_commit(request)):
+        request.state.read_replica = replica
+        return replica.sessions
+    request.state.bypass_cache = True
+    return sessions
+
+
+class ReadYourWritesMiddleware:
+    """Stamps every successful write's response with the time it committed, in LAST_COMMIT_COOKIE."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in READ_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            # get_db commits before the response starts, so now is after the commit
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = SimpleCookie({LAST_COMMIT_COOKIE: f"{time.time():.6f}"})
+                cookie[LAST_COMMIT_COOKIE].update({"path": "/", "httponly": True, "samesite": "lax"})
+                MutableHeaders(scope=message).append("set-cookie", cookie.output(header="").strip())
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+def read_your_writes(app: FastAPI) -> None:
+    """Install `ReadYourWritesMiddleware`; plain ASGI, like `sprint2.metrics.MetricsMiddleware`."""
+    app.add_middleware(ReadYourWritesMiddleware)
@@ -0,0 +1,127 @@
+"""ETags from per-table change counters, for cheap conditional GETs.
+
+Every flush bumps the `table_versions` row of each table it wrote to, in
+the same transaction as the write, so the counters move exactly when the
+data does and are shared by every worker using the database. A route's
+ETag is a hash of the counters of the tables its response is built from,
+plus the request path and query string.
+
+`conditional` builds the route dependency: it reads the counters with one
+small query and answers a matching ``If-None-Match`` with 304 before the
+route's own query and serialization run. Writes made behind the ORM's
+back (raw SQL, other applications) don't bump the counters.
+
+Single enrollments carry their own ``version`` instead. Grade writes
+answer with it as the ETag, and take it back in ``If-Match`` to refuse
+to overwrite a newer grade (`if_match_version`).
+"""
+import hashlib
+from typing import Dict, Iterable, Optional, Sequence
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import event, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from sprint2.models import TableVersion
+
+_UPSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def bump(session: Session, tables: Iterable[str]) -> None:
+    """Increment the counters of `tables` inside the session's transaction."""
+    bump_connection(session.connection(), tables)
+
+
+def bump_connection(connection: Connection, tables: Iterable[str]) -> None:
+    """`bump` for writes made on a bare Connection, e.g. bulk loads."""
+    names = sorted(set(tables) - {TableVersion.__tablename__})
+    if not names:
+        return
+    upsert = _UPSERTS.get(connection.dialect.name)
+    if upsert is None:
+        connection.execute(
+            update(TableVersion)
+            .where(TableVersion.table_name.in_(names))
+            .values(version=TableVersion.version + 1)
+        )
+        return
+    stmt = upsert(TableVersion).values([{"table_name": name, "version": 1} for name in names])
+    connection.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[TableVersion.table_name],
+            set_={"version": TableVersion.version + 1},
+        )
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_flushed(session, flush_context):
+    bump(session, {obj.__table__.name for obj in (*session.new, *session.dirty, *session.deleted)})
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_executed(state: ORMExecuteState):
+    if state.is_insert or state.is_update or state.is_delete:
+        bump(state.session, [state.statement.table.name])
+
+
+def versions_statement(tables: Sequence[str]):
+    return select(TableVersion.table_name, TableVersion.version).where(TableVersion.table_name.in_(tables))
+
+
+def make_etag(request: Request, tables: Sequence[str], versions: Dict[str, int]) -> str:
+    state = ";".join(f"{name}={versions.get(name, 0)}" for name in tables)
+    digest = hashlib.blake2b(f"{request.url.path}?{request.url.query}|{state}".encode(), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def check(request: Request, response: Response, etag: str) -> None:
+    """Raise 304 if the client already has `etag`, else attach it to the response."""
+    header = request.headers.get("if-none-match")
+    if header:
+        offered = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+        if etag in offered or "*" in offered:
+            raise HTTPException(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+
+def conditional(get_db, *tables: str):
+    """Dependency answering If-None-Match for a route built from `tables`."""
+    tables = tuple(sorted(tables))
+
+    def dependency(request: Request, response: Response, db: Session = Depends(get_db)):
+        versions = dict(db.execute(versions_statement(tables)).all())
+        check(request, response, make_etag(request, tables, versions))
+
+    return dependency
+
+
+def conditional_async(get_db, *tables: str):
+    """`conditional` for routes running on an AsyncSession."""
+    tables = tuple(sorted(tables))
+
+    async def dependency(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+        versions = dict((await db.execute(versions_statement(tables))).all())
+        check(request, response, make_etag(request, tables, versions))
+
+    return dependency
+
+
+def version_etag(version: int) -> str:
+    """The ETag of a row at `version`."""
+    return f'"{version}"'
+
+
+def if_match_version(header: Optional[str]) -> Optional[int]:
+    """The row version an ``If-Match`` header asks for; None without one, or for ``*``."""
+    if header is None or header.strip() == "*":
+        return None
+    value = header.strip()
+    if len(value) > 2 and value[0] == value[-1] == '"' and value[1:-1].isdigit():
+        return int(value[1:-1])
+    if value.isdigit():
+        return int(value)
+    raise HTTPException(status_code=400, detail='If-Match must be an enrollment version, e.g. "3".')
@@ -0,0 +1,84 @@
+"""Row encoders for the streaming enrollment export.
+
+Rows arrive from `crud.stream_enrollments` as flat Core rows. They are
+encoded straight to text, one chunk at a time, without going through
+the Pydantic schemas, so memory stays bounded by the chunk size.
+"""
+import csv
+import io
+import json
+from typing import Iterable, Iterator, Sequence
+
+from sqlalchemy.engine import Row
+
+CSV_COLUMNS = (
+    "student_id",
+    "student_first_name",
+    "student_last_name",
+    "student_email",
+    "course_id",
+    "course_code",
+    "course_title",
+    "course_credits",
+    "instructor_id",
+    "instructor_first_name",
+    "instructor_last_name",
+    "instructor_email",
+    "instructor_department",
+    "grade",
+    "version",
+)
+
+
+def enrollment_document(row: Row) -> dict:
+    """Nest a flat row the same way `schemas.Enrollment` renders it."""
+    student = None
+    if row.student_id is not None:
+        student = {
+            "first_name": row.student_first_name,
+            "last_name": row.student_last_name,
+            "email": row.student_email,
+            "id": row.student_id,
+        }
+    course = None
+    if row.course_id is not None:
+        instructor = None
+        if row.instructor_id is not None:
+            instructor = {
+                "first_name": row.instructor_first_name,
+                "last_name": row.instructor_last_name,
+                "email": row.instructor_email,
+                "department": row.instructor_department,
+                "id": row.instructor_id,
+            }
+        course = {
+            "code": row.course_code,
+            "title": row.course_title,
+            "credits": row.course_credits,
+            "id": row.course_id,
+            "instructor": instructor,
+        }
+    return {"grade": row.grade, "version": row.version, "student": student, "course": course}
+
+
+def to_ndjson(chunks: Iterable[Sequence[Row]]) -> Iterator[bytes]:
+    """One JSON document per line, flushed once per chunk."""
+    for chunk in chunks:
+        lines = [
+            json.dumps(enrollment_document(row), ensure_ascii=False, separators=(",", ":"))
+            for row in chunk
+        ]
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def to_csv(chunks: Iterable[Sequence[Row]]) -> Iterator[bytes]:
+    """A header line followed by one flat record per enrollment."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.getvalue().encode()
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([getattr(row, column) for column in CSV_COLUMNS] for row in chunk)
+        yield buffer.getvalue().encode()
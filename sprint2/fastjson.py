@@ -0,0 +1,213 @@
+"""Opt-in fast path for rendering large JSON responses.
+
+FastAPI normally validates every returned ORM object against the route's
+``response_model`` (``from_attributes``, model by nested model), dumps the
+validated models back to Python and encodes the result with the stdlib
+``json``. For rows the ORM has already typed, the validation step only
+copies them. `compile` instead turns a response model into a plain
+attribute-reading function once, at import, and `Renderer` encodes its
+output with orjson.
+
+The bytes are the same as FastAPI's for the types these schemas use:
+ints, strings, bools, None, floats, lists, dicts and nested models. A
+response holding a float that orjson would spell differently (tiny,
+huge or NaN) is rendered the standard way instead. Types it doesn't
+know (dates, enums, custom serializers) make `compile` raise
+`Unsupported`, and `Renderer` falls back to a `TypeAdapter` compiled
+once. Values are trusted, not validated: a grade of 7 read from the DB
+is written out as 7, where FastAPI would fail the response.
+
+It is off unless ``STUCOMAS_FAST_JSON`` is set. Routes opt in with
+`serialized`, and the response cache renders its misses through it too.
+"""
+import functools
+import inspect
+import json
+import types
+from typing import Annotated, Any, Callable, Dict, List, Literal, Optional, Union, get_args, get_origin
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+from sprint2 import querystats
+from sprint2.config import settings
+
+enabled = settings.fast_json
+
+# Values that already are what pydantic's JSON mode would produce
+_PLAIN = (int, str, bool, type(None), Any)
+_NULLABLE = (Union, getattr(types, "UnionType", Union))
+
+Convert = Optional[Callable[[Any], Any]]  # None means "use the value as is"
+
+
+class Unsupported(TypeError):
+    """A type `compile` can't turn into a plain converter."""
+
+
+def _is_str(tp) -> bool:
+    # EmailStr and friends are validated to, and serialized as, plain str
+    return isinstance(tp, type) and tp.__module__ == "pydantic.networks"
+
+
+class _Fallback(Exception):
+    """A value orjson would write differently from the stdlib json."""
+
+
+def _float(value) -> float:
+    value = float(value)
+    # Outside this range repr switches to exponents (1e-05, 1e+16) that orjson spells differently
+    if value and not 1e-4 <= abs(value) < 1e16 or value != value:
+        raise _Fallback
+    return value
+
+
+def _model(model, fields: Optional[dict], floats) -> Callable[[Any], dict]:
+    converters = []
+    for name, field in model.model_fields.items():
+        if fields is not None and name not in fields:
+            continue
+        if field.serialization_alias or field.alias or field.exclude:
+            raise Unsupported(f"{model.__name__}.{name} is aliased or excluded")
+        default = None if field.is_required() else field.get_default(call_default_factory=True)
+        nested = fields.get(name) if fields is not None else None
+        converters.append((name, compile(field.annotation, nested, floats), default))
+
+    def convert(obj) -> dict:
+        get = obj.get if isinstance(obj, dict) else functools.partial(getattr, obj)
+        out = {}
+        for name, convert_field, default in converters:
+            value = get(name, default)
+            out[name] = value if convert_field is None or value is None else convert_field(value)
+        return out
+
+    return convert
+
+
+def compile(tp, fields: Optional[dict] = None, floats: Callable[[Any], float] = _float) -> Convert:
+    """A function turning values of type `tp` into JSON-ready data, or None if they already are.
+
+    `fields` limits the first model found in `tp` to the named fields,
+    each mapping to the same kind of dict for its own nested model, or
+    to None for all of it (see `sprint2.fieldsets`).
+    """
+    origin = get_origin(tp)
+    if tp is float:
+        return floats
+    if tp in _PLAIN or _is_str(tp):
+        return None
+    if origin is Annotated:
+        return compile(get_args(tp)[0], fields, floats)
+    if origin is Literal:
+        return None
+    if origin in _NULLABLE:
+        args = [arg for arg in get_args(tp) if arg is not type(None)]
+        if len(args) != 1:
+            raise Unsupported(f"union {tp}")
+        inner = compile(args[0], fields, floats)
+        return None if inner is None else (lambda value: None if value is None else inner(value))
+    if origin in (list, List):
+        (item,) = get_args(tp) or (Any,)
+        inner = compile(item, fields, floats)
+        return list if inner is None else (lambda values: [inner(value) for value in values])
+    if origin in (dict, Dict):
+        key, value_type = get_args(tp) or (Any, Any)
+        if key not in (int, str):
+            raise Unsupported(f"dict keys of {key}")
+        inner = compile(value_type, fields, floats)
+        return dict if inner is None else (lambda values: {k: inner(v) for k, v in values.items()})
+    if isinstance(tp, type) and issubclass(tp, BaseModel):
+        return _model(tp, fields, floats)
+    raise Unsupported(f"no plain converter for {tp!r}")
+
+
+def _identity(value):
+    return value
+
+
+def _dumps(content) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class Renderer:
+    """Renders results of one response model, or of the `fields` of it, to JSON bytes."""
+
+    def __init__(self, response_model, fields: Optional[dict] = None):
+        self.adapter = TypeAdapter(response_model)
+        self.fields = fields
+        try:
+            self.convert = compile(response_model, fields) or _identity
+            self.plain = compile(response_model, fields, floats=float) or _identity
+            self.compiled = True
+        except Unsupported:
+            if fields is not None:
+                raise
+            # orjson would not reproduce the stdlib's bytes for arbitrary content
+            self.fast = self.standard
+            self.compiled = False
+
+    def dump(self, result):
+        if self.fields is not None:
+            # Validating the full model would lazy-load every column left out
+            return self.plain(result)
+        return self.adapter.dump_python(self.adapter.validate_python(result, from_attributes=True), mode="json")
+
+    def fast(self, result) -> bytes:
+        try:
+            return _dumps(self.convert(result))
+        except _Fallback:
+            return self.standard(result)
+
+    def standard(self, result) -> bytes:
+        """The exact bytes FastAPI's JSONResponse produces for `result`."""
+        content = self.dump(result)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+    def __call__(self, result) -> bytes:
+        return self.fast(result) if enabled else self.standard(result)
+
+
+def serialized(response_model):
+    """Render the route's result with `Renderer` when the fast mode is on.
+
+    Headers and status set on the injected Response (by the route or its
+    dependencies) are carried over, as FastAPI does for returned values.
+    """
+    renderer = Renderer(response_model)
+
+    def decorator(endpoint):
+        signature = inspect.signature(endpoint)
+        params = list(signature.parameters.values())
+        # FastAPI injects one sub-response per route, so reuse the route's own Response parameter
+        own = next((p.name for p in params if p.annotation is Response), None)
+        name = own or "json_sub_response"
+        if own is None:
+            params.append(inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY, annotation=Response))
+
+        def respond(result, sub_response: Response):
+            if not enabled or isinstance(result, Response):
+                return result
+            with querystats.serializing():
+                body = renderer.fast(result)
+            response = Response(content=body, media_type="application/json")
+            response.headers.raw.extend(sub_response.headers.raw)
+            if sub_response.status_code:
+                response.status_code = sub_response.status_code
+            return response
+
+        if inspect.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def wrapper(*args, **kwargs):
+                sub_response = kwargs[name] if own else kwargs.pop(name)
+                return respond(await endpoint(*args, **kwargs), sub_response)
+        else:
+            @functools.wraps(endpoint)
+            def wrapper(*args, **kwargs):
+                sub_response = kwargs[name] if own else kwargs.pop(name)
+                return respond(endpoint(*args, **kwargs), sub_response)
+
+        wrapper.__signature__ = signature.replace(parameters=params)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,141 @@
+"""Sparse fieldsets: ``?fields=`` on the read routes.
+
+    GET /admin/enrollments?fields=grade,student.id,course.code
+
+`parse` checks each dotted path against the route's response schema and
+builds a `FieldSet`. A relationship named without sub-fields (``course``)
+means all of it, nested models included. The field set trims both ends
+of the request:
+
+* `FieldSet.options` turns it into loader options, so only the named
+  columns are read (``load_only``), plus primary keys. Only the named
+  relationships are joined in. Relationships nobody asked for are not
+  loaded at all.
+* `FieldSet.render` writes just those fields, in schema order, with the
+  `sprint2.fastjson` converters. Rows are not validated against the full
+  schema, which would lazy-load every column left out.
+
+Routes without ``fields`` behave exactly as before.
+"""
+import functools
+import json
+import types
+from typing import Annotated, Dict, List, Optional, Union, get_args, get_origin
+
+from fastapi import HTTPException, Query, Response
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import RelationshipProperty, joinedload, load_only
+
+from sprint2 import fastjson, querystats
+
+# name -> nested tree, or None for the whole field
+Tree = Dict[str, Optional[dict]]
+
+QUERY = Query(
+    None,
+    description="Comma-separated fields to return, dotted for nested ones, e.g. `grade,student.id,course.code`",
+)
+
+
+def _model_of(annotation) -> Optional[type]:
+    """The pydantic model inside Optional[...] / List[...], if any."""
+    origin = get_origin(annotation)
+    if origin in (Union, getattr(types, "UnionType", Union), list, List, Annotated):
+        for arg in get_args(annotation):
+            model = _model_of(arg)
+            if model is not None:
+                return model
+        return None
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    return None
+
+
+def _expand(schema: type, tree: Optional[Tree]) -> Tree:
+    """`tree` with every None (whole field) spelled out down to the leaves."""
+    expanded = {}
+    for name, field in schema.model_fields.items():
+        if tree is not None and name not in tree:
+            continue
+        nested = _model_of(field.annotation)
+        expanded[name] = _expand(nested, tree.get(name) if tree else None) if nested else None
+    return expanded
+
+
+class FieldSet:
+    """The parsed ``fields`` of one request against one item schema."""
+
+    def __init__(self, schema: type, tree: Tree):
+        self.schema = schema
+        self.tree = tree
+
+    def options(self, entity) -> list:
+        """Loader options reading only the fields of this set for ORM class `entity`."""
+        return _options(entity, self.schema, self.tree)
+
+    def render(self, rows) -> bytes:
+        return _renderer(self.schema, json.dumps(self.tree, sort_keys=True))(rows)
+
+
+@functools.lru_cache(maxsize=256)
+def _renderer(schema: type, key: str) -> fastjson.Renderer:
+    # Requests repeat the same few field sets; compile each one once
+    return fastjson.Renderer(List[schema], json.loads(key))
+
+
+def _options(entity, schema: type, tree: Tree) -> list:
+    mapper = inspect(entity)
+    columns = {column.key for column in mapper.primary_key}
+    relations = []
+    for name, nested in _expand(schema, tree).items():
+        prop = mapper.attrs.get(name)
+        if prop is None:
+            continue
+        if isinstance(prop, RelationshipProperty):
+            target = _model_of(schema.model_fields[name].annotation)
+            # The join needs the foreign key on this side
+            columns.update(column.key for column, _ in prop.local_remote_pairs)
+            relations.append(joinedload(getattr(entity, name)).options(*_options(prop.mapper.class_, target, nested)))
+        else:
+            columns.add(name)
+    return [load_only(*(getattr(entity, key) for key in sorted(columns)))] + relations
+
+
+def parse(schema: type, spec: Optional[str]) -> Optional[FieldSet]:
+    """The field set named by a ``fields`` parameter, or None when it is absent."""
+    if spec is None:
+        return None
+    tree: Tree = {}
+    for path in filter(None, (part.strip() for part in spec.split(","))):
+        node, model = tree, schema
+        names = path.split(".")
+        for depth, name in enumerate(names):
+            if model is None or name not in model.model_fields:
+                raise HTTPException(status_code=400, detail=f"Unknown field '{'.'.join(names[:depth + 1])}'.")
+            last = depth == len(names) - 1
+            if last or (name in node and node[name] is None):
+                # A whole field wins over any of its parts
+                node[name] = None
+                break
+            node = node.setdefault(name, {})
+            model = _model_of(model.model_fields[name].annotation)
+    if not tree:
+        raise HTTPException(status_code=400, detail="fields must name at least one field.")
+    return FieldSet(schema, tree)
+
+
+def respond(rows, fieldset: Optional[FieldSet], response: Optional[Response] = None):
+    """`rows` as the route returns them, or as a Response with just the fields asked for.
+
+    Headers set on the route's injected `response` (a pagination cursor,
+    an ETag) are carried over.
+    """
+    if fieldset is None:
+        return rows
+    with querystats.serializing():
+        body = fieldset.render(rows)
+    rendered = Response(content=body, media_type="application/json")
+    if response is not None:
+        rendered.headers.raw.extend(response.headers.raw)
+    return rendered
@@ -0,0 +1,177 @@
+"""Group commit: many concurrent grade and enrollment writes, one transaction.
+
+SQLite has a single writer. With a commit per request, concurrent writers
+queue on the database lock, each paying for its own BEGIN, journal sync
+and COMMIT, and the slowest give up with ``database is locked``.
+
+With ``STUCOMAS_GROUP_COMMIT`` on, the write routes hand their `crud`
+call to a `GroupCommitter` instead. One writer thread takes the queued
+calls, waits up to ``STUCOMAS_GROUP_COMMIT_WINDOW_MS`` for more, and runs
+the whole batch in a single transaction (``BEGIN IMMEDIATE`` on SQLite):
+
+* Each call gets its own Session joined to the batch's connection with
+  ``join_transaction_mode="create_savepoint"``, which is committed when
+  the call returns, as `sprint2.database.unit_of_work` would. That only
+  releases a savepoint. An error (a 404, an integrity error) rolls back
+  that call alone and is raised to its caller; the rest of the batch
+  goes on.
+* Change tags are held back until the batch really commits, then
+  published at once (`sprint2.changes`). If the commit fails, every
+  caller in the batch gets the error and nothing is published.
+* Each caller's future resolves to what its call returned. `run` merges
+  returned rows into the request's Session, so serializing them can
+  lazy-load relationships as before. If the batch fails before a call
+  ran (``BEGIN IMMEDIATE`` on a locked database), that caller gets the
+  error too. `run` waits at most ``timeout`` seconds; a write still
+  queued by then is cancelled and answered with a 503.
+
+Responses, status codes and errors are the same as with the direct path.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from typing import Callable, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from sprint2 import changes
+from sprint2.changes import Tag
+from sprint2.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = 256
+# Seconds `run` waits for a write's batch; longer than SQLite's busy_timeout
+RESULT_TIMEOUT = 30.0
+
+Job = Tuple[Callable, tuple, Future]
+
+
+class GroupCommitter:
+    """A single writer thread committing queued `crud` calls in batches."""
+
+    def __init__(self, engine: Engine, window: float = 0.002, max_batch: int = MAX_BATCH,
+                 timeout: float = RESULT_TIMEOUT):
+        self.engine = engine
+        self.window = window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Queue ``fn(session, *args)``; the future resolves once its batch has committed."""
+        future: Future = Future()
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError("GroupCommitter is stopped")
+            if self._thread is None:
+                # Started on first use, so a preforking master never owns the thread
+                self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                self._thread.start()
+            self._queue.put((fn, args, future))
+        return future
+
+    def start(self) -> None:
+        """Accept writes again after `stop`; the thread itself starts on first use."""
+        with self._lock:
+            self._stopped = False
+
+    def stop(self) -> None:
+        """Commit what is queued, then end the writer thread until the next `start`."""
+        with self._lock:
+            self._stopped = True
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            if self._thread is thread:
+                self._thread = None
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            job = self._queue.get()
+            if job is None:
+                break
+            batch = [job]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                try:
+                    job = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if job is None:
+                    running = False
+                    break
+                batch.append(job)
+            self._commit(batch)
+
+    def _commit(self, batch: List[Job]) -> None:
+        tags: Set[Tag] = set()
+        done = []
+        try:
+            with self.engine.connect() as connection:
+                if connection.dialect.name == "sqlite":
+                    # Take the write lock up front rather than upgrading to it mid-batch
+                    connection.exec_driver_sql("BEGIN IMMEDIATE")
+                for fn, args, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    job_tags: Set[Tag] = set()
+                    savepoint = connection.begin_nested()
+                    try:
+                        # Not expired on commit: the caller renders what the call returned after the Session is gone
+                        with Session(
+                            bind=connection, join_transaction_mode="create_savepoint", expire_on_commit=False
+                        ) as session:
+                            changes.defer(session, job_tags)
+                            result = fn(session, *args)
+                            session.commit()
+                    except Exception as exc:
+                        savepoint.rollback()
+                        future.set_exception(exc)
+                        continue
+                    savepoint.commit()
+                    tags |= job_tags
+                    done.append((future, result))
+                connection.commit()
+        except Exception as exc:
+            logger.exception("Group commit of %d writes failed", len(batch))
+            # Calls that committed their savepoint, and those the failure kept from running
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        registry.inc("stucomas_db_group_commits_total")
+        registry.inc("stucomas_db_group_commit_writes_total", value=len(done))
+        if tags:
+            changes.publish(tags)
+        for future, result in done:
+            future.set_result(result)
+
+
+def run(writer: Optional[GroupCommitter], db: Session, fn: Callable, *args):
+    """``fn(db, *args)``, or the same call committed by `writer` when group commit is on."""
+    if writer is None:
+        return fn(db, *args)
+    future = writer.submit(fn, *args)
+    try:
+        result = future.result(timeout=writer.timeout)
+    except TimeoutError:
+        # Still queued: cancelled, so it never runs. Already running: its outcome is unknown.
+        applied = "was not applied" if future.cancel() else "may still be applied"
+        raise HTTPException(status_code=503, detail=f"Timed out waiting for the group commit; the write {applied}")
+    if inspect(result, raiseerr=False) is not None:
+        # Attach the committed row to the request's Session for lazy loads while serializing
+        return db.merge(result, load=False)
+    return result
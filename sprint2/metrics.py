@@ -0,0 +1,341 @@
+"""Prometheus metrics for the API, served as text at ``/metrics``.
+
+Per route: a request-duration histogram, request counts by status, and
+the time spent in the DB (from `sprint2.querystats`) and in response
+serialization. Process-wide: requests in flight, commits and rollbacks,
+connection-pool checkouts, new connections, checkouts that went into
+overflow and the time spent waiting for a connection, plus the response
+cache counters.
+
+Recording is meant to stay well under 1% of a request: the middleware
+is plain ASGI rather than ``@app.middleware``, and every value lives in
+a dict owned by the thread that records it (see `Registry`), so the hot
+path takes no lock. Set ``STUCOMAS_METRICS=off`` to install none of it.
+"""
+import bisect
+import functools
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRoute, request_response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from sprint2 import querystats
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Label for requests that matched no route, so 404 scans can't blow up the series count
+UNMATCHED = "<unmatched>"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# name -> (type, help)
+METRICS: Dict[str, Tuple[str, str]] = {
+    "stucomas_http_requests_total": ("counter", "HTTP requests served, by route and status code."),
+    "stucomas_http_request_duration_seconds": ("histogram", "Time from request to the end of the response."),
+    "stucomas_http_requests_in_flight": ("gauge", "Requests currently being served."),
+    "stucomas_http_db_seconds_total": ("counter", "Time spent executing SQL while serving requests."),
+    "stucomas_http_serialization_seconds_total": ("counter", "Time spent validating and rendering responses."),
+    "stucomas_db_commits_total": ("counter", "Committed transactions."),
+    "stucomas_db_rollbacks_total": ("counter", "Rolled back transactions."),
+    "stucomas_db_group_commits_total": ("counter", "Transactions committed by the group-commit writer."),
+    "stucomas_db_group_commit_writes_total": ("counter", "Writes committed by the group-commit writer."),
+    "stucomas_db_pool_checkouts_total": ("counter", "Connections handed out by the pool."),
+    "stucomas_db_pool_connects_total": ("counter", "New DBAPI connections opened by the pool."),
+    "stucomas_db_pool_overflow_checkouts_total": ("counter", "Checkouts served beyond pool_size."),
+    "stucomas_db_pool_wait_seconds_total": ("counter", "Time spent waiting for a pooled connection."),
+    "stucomas_db_pool_checked_out": ("gauge", "Connections currently checked out."),
+    "stucomas_db_pool_overflow": ("gauge", "Connections currently open beyond pool_size."),
+    "stucomas_db_pool_size": ("gauge", "Configured pool size."),
+    "stucomas_cache_hits_total": ("counter", "Response cache hits."),
+    "stucomas_cache_misses_total": ("counter", "Response cache misses."),
+    "stucomas_cache_evictions_total": ("counter", "Response cache entries evicted for space or age."),
+    "stucomas_cache_invalidations_total": ("counter", "Response cache entries dropped by writes."),
+}
+
+
+class _Owner:
+    """Lives in a thread's local storage, so it is collected when the thread ends."""
+
+
+class Registry:
+    """Counters and histograms, kept per thread and summed on scrape.
+
+    Each thread only writes its own dict, so recording is a dict update
+    with no lock and no lost increments between threads. The lock is
+    taken once per thread, to register its dict, on every scrape, and
+    when a thread ends and its dict is folded into the shared totals.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        # id(shard) -> shard, for every live thread that recorded something
+        self._shards: Dict[int, dict] = {}
+        # What threads that have ended recorded
+        self._retired: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            owner = self._local.owner = _Owner()
+            with self._lock:
+                self._shards[id(shard)] = shard
+            weakref.finalize(owner, self._retire, shard)
+            return shard
+
+    def _retire(self, shard: dict) -> None:
+        with self._lock:
+            del self._shards[id(shard)]
+            for key, value in shard.items():
+                self._retired[key] = self._retired.get(key, 0) + value
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1) -> None:
+        shard = self._shard()
+        key = (name, labels, None)
+        shard[key] = shard.get(key, 0) + value
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        """Add `value` to histogram `name`; the bucket index takes the place of ``le``."""
+        shard = self._shard()
+        for key, amount in (
+            ((name, labels, bisect.bisect_left(BUCKETS, value)), 1),
+            ((name + "_sum", labels, None), value),
+            ((name + "_count", labels, None), 1),
+        ):
+            shard[key] = shard.get(key, 0) + amount
+
+    def totals(self) -> Dict[tuple, float]:
+        with self._lock:
+            shards = list(self._shards.values())
+            totals = dict(self._retired)
+        for shard in shards:
+            for key, value in shard.copy().items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def value(self, name: str, **labels: str) -> float:
+        return self.totals().get((name, tuple(labels.items()), None), 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._retired.clear()
+            for shard in self._shards.values():
+                shard.clear()
+
+
+registry = Registry()
+
+
+# ============================================================
+# 📝 EXPOSITION
+# ============================================================
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(name: str, labels: Labels, value: float) -> str:
+    rendered = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels)
+    number = int(value) if float(value).is_integer() else value
+    return f"{name}{{{rendered}}} {number}" if rendered else f"{name} {number}"
+
+
+def _histogram_family(name: str) -> Optional[str]:
+    for suffix in ("_sum", "_count"):
+        base = name[:-len(suffix)]
+        if name.endswith(suffix) and METRICS.get(base, ("",))[0] == "histogram":
+            return base
+    return None
+
+
+def render(totals: Dict[tuple, float], gauges: Dict[str, float]) -> str:
+    """The Prometheus text exposition of `totals` plus point-in-time `gauges`."""
+    series: Dict[str, List[str]] = {}
+    histograms: Dict[Tuple[str, Labels], Dict[str, float]] = {}
+    for (name, labels, bucket), value in sorted(totals.items(), key=lambda item: repr(item[0])):
+        family = _histogram_family(name) if bucket is None else name
+        if family is None:
+            series.setdefault(name, []).append(_format(name, labels, value))
+        else:
+            parts = histograms.setdefault((family, labels), {})
+            part = bucket if bucket is not None else name[len(family):]
+            parts[part] = parts.get(part, 0) + value
+    for (name, labels), parts in histograms.items():
+        lines, cumulative = [], 0
+        for i, bound in enumerate(BUCKETS + (float("inf"),)):
+            cumulative += parts.get(i, 0)
+            le = "+Inf" if i == len(BUCKETS) else repr(bound)
+            lines.append(_format(name + "_bucket", labels + (("le", le),), cumulative))
+        lines += [_format(name + suffix, labels, parts.get(suffix, 0)) for suffix in ("_sum", "_count")]
+        series.setdefault(name, []).extend(lines)
+    for name, value in gauges.items():
+        series[name] = [_format(name, (), value)]
+
+    out = []
+    for name, kind_help in METRICS.items():
+        if name in series:
+            kind, text = kind_help
+            out += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"] + series[name]
+    return "\n".join(out) + "\n"
+
+
+# ============================================================
+# 📡 INSTRUMENTATION
+# ============================================================
+
+class MetricsMiddleware:
+    """Times every HTTP request and files it under its route template."""
+
+    def __init__(self, app, registry: Registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        registry = self.registry
+        registry.inc("stucomas_http_requests_in_flight")
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            registry.inc("stucomas_http_requests_in_flight", value=-1)
+            route = getattr(scope.get("route"), "path", UNMATCHED)
+            labels = (("method", scope["method"]), ("route", route))
+            registry.observe("stucomas_http_request_duration_seconds", labels, elapsed)
+            registry.inc("stucomas_http_requests_total", labels + (("status", str(status)),))
+            stats: Optional[querystats.QueryStats] = scope.get("state", {}).get("query_stats")
+            if stats is not None:
+                registry.inc("stucomas_http_db_seconds_total", labels, stats.db_time)
+                registry.inc("stucomas_http_serialization_seconds_total", labels, stats.serialize_time)
+
+
+# Engines already instrumented
+_instrumented: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+def instrument_engine(engine: Engine, registry: Registry = registry) -> None:
+    """Count commits, rollbacks, checkouts, new connections and overflow on `engine`, and time pool waits.
+
+    Only `engine` is touched: other engines in the process, e.g. another
+    app's or a test's, record nothing here.
+    """
+    if engine in _instrumented:
+        return
+    _instrumented.add(engine)
+    pool = engine.pool
+    size = getattr(pool, "size", None)
+
+    @event.listens_for(engine, "commit")
+    def commit(conn):
+        registry.inc("stucomas_db_commits_total")
+
+    @event.listens_for(engine, "rollback")
+    def rollback(conn):
+        registry.inc("stucomas_db_rollbacks_total")
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        registry.inc("stucomas_db_pool_checkouts_total")
+        if size is not None and pool.checkedout() > size():
+            registry.inc("stucomas_db_pool_overflow_checkouts_total")
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        registry.inc("stucomas_db_pool_connects_total")
+
+    # The pool has no event before a checkout, so the wait is timed around
+    # _do_get, the one method every pool implementation provides for it.
+    # This wraps the method on this engine's pool object only, not the class.
+    do_get = pool._do_get
+
+    @functools.wraps(do_get)
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            registry.inc("stucomas_db_pool_wait_seconds_total", value=time.perf_counter() - started)
+
+    pool._do_get = timed_do_get
+
+
+def pool_gauges(engine: Engine) -> Dict[str, float]:
+    pool = engine.pool
+    if not hasattr(pool, "size"):
+        return {}
+    return {
+        "stucomas_db_pool_checked_out": pool.checkedout(),
+        "stucomas_db_pool_overflow": max(pool.overflow(), 0),
+        "stucomas_db_pool_size": pool.size(),
+    }
+
+
+class _TimedField:
+    """A route's response field whose validation and rendering count as serialization time."""
+
+    def __init__(self, field):
+        self.field = field
+
+    def __getattr__(self, name):
+        return getattr(self.field, name)
+
+    def validate(self, *args, **kwargs):
+        with querystats.serializing():
+            return self.field.validate(*args, **kwargs)
+
+    def serialize(self, *args, **kwargs):
+        with querystats.serializing():
+            return self.field.serialize(*args, **kwargs)
+
+
+def time_serialization(app: FastAPI) -> None:
+    """Charge FastAPI's response-model validation and rendering on `app`'s routes to the request.
+
+    The field FastAPI serializes each route's response with is swapped
+    for a timed one and the route's handler rebuilt around it; routes
+    added afterwards, and other apps, are left as they are.
+    """
+    for route in app.routes:
+        field = getattr(route, "secure_cloned_response_field", None)
+        if isinstance(route, APIRoute) and field is not None and not isinstance(field, _TimedField):
+            route.secure_cloned_response_field = _TimedField(field)
+            route.app = request_response(route.get_route_handler())
+
+
+def install(app: FastAPI, engine: Engine, response_cache=None, registry: Registry = registry) -> None:
+    """Record metrics for `app` and `engine` and serve them at ``/metrics``.
+
+    Call it once `app`'s routes are in place, so their serialization is timed.
+    """
+    app.add_middleware(MetricsMiddleware, registry=registry)
+    instrument_engine(engine, registry)
+    time_serialization(app)
+
+    def metrics() -> PlainTextResponse:
+        gauges = pool_gauges(engine)
+        totals = registry.totals()
+        if response_cache is not None:
+            for name, value in response_cache.snapshot().items():
+                totals[(f"stucomas_cache_{name}_total", (), None)] = value
+        return PlainTextResponse(render(totals, gauges), media_type=CONTENT_TYPE)
+
+    app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
@@ -1,7 +1,8 @@
 
-from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint, CheckConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint, CheckConstraint, Index
 from sqlalchemy.orm import relationship
 from sprint2.database import Base
+from sprint2 import aggregates, search
 
 class Student(Base):
     __tablename__ = "students"
@@ -20,7 +21,7 @@ class Instructor(Base):
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
-    department = Column(String)
+    department = Column(String, index=True)
 
     courses = relationship("Course", back_populates="instructor")
 
@@ -32,7 +33,7 @@ class Course(Base):
     title = Column(String, nullable=False)
     credits = Column(Integer, default=3)
 
-    instructor_id = Column(Integer, ForeignKey("instructors.id"))
+    instructor_id = Column(Integer, ForeignKey("instructors.id"), index=True)
     instructor = relationship("Instructor", back_populates="courses")
 
     enrollments = relationship("Enrollment", back_populates="course", cascade="all, delete-orphan")
@@ -45,10 +46,51 @@ class Enrollment(Base):
     student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
     course_id = Column(Integer, ForeignKey("courses.id"), primary_key=True)
     grade = Column(Integer, nullable=True)
+    # Bumped by every grade write; a write naming an older version is rejected (If-Match)
+    version = Column(Integer, nullable=False, server_default="1")
 
     __table_args__ = (
         CheckConstraint("grade >= 1 AND grade <= 5", name="check_grade_range"),
+        # The admin view's filters (`crud.EnrollmentFilters`): by course, optionally by grade, or by grade alone.
+        # Each ends in the page order, (student_id, course_id), so the keyset seek stays an index range scan.
+        Index("ix_enrollments_course_id_student_id", "course_id", "student_id"),
+        Index("ix_enrollments_course_id_grade_student_id", "course_id", "grade", "student_id"),
+        Index("ix_enrollments_grade_student_id_course_id", "grade", "student_id", "course_id"),
     )
 
     student = relationship("Student", back_populates="enrollments")
     course = relationship("Course", back_populates="enrollments")
+
+class TableVersion(Base):
+    """Per-table change counter behind the ETags in `sprint2.etags`."""
+    __tablename__ = "table_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class StudentGPA(Base):
+    """Running credit-weighted grade totals per student (see `sprint2.aggregates`)."""
+    __tablename__ = "student_gpa"
+
+    student_id = Column(Integer, primary_key=True)
+    graded_credits = Column(Integer, nullable=False, default=0)
+    grade_points = Column(Integer, nullable=False, default=0)
+
+class CourseStats(Base):
+    """Running enrollment and grade counts per course (see `sprint2.aggregates`)."""
+    __tablename__ = "course_stats"
+
+    course_id = Column(Integer, primary_key=True)
+    enrolled = Column(Integer, nullable=False, default=0)
+    graded = Column(Integer, nullable=False, default=0)
+    grade_sum = Column(Integer, nullable=False, default=0)
+    grade_1 = Column(Integer, nullable=False, default=0)
+    grade_2 = Column(Integer, nullable=False, default=0)
+    grade_3 = Column(Integer, nullable=False, default=0)
+    grade_4 = Column(Integer, nullable=False, default=0)
+    grade_5 = Column(Integer, nullable=False, default=0)
+
+
+search.install(Student.__table__)
+search.install(Course.__table__)
+aggregates.install(Base.metadata)
@@ -0,0 +1,303 @@
+"""Query-plan audit of every statement `crud` issues while the tests run.
+
+    python -m sprint2.planaudit [--students 5000 ...] [--save-baseline] [-- PYTEST ARGS]
+
+It runs the test suite in-process. Meanwhile an engine-wide cursor
+listener records each distinct statement issued from inside `sprint2.crud`
+or `sprint2.crud_async`, together with the outermost `crud` function it
+came from. Statements issued by the tests themselves, the seeder or the
+aggregate triggers are not recorded. Then it seeds a throwaway SQLite
+file (`sprint2.seed`), runs ``ANALYZE`` so the planner sees realistic
+row counts, and runs ``EXPLAIN QUERY PLAN`` on every recorded statement
+with the parameters it was first seen with. Findings per statement:
+
+* ``scan``: a full scan of a table (``SCAN enrollments``), covering index
+  scans included. FTS virtual tables and subquery results don't count.
+* ``temp-btree``: rows sorted or de-duplicated in a temporary B-tree
+  (``USE TEMP B-TREE FOR ORDER BY``).
+* ``missing-index``: for each scanned table, the columns the statement
+  filters, joins or sorts it on, when none of the table's indexes starts
+  with them. This is a hint to check by hand, not a recommendation.
+
+The report is written to ``--output`` as JSON and compared with the
+baseline (``benchmarks/baselines/query-plans.json``). A scan that isn't in
+the baseline makes the run exit with status 1; new temp B-trees and
+index hints are only printed. ``--save-baseline`` accepts the current
+findings. Statements are keyed by `crud` function and a fingerprint of
+their SQL, with ``IN (?, ?, ...)`` lists of any length counted as one.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+try:
+    import greenlet
+except ImportError:  # pragma: no cover - installed with SQLAlchemy's asyncio extra
+    greenlet = None
+
+BASELINE = Path(__file__).resolve().parent.parent / "benchmarks" / "baselines" / "query-plans.json"
+CRUD_MODULES = ("sprint2.crud", "sprint2.crud_async")
+EXPLAINED = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+# Only these make the run fail when they are new
+FAILING = {"scan"}
+
+_IN_LIST = re.compile(r"\(\?(?:, \?)+\)")
+_SCAN = re.compile(r"^SCAN (\w+)")
+_ALIAS = re.compile(r"\b(\w+) AS (\w+)\b")
+
+
+@dataclass
+class Statement:
+    """One distinct statement, as first seen."""
+    function: str
+    sql: str
+    parameters: Sequence = ()
+    executions: int = 0
+
+    @property
+    def key(self) -> str:
+        return f"{self.function} {fingerprint(self.sql)}"
+
+
+def fingerprint(sql: str) -> str:
+    normalized = _IN_LIST.sub("(?)", " ".join(sql.split()))
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+def _frames():
+    """This thread's stack, innermost first, continued through parent greenlets.
+
+    The async path runs its SQL in a greenlet whose own stack starts below
+    the `crud_async` coroutine that awaited it.
+    """
+    frame = sys._getframe(2)
+    current = greenlet.getcurrent() if greenlet is not None else None
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+        if frame is None and current is not None:
+            current = current.parent
+            frame = current.gr_frame if current is not None else None
+
+
+def _crud_caller() -> Optional[str]:
+    caller = None
+    for frame in _frames():
+        module = frame.f_globals.get("__name__")
+        if module in CRUD_MODULES:
+            caller = f"{module}.{frame.f_code.co_name}"
+    return caller
+
+
+@contextmanager
+def capture() -> Iterator[Dict[str, Statement]]:
+    """Record the distinct statements `crud` issues on any engine while the block runs."""
+    statements: Dict[str, Statement] = {}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(EXPLAINED):
+            return
+        function = _crud_caller()
+        if function is None:
+            return
+        if isinstance(parameters, list) and parameters and isinstance(parameters[0], (tuple, list, dict)):
+            # executemany: one set stands for all. A multi-row VALUES batch is already one flat set.
+            parameters = parameters[0]
+        seen = Statement(function, statement, parameters)
+        seen = statements.setdefault(seen.key, seen)
+        seen.executions += 1
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+
+@dataclass
+class Indexes:
+    """Tables of the audited database and the leading columns of their indexes."""
+    leading: Dict[str, set] = field(default_factory=dict)
+
+    @classmethod
+    def read(cls, connection: Connection) -> "Indexes":
+        indexes = cls()
+        tables = connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'").scalars().all()
+        for table in tables:
+            leading = indexes.leading[table] = set()
+            for column in connection.exec_driver_sql(f'PRAGMA table_info("{table}")'):
+                # An INTEGER PRIMARY KEY is the rowid itself
+                if column.pk == 1 and column.type.upper() == "INTEGER":
+                    leading.add(column.name)
+            for index in connection.exec_driver_sql(f'PRAGMA index_list("{table}")'):
+                first = connection.exec_driver_sql(f'PRAGMA index_info("{index.name}")').first()
+                if first is not None:
+                    leading.add(first.name)
+        return indexes
+
+
+def _tables_by_name(sql: str, indexes: Indexes) -> Dict[str, str]:
+    """Table behind each name a plan can use for it: the table's own, or an alias."""
+    names = {table: table for table in indexes.leading}
+    for table, alias in _ALIAS.findall(sql):
+        if table in indexes.leading:
+            names[alias] = table
+    return names
+
+
+def findings(sql: str, plan: List[str], indexes: Indexes) -> List[dict]:
+    sql = " ".join(sql.split())
+    names = _tables_by_name(sql, indexes)
+    found = []
+    for step in plan:
+        scan = _SCAN.match(step)
+        if scan and scan.group(1) in names and "VIRTUAL TABLE" not in step:
+            name, table = scan.group(1), names[scan.group(1)]
+            found.append({"kind": "scan", "table": table, "detail": step})
+            _, _, rest = sql.partition(" FROM ")
+            columns = list(dict.fromkeys(re.findall(rf"\b{name}\.(\w+)\b", rest)))
+            if columns and columns[0] not in indexes.leading[table]:
+                found.append({"kind": "missing-index", "table": table, "detail": f"{table}({', '.join(columns)})"})
+        elif step.startswith("USE TEMP B-TREE"):
+            found.append({"kind": "temp-btree", "detail": step})
+    return found
+
+
+def explain(connection: Connection, statement: Statement, indexes: Indexes) -> dict:
+    entry = {"function": statement.function, "sql": " ".join(statement.sql.split())}
+    try:
+        parameters = statement.parameters
+        if not isinstance(parameters, dict):
+            parameters = tuple(parameters)
+        rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement.sql, parameters)
+        entry["plan"] = [row[3] for row in rows]
+    except Exception as exc:  # a table the seeded schema lacks, a dialect-specific statement
+        entry["error"] = str(exc).splitlines()[0]
+        entry["findings"] = []
+        return entry
+    entry["findings"] = findings(statement.sql, entry["plan"], indexes)
+    return entry
+
+
+def audit(engine: Engine, statements: Dict[str, Statement]) -> Dict[str, dict]:
+    """Plan and findings of each statement against `engine`'s database, by statement key."""
+    with engine.connect() as connection:
+        indexes = Indexes.read(connection)
+        return {key: explain(connection, statements[key], indexes) for key in sorted(statements)}
+
+
+def seeded_engine(path: Path, config) -> Engine:
+    """A SQLite file at `path` seeded with `config` and ANALYZEd."""
+    from sqlalchemy import create_engine
+
+    from sprint2 import seed
+
+    engine = create_engine(f"sqlite:///{path}")
+    seed.seed(engine, config)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+    return engine
+
+
+def compare(result: dict, baseline: dict) -> List[dict]:
+    """Findings of `result` the baseline doesn't have for the same statement."""
+    new = []
+    for key, entry in result["statements"].items():
+        known = {(f["kind"], f["detail"]) for f in baseline["statements"].get(key, {}).get("findings", [])}
+        for finding in entry["findings"]:
+            if (finding["kind"], finding["detail"]) not in known:
+                new.append(dict(finding, statement=key))
+    return new
+
+
+def print_report(result: dict) -> None:
+    for key, entry in result["statements"].items():
+        if entry["findings"] or "error" in entry:
+            print(key)
+            for finding in entry["findings"]:
+                print(f"  {finding['kind']:<14} {finding['detail']}")
+            if "error" in entry:
+                print(f"  {'error':<14} {entry['error']}")
+    counts = {}
+    for entry in result["statements"].values():
+        for finding in entry["findings"]:
+            counts[finding["kind"]] = counts.get(finding["kind"], 0) + 1
+    summary = ", ".join(f"{n} {kind}" for kind, n in sorted(counts.items())) or "no findings"
+    print(f"{len(result['statements'])} statements audited: {summary}")
+
+
+def main(argv=None) -> int:
+    # The tests run in this process: settle the profile as tests/conftest.py does, before sprint2.config loads
+    os.environ.setdefault("STUCOMAS_PROFILE", "test")
+    from sprint2.seed import SeedConfig
+
+    parser = argparse.ArgumentParser(prog="python -m sprint2.planaudit")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--instructors", type=int, default=50)
+    parser.add_argument("--courses", type=int, default=300)
+    parser.add_argument("--avg-enrollments", type=float, default=SeedConfig.avg_enrollments)
+    parser.add_argument("--output", type=Path, default=Path("planaudit.json"))
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("pytest_args", nargs="*", default=["-q", "-p", "no:cacheprovider", "tests"],
+                        help="after --, arguments for the test run")
+    args = parser.parse_args(argv)
+
+    import pytest
+
+    with capture() as statements:
+        status = pytest.main(list(args.pytest_args))
+    if status != 0:
+        print(f"warning: the test run exited with status {status}; auditing what it issued anyway")
+
+    config = SeedConfig(args.students, args.instructors, args.courses, args.avg_enrollments)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = seeded_engine(Path(tmp) / "audit.db", config)
+        try:
+            planned = audit(engine, statements)
+        finally:
+            engine.dispose()
+
+    result = {
+        "meta": {
+            "students": config.students,
+            "instructors": config.instructors,
+            "courses": config.courses,
+            "avg_enrollments": config.avg_enrollments,
+            "sqlite": sqlite3.sqlite_version,
+        },
+        "statements": planned,
+    }
+    print_report(result)
+    args.output.write_text(json.dumps(result, indent=2) + "\n")
+    print(f"report written to {args.output}")
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}; run with --save-baseline to store one")
+        return 0
+    new = compare(result, json.loads(args.baseline.read_text()))
+    for finding in new:
+        label = "NEW SCAN" if finding["kind"] in FAILING else f"new {finding['kind']}"
+        print(f"{label} {finding['statement']}: {finding['detail']}")
+    return 1 if any(finding["kind"] in FAILING for finding in new) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Per-request SQL statement counts, DB time and serialization time.
+
+Engine-wide cursor events add each statement to the `QueryStats` of the
+request being served, found through a ContextVar. `QueryStatsMiddleware`,
+installed by `install`, reports the totals as ``X-DB-Queries`` and
+``Server-Timing`` headers and logs a warning when a route goes over its
+query budget. Like `sprint2.metrics.MetricsMiddleware` it is plain ASGI:
+it only adds headers to the response start, where ``@app.middleware``
+would pipe every response body through an extra task and memory stream.
+
+`assert_max_queries` is the test-side helper: it counts every statement
+on every engine while its block runs, whichever thread issues them.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    queries: int = 0
+    db_time: float = 0.0
+    serialize_time: float = 0.0
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("stucomas_query_stats", default=None)
+
+
+def current() -> Optional[QueryStats]:
+    """Stats of the request being served, if any."""
+    return _current.get()
+
+
+@contextmanager
+def serializing() -> Iterator[None]:
+    """Charge the block to the current request's serialization time."""
+    stats = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.serialize_time += time.perf_counter() - started
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get("query_started")
+    if stats is not None and started:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started.pop()
+
+
+class QueryStatsMiddleware:
+    """Counts the statements of every HTTP request and reports them on its response."""
+
+    def __init__(self, app, budget: int = 0):
+        self.app = app
+        self.budget = budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = scope.setdefault("state", {})["query_stats"] = QueryStats()
+
+        async def send_with_stats(message):
+            # get_db commits before the response starts, so the commit is counted too
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Queries"] = str(stats.queries)
+                headers["Server-Timing"] = f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries"'
+                if self.budget and stats.queries > self.budget:
+                    route = getattr(scope.get("route"), "path", scope["path"])
+                    logger.warning(
+                        "%s %s ran %d queries (budget %d, %.1f ms in DB)",
+                        scope["method"], route, stats.queries, self.budget, stats.db_time * 1000,
+                    )
+            await send(message)
+
+        token = _current.set(stats)
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
+
+
+def install(app: FastAPI, budget: int) -> None:
+    """Count queries for every request; warn above `budget` (0 disables the warning)."""
+    app.add_middleware(QueryStatsMiddleware, budget=budget)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[List[str]]:
+    """Fail if the block runs more than `limit` SQL statements.
+
+    Yields the list of statements seen so far, which also ends up in the
+    assertion message to make the offending N+1 easy to spot.
+    """
+    statements: List[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    if len(statements) > limit:
+        listing = "\n".join(f"  {i + 1}. {s}" for i, s in enumerate(statements))
+        raise AssertionError(f"{len(statements)} queries executed, expected at most {limit}:\n{listing}")
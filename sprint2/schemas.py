@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, conint, ConfigDict
-from typing import Optional, List
+from typing import Dict, Literal, Optional, List
 
 
 # ============================================================
@@ -75,6 +75,7 @@ class EnrollmentCreate(EnrollmentBase):
 
 
 class Enrollment(EnrollmentBase):
+    version: int = 1
     student: Optional[Student] = None
     course: Optional[Course] = None
     model_config = ConfigDict(from_attributes=True)
@@ -88,6 +89,15 @@ class EnrollmentGradeUpdate(BaseModel):
     grade: conint(ge=1, le=5)
 
 
+class StudentGradeEntry(EnrollmentGradeUpdate):
+    student_id: int
+
+
+class BulkGradeReport(BaseModel):
+    updated: int
+    not_enrolled: List[int]
+
+
 # ============================================================
 # 📊 DASHBOARD RESPONSES
 # ============================================================
@@ -109,3 +119,81 @@ class StudentGrade(BaseModel):
     grade: Optional[int]
 
     model_config = ConfigDict(from_attributes=True)
+
+
+# ============================================================
+# 📥 BULK IMPORT REPORTS
+# ============================================================
+
+class BulkRowResult(BaseModel):
+    row: int
+    status: Literal["created", "duplicate", "invalid"]
+    email: Optional[str] = None
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class BulkStudentReport(BaseModel):
+    created: int
+    duplicates: int
+    invalid: int
+    rows: List[BulkRowResult]
+
+
+# ============================================================
+# 📈 AGGREGATES
+# ============================================================
+
+class StudentGPA(BaseModel):
+    student_id: int
+    gpa: Optional[float]
+    graded_credits: int
+
+
+class CourseStats(BaseModel):
+    course_id: int
+    enrolled: int
+    graded: int
+    mean: Optional[float]
+    histogram: Dict[int, int]
+
+
+# ============================================================
+# 🔬 COHORT ANALYTICS
+# ============================================================
+
+class GradeDistribution(BaseModel):
+    enrollments: int
+    graded: int
+    mean: Optional[float]
+    std: Optional[float]
+    percentiles: Dict[str, Optional[float]]
+
+
+class DepartmentStats(BaseModel):
+    department: Optional[str]
+    enrollments: int
+    graded: int
+    mean: Optional[float]
+    weighted_mean: Optional[float]
+
+
+class InstructorGradeStats(BaseModel):
+    instructor_id: Optional[int]
+    graded: int
+    mean: Optional[float]
+    inflation: Optional[float]
+    top_grade_share: Optional[float]
+
+
+class CourseCorrelations(BaseModel):
+    course_ids: List[int]
+    common: List[List[int]]
+    matrix: List[List[Optional[float]]]
+
+
+class AnalyticsReport(BaseModel):
+    distribution: GradeDistribution
+    departments: List[DepartmentStats]
+    instructors: List[InstructorGradeStats]
+    correlations: CourseCorrelations
@@ -0,0 +1,93 @@
+"""SQLite FTS5 trigram indexes behind student and course search.
+
+Each searchable table gets an external-content FTS5 table named
+``<table>_fts`` whose rowid is the source row's id. Triggers keep it in
+step with inserts, updates and deletes, so the ORM never has to know it
+exists. The trigram tokenizer indexes every three-character window, which
+lets ``MATCH`` answer the same case-insensitive substring questions the
+old ``ilike('%q%')`` filters did, from an index.
+
+Other dialects (and queries shorter than a trigram) fall back to ``ilike``.
+"""
+from typing import Dict, List, Tuple
+
+from sqlalchemy import DDL, Table, event, func, literal_column
+
+# Searchable source table -> indexed columns
+FTS_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "students": ("first_name", "last_name", "email"),
+    "courses": ("code", "title"),
+}
+
+# The trigram tokenizer can't match anything shorter than this
+MIN_QUERY_LENGTH = 3
+
+
+def fts_name(table: str) -> str:
+    return f"{table}_fts"
+
+
+def create_statements(table: str) -> List[str]:
+    """DDL for the FTS table and the three sync triggers of `table`."""
+    fts = fts_name(table)
+    columns = FTS_COLUMNS[table]
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    delete = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old});"
+    insert = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{names}, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN {delete} {insert} END",
+    ]
+
+
+def drop_statements(table: str) -> List[str]:
+    fts = fts_name(table)
+    return [f"DROP TRIGGER IF EXISTS {fts}_{suffix}" for suffix in ("ai", "ad", "au")] + [
+        f"DROP TABLE IF EXISTS {fts}"
+    ]
+
+
+def rebuild_statement(table: str) -> str:
+    """Repopulate the index from its content table, e.g. after a bulk load."""
+    fts = fts_name(table)
+    return f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"
+
+
+def install(table: Table) -> None:
+    """Create and drop the FTS shadow of `table` alongside it on SQLite."""
+    for statement in create_statements(table.name):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    for statement in drop_statements(table.name):
+        event.listen(table, "before_drop", DDL(statement).execute_if(dialect="sqlite"))
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    """Alembic's ``include_object`` hook: leave the FTS tables out of autogenerate.
+
+    They exist in the database but not in the models, so autogenerate would
+    otherwise propose dropping them and their FTS5 shadow tables
+    (``<table>_fts_data``, ``_idx``, ``_docsize``, ``_config``).
+    """
+    if type_ == "table" and reflected and compare_to is None:
+        return not any(name == fts_name(table) or name.startswith(fts_name(table) + "_") for table in FTS_COLUMNS)
+    return True
+
+
+def uses_index(dialect_name: str, query: str) -> bool:
+    return dialect_name == "sqlite" and len(query) >= MIN_QUERY_LENGTH
+
+
+def match(table: str, query: str):
+    """`<table>_fts MATCH '"query"'`, treating the whole query as one substring."""
+    phrase = '"' + query.replace('"', '""') + '"'
+    return literal_column(fts_name(table)).op("MATCH")(phrase)
+
+
+def rank(table: str):
+    """BM25 relevance; lower is better."""
+    return func.bm25(literal_column(fts_name(table)))
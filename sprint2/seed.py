@@ -0,0 +1,275 @@
+"""Reproducible synthetic data for development and load testing.
+
+    python -m sprint2.seed --students 100000 --instructors 200 --courses 1000 \\
+        --avg-enrollments 10 --seed 42 [--reset] [--database-url URL]
+
+The same arguments always produce the same rows. Every constraint holds:
+emails are unique, course codes are unique per instructor (in fact
+globally), grades are 1–5 or NULL for courses still in progress, and a
+student is enrolled in a course at most once.
+
+Everything is written with batched Core inserts in one transaction. On
+SQLite the load runs with fast-load PRAGMAs (no fsync, a large page
+cache), and the search and aggregate triggers are dropped for the
+duration and replaced by one rebuild of each at the end, which is far
+cheaper than firing them per row.
+
+The same transaction bumps the `table_versions` counter of every table
+(`sprint2.etags`), so no ETag or analytics snapshot taken before the
+load still matches, and a schema the seeder created itself is stamped at
+the Alembic head, which the prod profile's startup check looks for.
+"""
+import argparse
+import itertools
+import random
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+import numpy as np
+
+from sqlalchemy import func, insert, inspect, select
+from sqlalchemy.engine import Connection, Engine
+
+from sprint2 import aggregates, etags, search, startup
+from sprint2.config import settings
+from sprint2.database import Base, make_engine
+from sprint2.models import Course, Enrollment, Instructor, Student, TableVersion
+
+BATCH_SIZE = 50_000
+
+FIRST_NAMES = (
+    "Aarav", "Abena", "Alice", "Amara", "Ana", "Andrei", "Aylin", "Bilal", "Camila", "Chen", "Chloe", "Daniel",
+    "Dmitri", "Elena", "Emeka", "Emma", "Fatima", "Felix", "Giulia", "Hana", "Hiro", "Ines", "Isaac", "Jonas",
+    "Kavya", "Kwame", "Lars", "Layla", "Lucas", "Maya", "Mateo", "Mei", "Nadia", "Noah", "Olga", "Omar",
+    "Priya", "Rafael", "Sara", "Sofia", "Tariq", "Thandiwe", "Yusuf", "Zara",
+)
+LAST_NAMES = (
+    "Adeyemi", "Andersen", "Bauer", "Brown", "Chen", "Costa", "Diaz", "Dubois", "Evans", "Fischer", "Garcia",
+    "Gupta", "Haddad", "Ivanova", "Ito", "Jensen", "Kim", "Kowalski", "Li", "Martin", "Mensah", "Moreau",
+    "Nakamura", "Novak", "Okafor", "Olsen", "Patel", "Rossi", "Santos", "Schmidt", "Silva", "Singh", "Tanaka",
+    "Torres", "Wang", "Williams", "Yilmaz", "Zhang",
+)
+# Department -> course code prefix and title stems
+DEPARTMENTS: Dict[str, tuple] = {
+    "Mathematics": ("MATH", ("Calculus", "Linear Algebra", "Probability", "Number Theory", "Topology")),
+    "Physics": ("PHY", ("Mechanics", "Electromagnetism", "Quantum Physics", "Thermodynamics", "Optics")),
+    "Chemistry": ("CHEM", ("General Chemistry", "Organic Chemistry", "Biochemistry", "Physical Chemistry")),
+    "Biology": ("BIO", ("Cell Biology", "Genetics", "Ecology", "Microbiology", "Neuroscience")),
+    "Computer Science": ("CS", ("Programming", "Algorithms", "Databases", "Operating Systems", "Networks")),
+    "History": ("HIST", ("Ancient History", "Medieval Europe", "Modern Asia", "Historiography")),
+    "Economics": ("ECON", ("Microeconomics", "Macroeconomics", "Econometrics", "Game Theory")),
+    "Literature": ("LIT", ("Poetry", "The Novel", "Drama", "Literary Theory")),
+}
+CREDITS = (1, 2, 3, 4, 5)
+CREDIT_WEIGHTS = (1, 2, 6, 4, 1)
+GRADES = (1, 2, 3, 4, 5)
+GRADE_WEIGHTS = (5, 12, 30, 33, 20)
+# Share of enrollments in courses still running, i.e. without a grade yet
+UNGRADED = 0.1
+
+# PRAGMAs for the duration of the load: nothing here needs to survive a crash
+FAST_LOAD_PRAGMAS = {"synchronous": "OFF", "temp_store": "MEMORY", "cache_size": -262144}
+
+
+@dataclass(frozen=True)
+class SeedConfig:
+    students: int = 1000
+    instructors: int = 20
+    courses: int = 100
+    avg_enrollments: float = 5.0
+    seed: int = 0
+
+
+@dataclass(frozen=True)
+class SeedReport:
+    students: int
+    instructors: int
+    courses: int
+    enrollments: int
+    seconds: float
+
+
+# ============================================================
+# 🎲 GENERATORS
+# ============================================================
+
+def _email(first: str, last: str, n: int, domain: str) -> str:
+    return f"{first}.{last}{n}@{domain}".lower()
+
+
+def instructors(config: SeedConfig, rng: random.Random) -> Iterator[dict]:
+    departments = list(DEPARTMENTS)
+    for i in range(1, config.instructors + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield {
+            "id": i,
+            "first_name": first,
+            "last_name": last,
+            "email": _email(first, last, i, "faculty.uni.edu"),
+            "department": departments[(i - 1) % len(departments)],
+        }
+
+
+def courses(config: SeedConfig, rng: random.Random, departments: List[str]) -> Iterator[dict]:
+    """Courses taught by instructors of their department, with globally unique codes."""
+    by_department: Dict[str, List[int]] = {}
+    for instructor_id, department in enumerate(departments, start=1):
+        by_department.setdefault(department, []).append(instructor_id)
+    names = list(by_department)
+    for c in range(1, config.courses + 1):
+        department = names[(c - 1) % len(names)]
+        prefix, stems = DEPARTMENTS[department]
+        # The q-th course of a department: levels 100-400, then numbers within a level, then sections
+        q = (c - 1) // len(names)
+        code = f"{prefix}{100 * (1 + q % 4) + q // 4 % 100}" + (f"-{q // 400}" if q >= 400 else "")
+        yield {
+            "id": c,
+            "code": code,
+            "title": f"{rng.choice(stems)} {'I' * (1 + q % 3)}",
+            "credits": rng.choices(CREDITS, CREDIT_WEIGHTS)[0],
+            "instructor_id": rng.choice(by_department[department]),
+        }
+
+
+def students(config: SeedConfig, rng: random.Random) -> Iterator[tuple]:
+    """(id, first_name, last_name, email) rows."""
+    for s in range(1, config.students + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield s, first, last, _email(first, last, s, "students.uni.edu")
+
+
+def enrollments(config: SeedConfig) -> List[tuple]:
+    """(student_id, course_id, grade) rows, drawn with NumPy in a few array passes.
+
+    Each student takes a Poisson-distributed number of distinct courses
+    around `avg_enrollments`. Courses are drawn with a Zipf-like popularity,
+    so a few intro courses are large and most are small, as in a real
+    catalogue.
+    """
+    rng = np.random.default_rng(config.seed)
+    counts = np.minimum(rng.poisson(config.avg_enrollments, config.students), config.courses)
+    # Draw twice as many candidates as needed, then keep each student's first distinct ones
+    student = np.repeat(np.arange(1, config.students + 1), counts * 2)
+    popularity = np.cumsum(1 / np.sqrt(np.arange(1, config.courses + 1)))
+    course = np.searchsorted(popularity, rng.random(student.size) * popularity[-1], side="right") + 1
+    course = np.minimum(course, config.courses)
+    _, first = np.unique(student * (config.courses + 1) + course, return_index=True)
+    first.sort()
+    student, course = student[first], course[first]
+    starts = np.searchsorted(student, student, side="left")
+    keep = np.arange(student.size) - starts < counts[student - 1]
+    student, course = student[keep], course[keep]
+
+    grade = rng.choice(np.array(GRADES), size=student.size, p=np.array(GRADE_WEIGHTS) / sum(GRADE_WEIGHTS))
+    graded = rng.random(student.size) >= UNGRADED
+    grades = [int(g) if ok else None for g, ok in zip(grade.tolist(), graded.tolist())]
+    return list(zip(student.tolist(), course.tolist(), grades))
+
+
+# ============================================================
+# 🚚 LOADING
+# ============================================================
+
+def _triggers(connection: Connection, create: bool) -> None:
+    statements = []
+    for table in search.FTS_COLUMNS:
+        if create:
+            statements += search.create_statements(table)[1:]
+        else:
+            statements += [s for s in search.drop_statements(table) if s.startswith("DROP TRIGGER")]
+    statements += aggregates.create_statements() if create else aggregates.drop_statements()
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+def insert_many(connection: Connection, model, columns: Sequence[str], rows: Iterable[tuple]) -> None:
+    """Batched executemany of the Core INSERT for `columns`, fed plain tuples.
+
+    The statement is compiled once and the rows skip SQLAlchemy's per-row
+    parameter processing, which dominates the cost of bulk loads.
+    """
+    compiled = insert(model).compile(dialect=connection.dialect, column_keys=list(columns))
+    sql = str(compiled)
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, BATCH_SIZE)):
+        if not compiled.positional:
+            batch = [dict(zip(columns, row)) for row in batch]
+        connection.exec_driver_sql(sql, batch)
+
+
+def load(connection: Connection, config: SeedConfig) -> int:
+    """Insert the generated rows; returns the number of enrollments."""
+    rng = random.Random(config.seed)
+    instructor_rows = list(instructors(config, rng))
+    connection.execute(insert(Instructor), instructor_rows)
+    connection.execute(insert(Course), list(courses(config, rng, [i["department"] for i in instructor_rows])))
+    insert_many(connection, Student, ("id", "first_name", "last_name", "email"), students(config, rng))
+    rows = enrollments(config)
+    insert_many(connection, Enrollment, ("student_id", "course_id", "grade"), rows)
+    return len(rows)
+
+
+def seed(engine: Engine, config: SeedConfig, reset: bool = False) -> SeedReport:
+    """Fill `engine`'s database; it must be empty unless `reset` drops it first."""
+    started = time.perf_counter()
+    fresh = not inspect(engine).get_table_names()
+    if reset:
+        # The counters survive, so ETags from before the reset can't match the new rows
+        Base.metadata.drop_all(
+            bind=engine, tables=[t for t in Base.metadata.sorted_tables if t.name != TableVersion.__tablename__]
+        )
+    Base.metadata.create_all(bind=engine)
+    sqlite = engine.dialect.name == "sqlite"
+    with engine.connect() as connection:
+        if connection.scalar(select(func.count()).select_from(Student)):
+            raise ValueError("The database already has students; pass --reset to start from scratch.")
+        if sqlite:
+            for name, value in FAST_LOAD_PRAGMAS.items():
+                connection.exec_driver_sql(f"PRAGMA {name}={value}")
+        connection.commit()
+        with connection.begin():
+            if sqlite:
+                _triggers(connection, create=False)
+            total = load(connection, config)
+            if sqlite:
+                _triggers(connection, create=True)
+                for table in search.FTS_COLUMNS:
+                    connection.exec_driver_sql(search.rebuild_statement(table))
+                aggregates.rebuild(connection)
+            etags.bump_connection(connection, Base.metadata.tables)
+            if reset or fresh:
+                # create_all built the whole schema from the current models; a database it only topped up is left alone
+                startup.stamp_heads(connection)
+        # The pooled connection goes back with the PRAGMAs still set
+        connection.invalidate()
+    return SeedReport(config.students, config.instructors, config.courses, total, time.perf_counter() - started)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m sprint2.seed", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--students", type=int, default=SeedConfig.students)
+    parser.add_argument("--instructors", type=int, default=SeedConfig.instructors)
+    parser.add_argument("--courses", type=int, default=SeedConfig.courses)
+    parser.add_argument("--avg-enrollments", type=float, default=SeedConfig.avg_enrollments)
+    parser.add_argument("--seed", type=int, default=SeedConfig.seed)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    parser.add_argument("--database-url", help="defaults to STUCOMAS_DATABASE_URL")
+    args = parser.parse_args(argv)
+    if min(args.students, args.instructors, args.courses) < 1 or args.avg_enrollments < 0:
+        parser.error("counts must be positive")
+
+    engine = make_engine(replace(settings, database_url=args.database_url or settings.database_url))
+    config = SeedConfig(args.students, args.instructors, args.courses, args.avg_enrollments, args.seed)
+    try:
+        report = seed(engine, config, reset=args.reset)
+    except ValueError as exc:
+        parser.error(str(exc))
+    print(
+        f"Seeded {report.students} students, {report.instructors} instructors, {report.courses} courses "
+        f"and {report.enrollments} enrollments in {report.seconds:.1f}s."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""What runs when the API starts, and where.
+
+* Import / `sprint2.api.create_app`: builds the app and touches no
+  database. `prefork` then does the work every worker would otherwise
+  repeat. It configures the SQLAlchemy mappers and builds the OpenAPI
+  schema, and with it every Pydantic JSON schema. Then it calls
+  ``gc.freeze()``: the objects built so far move to a permanent
+  generation that the collector never touches again, so after a fork
+  their pages stay shared instead of being copied the first time the
+  collector writes their headers.
+* `lifespan`, once per worker after the fork: the schema check of the
+  profile and the first copy to the read replica, if it is one that gets
+  refreshed, then on shutdown draining the group-commit writer and
+  disposing the engines. Connections are only opened here, never before
+  the fork.
+
+Preforking, with the app imported once in the master::
+
+    gunicorn -k uvicorn.workers.UvicornWorker --preload -w 4 sprint2.api:app
+
+The schema check is ``verify`` by default. It compares the DB's Alembic
+revision with the migration scripts' head and refuses to start on a
+mismatch. The dev profile uses ``create``, which creates missing tables
+as ``create_all`` used to do at import. Tests use ``off``.
+Override it with ``STUCOMAS_SCHEMA_CHECK``.
+"""
+import gc
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Set
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import configure_mappers
+
+from sprint2 import models  # noqa: F401 - registers every table on Base.metadata
+from sprint2.database import Base
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+
+class SchemaError(RuntimeError):
+    """The database is not at the revision this code expects."""
+
+
+def alembic_script() -> ScriptDirectory:
+    return ScriptDirectory.from_config(Config(str(ALEMBIC_INI)))
+
+
+def alembic_heads() -> Set[str]:
+    return set(alembic_script().get_heads())
+
+
+def stamp_heads(connection: Connection) -> None:
+    """Record the Alembic heads on a schema built by ``create_all``, so `verify_schema` accepts it."""
+    MigrationContext.configure(connection).stamp(alembic_script(), "heads")
+
+
+def verify_schema(engine: Engine) -> None:
+    expected = alembic_heads()
+    with engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    if current != expected:
+        raise SchemaError(
+            f"Database {engine.url.render_as_string(hide_password=True)} is at revision "
+            f"{sorted(current) or 'none'}, expected {sorted(expected)}. Run `alembic upgrade head`, "
+            "or set STUCOMAS_SCHEMA_CHECK=create for a throwaway dev database."
+        )
+
+
+def check_schema(engine: Engine, mode: str) -> None:
+    if mode == "verify":
+        verify_schema(engine)
+    elif mode == "create":
+        Base.metadata.create_all(bind=engine)
+
+
+def prefork(app: FastAPI, freeze: bool = True) -> None:
+    """Do the per-process warm-up once, in the process that will fork the workers."""
+    configure_mappers()
+    app.openapi()
+    if freeze:
+        # Collect first, so garbage isn't frozen along with the live objects
+        gc.collect()
+        gc.freeze()
+        logger.debug("gc.freeze(): %d objects moved to the permanent generation", gc.get_freeze_count())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = app.state.settings
+    await run_in_threadpool(check_schema, app.state.engine, settings.engine_profile.schema_check)
+    writer = getattr(app.state, "writer", None)
+    if writer is not None:
+        # Reopened on every startup: a server restarted in-process runs the lifespan again
+        writer.start()
+    replica = getattr(app.state, "replica", None)
+    if replica is not None:
+        await run_in_threadpool(replica.start)
+    yield
+    if writer is not None:
+        await run_in_threadpool(writer.stop)
+    if replica is not None:
+        await run_in_threadpool(replica.close)
+    app.state.engine.dispose()
+    if getattr(app.state, "async_engine", None) is not None:
+        await app.state.async_engine.dispose()
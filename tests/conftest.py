@@ -1,9 +1,17 @@
+import os
+
+# Quiet engine, no schema check at startup: the fixtures below own the schema
+os.environ.setdefault("STUCOMAS_PROFILE", "test")
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from sprint2.database import Base
-from sprint2.api import app, get_db
+from sprint2.config import Settings
+from sprint2.database import Base, unit_of_work
+from sprint2.api import app, create_app, get_db
+from sprint2.analytics import snapshots
+from sprint2.cache import response_cache
 
 # ============================================================
 # 🧩 Test Database Setup (shared in-memory)
@@ -24,12 +32,9 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 # ============================================================
 
 def override_get_db():
-    """Provide a fresh database session for each test."""
-    db = TestingSessionLocal()
-    try:
+    """Provide a fresh database session per request, committed like the real one."""
+    with unit_of_work(TestingSessionLocal) as db:
         yield db
-    finally:
-        db.close()
 
 app.dependency_overrides[get_db] = override_get_db
 
@@ -46,6 +51,8 @@ def clean_test_db():
     """
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    response_cache.clear()
+    snapshots.clear()
     yield
     Base.metadata.drop_all(bind=engine)
 
@@ -58,3 +65,34 @@ def client():
     """
     with TestClient(app) as c:
         yield c
+
+
+# ============================================================
+# 🏭 Apps on Their Own Database
+# ============================================================
+
+@pytest.fixture
+def settings_for(tmp_path):
+    """
+    Builds Settings for a file database under tmp_path, ignoring any .env file.
+    Defaults to the prod profile creating its schema at startup; keyword
+    arguments override or add STUCOMAS_* variables.
+    """
+    def make(**env):
+        return Settings.from_env({
+            "STUCOMAS_ENV_FILE": "/nonexistent",
+            "STUCOMAS_DATABASE_URL": f"sqlite:///{tmp_path / 'app.db'}",
+            "STUCOMAS_PROFILE": "prod",
+            "STUCOMAS_SCHEMA_CHECK": "create",
+            "STUCOMAS_GC_FREEZE": "off",
+            **env,
+        })
+    return make
+
+
+@pytest.fixture
+def app_for(settings_for):
+    """Builds a fresh app from settings_for(**env), with its own engine and lifespan."""
+    def make(**env):
+        return create_app(settings_for(**env))
+    return make
@@ -1,4 +1,8 @@
 # tests/test_admin_dashboard.py
+import csv
+import io
+import json
+
 from sprint2.api import app
 from fastapi.testclient import TestClient
 from sprint2.database import Base, engine
@@ -63,3 +67,84 @@ def test_admin_can_reassign_grade():
     assert response.status_code == 200
     data = response.json()
     assert data["grade"] == 1
+
+
+def test_admin_enrollments_are_paginated():
+    setup_test_data()
+    client.post("/courses/", json={
+        "code": "PHY102",
+        "title": "Electromagnetism",
+        "credits": 3,
+        "instructor_id": 1
+    })
+    client.post("/enrollments/", json={"student_id": 1, "course_id": 2})
+
+    first = client.get("/admin/enrollments?limit=1")
+    assert first.status_code == 200
+    assert [e["course"]["code"] for e in first.json()] == ["PHY101"]
+
+    second = client.get(f"/admin/enrollments?limit=1&after={first.headers['X-Next-Cursor']}")
+    assert [e["course"]["code"] for e in second.json()] == ["PHY102"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_admin_can_export_enrollments_as_ndjson():
+    setup_test_data()
+    client.put("/admin/students/1/courses/1/grade?grade=4")
+
+    response = client.get("/admin/enrollments/export?format=ndjson")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == client.get("/admin/enrollments").json()
+
+
+def test_admin_can_export_enrollments_as_csv():
+    setup_test_data()
+
+    response = client.get("/admin/enrollments/export?format=csv")
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 1
+    assert rows[0]["course_code"] == "PHY101"
+    assert rows[0]["student_email"] == "bob@example.com"
+    assert rows[0]["grade"] == ""
+
+
+def test_admin_can_filter_enrollments():
+    setup_test_data()
+    client.post("/instructors/", json={
+        "first_name": "Ada",
+        "last_name": "Byron",
+        "email": "ada@example.com",
+        "department": "Mathematics"
+    })
+    client.post("/courses/", json={"code": "MAT101", "title": "Calculus", "credits": 4, "instructor_id": 2})
+    client.post("/students/", json={"first_name": "Jim", "last_name": "Reeves", "email": "jim@example.com"})
+    client.post("/enrollments/", json={"student_id": 1, "course_id": 2})
+    client.post("/enrollments/", json={"student_id": 2, "course_id": 2})
+    client.put("/admin/students/1/courses/2/grade?grade=2")
+    client.put("/admin/students/2/courses/2/grade?grade=5")
+
+    def keys(query):
+        response = client.get(f"/admin/enrollments?{query}")
+        assert response.status_code == 200
+        return [(e["student"]["id"], e["course"]["id"]) for e in response.json()]
+
+    assert keys("course_id=2") == [(1, 2), (2, 2)]
+    assert keys("instructor_id=1") == [(1, 1)]
+    assert keys("department=Mathematics") == [(1, 2), (2, 2)]
+    assert keys("department=Mathematics&grade_min=3") == [(2, 2)]
+    assert keys("grade_max=4") == [(1, 2)]
+    assert keys("ungraded=true") == [(1, 1)]
+    assert keys("department=Chemistry") == []
+
+    first = client.get("/admin/enrollments?course_id=2&limit=1")
+    assert [e["student"]["id"] for e in first.json()] == [1]
+    second = client.get(f"/admin/enrollments?course_id=2&limit=1&after={first.headers['X-Next-Cursor']}")
+    assert [e["student"]["id"] for e in second.json()] == [2]
+
+
+def test_admin_enrollment_filters_are_validated():
+    assert client.get("/admin/enrollments?ungraded=true&grade_min=2").status_code == 400
+    assert client.get("/admin/enrollments?grade_min=9").status_code == 422
@@ -0,0 +1,99 @@
+# tests/test_aggregates.py
+from sqlalchemy import update
+
+from sprint2 import aggregates, crud
+from sprint2.database import unit_of_work
+from sprint2.models import Course
+from tests.conftest import TestingSessionLocal, engine
+
+
+def seed(client):
+    client.post("/instructors/", json={
+        "first_name": "Dr.",
+        "last_name": "Brown",
+        "email": "dr.brown@example.com",
+        "department": "Mathematics"
+    })
+    for name in ("Alice", "Bob"):
+        client.post("/students/", json={"first_name": name, "last_name": "Doe", "email": f"{name.lower()}@example.com"})
+    client.post("/courses/", json={"code": "MATH101", "title": "Calculus I", "credits": 4, "instructor_id": 1})
+    client.post("/courses/", json={"code": "MATH102", "title": "Algebra", "credits": 2, "instructor_id": 1})
+    for student_id in (1, 2):
+        client.post("/enrollments/", json={"student_id": student_id, "course_id": 1})
+    client.post("/enrollments/", json={"student_id": 1, "course_id": 2})
+
+
+def live_figures(student_id, course_id):
+    """The same figures computed from enrollments, as on dialects without triggers."""
+    with TestingSessionLocal() as db:
+        gpa = crud.gpa_report(db.execute(crud.gpa_statement("postgresql", student_id)).first())
+        stats = crud.course_stats_report(db.execute(crud.course_stats_statement("postgresql", course_id)).first())
+    return gpa, {**stats, "histogram": {str(k): v for k, v in stats["histogram"].items()}}
+
+
+def test_gpa_is_weighted_by_credits(client):
+    seed(client)
+    assert client.get("/students/1/gpa").json() == {"student_id": 1, "gpa": None, "graded_credits": 0}
+
+    client.put("/enrollments/1/1/grade", json={"grade": 5})
+    client.put("/admin/students/1/courses/2/grade?grade=2")
+
+    assert client.get("/students/1/gpa").json() == {"student_id": 1, "gpa": 4.0, "graded_credits": 6}
+    assert client.get("/students/99/gpa").status_code == 404
+
+
+def test_course_stats_follow_enrollments_and_grades(client):
+    seed(client)
+    client.put("/instructors/1/courses/1/students/1/grade?grade=4")
+    client.put("/instructors/1/courses/1/grades", json=[{"student_id": 2, "grade": 2}])
+
+    stats = client.get("/courses/1/stats").json()
+    assert stats == {
+        "course_id": 1,
+        "enrolled": 2,
+        "graded": 2,
+        "mean": 3.0,
+        "histogram": {"1": 0, "2": 1, "3": 0, "4": 1, "5": 0},
+    }
+    assert live_figures(1, 1) == (client.get("/students/1/gpa").json(), stats)
+    assert client.get("/courses/99/stats").status_code == 404
+
+
+def test_deleting_a_student_removes_their_grades(client):
+    seed(client)
+    client.put("/enrollments/1/1/grade", json={"grade": 5})
+    client.put("/enrollments/2/1/grade", json={"grade": 3})
+
+    with unit_of_work(TestingSessionLocal) as db:
+        crud.delete_student(db, 1)
+
+    assert client.get("/courses/1/stats").json()["histogram"] == {"1": 0, "2": 0, "3": 1, "4": 0, "5": 0}
+    assert client.get("/courses/1/stats").json()["enrolled"] == 1
+    assert client.get("/courses/2/stats").json()["enrolled"] == 0
+
+
+def test_credit_changes_reweight_gpas(client):
+    seed(client)
+    client.put("/enrollments/1/1/grade", json={"grade": 5})
+    client.put("/enrollments/1/2/grade", json={"grade": 2})
+
+    with TestingSessionLocal() as db:
+        db.execute(update(Course).where(Course.id == 2).values(credits=4))
+        db.commit()
+
+    assert client.get("/students/1/gpa").json() == {"student_id": 1, "gpa": 3.5, "graded_credits": 8}
+    assert live_figures(1, 2)[0]["gpa"] == 3.5
+
+
+def test_rebuild_recomputes_from_enrollments(client):
+    seed(client)
+    client.put("/enrollments/1/1/grade", json={"grade": 5})
+    client.put("/enrollments/2/1/grade", json={"grade": 1})
+    before = client.get("/courses/1/stats").json(), client.get("/students/1/gpa").json()
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql("UPDATE course_stats SET enrolled = 0, grade_5 = 7")
+        connection.exec_driver_sql("DELETE FROM student_gpa")
+        aggregates.rebuild(connection)
+
+    assert (client.get("/courses/1/stats").json(), client.get("/students/1/gpa").json()) == before
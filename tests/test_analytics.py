@@ -0,0 +1,105 @@
+# tests/test_analytics.py
+import pytest
+
+from sprint2 import analytics
+from sprint2.querystats import assert_max_queries
+from tests.conftest import TestingSessionLocal
+
+
+def seed(client):
+    """Two departments, three courses, three students.
+
+    Grades (course: credits): Alice MATH101:4 -> 5, PHY101:2 -> 3, MATH102:2 -> 4
+                              Bob   MATH101 -> 3, PHY101 -> 1, MATH102 -> ungraded
+                              Cara  MATH101 -> 4, PHY101 -> 2, MATH102 -> 2
+    """
+    for i, department in enumerate(["Mathematics", "Physics"], start=1):
+        client.post("/instructors/", json={
+            "first_name": "Prof.",
+            "last_name": f"Number{i}",
+            "email": f"prof{i}@example.com",
+            "department": department
+        })
+    for name in ("Alice", "Bob", "Cara"):
+        client.post("/students/", json={"first_name": name, "last_name": "Doe", "email": f"{name.lower()}@example.com"})
+    client.post("/courses/", json={"code": "MATH101", "title": "Calculus I", "credits": 4, "instructor_id": 1})
+    client.post("/courses/", json={"code": "PHY101", "title": "Mechanics", "credits": 2, "instructor_id": 2})
+    client.post("/courses/", json={"code": "MATH102", "title": "Algebra", "credits": 2, "instructor_id": 1})
+    grades = {1: [5, 3, 4], 2: [3, 1, None], 3: [4, 2, 2]}
+    for student_id, row in grades.items():
+        for course_id, grade in enumerate(row, start=1):
+            client.post("/enrollments/", json={"student_id": student_id, "course_id": course_id})
+            if grade is not None:
+                client.put(f"/enrollments/{student_id}/{course_id}/grade", json={"grade": grade})
+
+
+def test_distribution(client):
+    seed(client)
+    body = client.get("/admin/analytics/distribution?percentiles=50&percentiles=90").json()
+    assert body["enrollments"] == 9
+    assert body["graded"] == 8
+    assert body["mean"] == 3.0
+    assert body["percentiles"] == {"p50": 3.0, "p90": 4.3}
+    assert client.get("/admin/analytics/distribution?percentiles=101").status_code == 400
+
+
+def test_departments(client):
+    seed(client)
+    body = client.get("/admin/analytics/departments").json()
+    assert body == [
+        {"department": "Mathematics", "enrollments": 6, "graded": 5, "mean": 3.6, "weighted_mean": 3.75},
+        {"department": "Physics", "enrollments": 3, "graded": 3, "mean": 2.0, "weighted_mean": 2.0},
+    ]
+
+
+def test_instructor_inflation_compares_students_with_themselves(client):
+    seed(client)
+    mathematics, physics = client.get("/admin/analytics/instructors").json()
+    assert mathematics["instructor_id"] == 1
+    assert mathematics["top_grade_share"] == 0.2
+    # Physics grades sit below each student's other grades: 3-4.5, 1-3, 2-3
+    assert physics["inflation"] == pytest.approx(-4.5 / 3, abs=1e-4)
+    assert physics["mean"] == 2.0
+
+
+def test_correlations(client):
+    seed(client)
+    body = client.get("/admin/analytics/correlations?min_common=2").json()
+    assert body["course_ids"] == [1, 2, 3]
+    assert body["common"][0] == [3, 3, 2]
+    # MATH101 and PHY101 grades move together exactly (5,3,4 vs 3,1,2)
+    assert body["matrix"][0][1] == 1.0
+    assert body["matrix"][1][0] == 1.0
+
+    strict = client.get("/admin/analytics/correlations?min_common=3").json()
+    assert strict["matrix"][0][2] is None
+
+
+def test_snapshot_is_reused_until_enrollments_change(client):
+    seed(client)
+    client.get("/admin/analytics/report")
+    with assert_max_queries(1):
+        assert client.get("/admin/analytics/report").json()["distribution"]["graded"] == 8
+
+    client.put("/enrollments/2/3/grade", json={"grade": 5})
+    assert client.get("/admin/analytics/report").json()["distribution"]["graded"] == 9
+
+
+def test_enrollments_in_missing_courses_are_left_out(client):
+    seed(client)
+    # Possible where foreign keys aren't enforced: ids past the last course and in a gap before it
+    client.put("/admin/students/1/courses/99/grade?grade=5")
+    client.put("/admin/students/2/courses/0/grade?grade=5")
+    assert client.get("/admin/analytics/distribution").json()["enrollments"] == 9
+    assert [d["enrollments"] for d in client.get("/admin/analytics/departments").json()] == [6, 3]
+
+
+def test_both_column_readers_agree(client):
+    seed(client)
+    with TestingSessionLocal() as db:
+        connection = db.connection()
+        fast = analytics.enrollment_columns(connection)
+        portable = analytics._cursor_columns(connection)
+    assert [column.tolist() for column in fast] == [column.tolist() for column in portable]
+    assert sorted(zip(*(column.tolist() for column in fast)))[:3] == [(1, 1, 5), (1, 2, 3), (1, 3, 4)]
+    assert (2, 3, 0) in set(zip(*(column.tolist() for column in fast)))
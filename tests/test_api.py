@@ -1,3 +1,8 @@
+from sprint2 import crud
+from sprint2.database import unit_of_work
+from tests.conftest import TestingSessionLocal
+
+
 def test_create_student(client):
     response = client.post("/students/", json={
         "first_name": "John",
@@ -105,3 +110,105 @@ def test_search_students(client):
 def test_search_courses(client):
     response = client.get("/courses/search?query=CS101")
     assert response.status_code == 200
+
+
+def test_students_keyset_pagination(client):
+    for i in range(5):
+        client.post("/students/", json={
+            "first_name": f"Student{i}",
+            "last_name": "Page",
+            "email": f"student{i}@example.com"
+        })
+
+    first = client.get("/students/?limit=2")
+    assert first.status_code == 200
+    assert [s["first_name"] for s in first.json()] == ["Student0", "Student1"]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get(f"/students/?limit=2&after={cursor}")
+    assert [s["first_name"] for s in second.json()] == ["Student2", "Student3"]
+
+    last = client.get(f"/students/?limit=2&after={second.headers['X-Next-Cursor']}")
+    assert [s["first_name"] for s in last.json()] == ["Student4"]
+    assert "X-Next-Cursor" not in last.headers
+
+
+def test_students_rejects_bad_cursor(client):
+    response = client.get("/students/?after=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_bulk_create_students_from_json(client):
+    client.post("/students/", json={
+        "first_name": "Existing",
+        "last_name": "Student",
+        "email": "existing@example.com"
+    })
+
+    response = client.post("/students/bulk", json=[
+        {"first_name": "Ann", "last_name": "Lee", "email": "ann@example.com"},
+        {"first_name": "Dup", "last_name": "Licate", "email": "existing@example.com"},
+        {"first_name": "No", "last_name": "Email"},
+        {"first_name": "Ann", "last_name": "Again", "email": "ann@example.com"},
+    ])
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert (report["created"], report["duplicates"], report["invalid"]) == (1, 2, 1)
+    assert [r["status"] for r in report["rows"]] == ["created", "duplicate", "invalid", "duplicate"]
+    assert report["rows"][0]["id"] == 2
+
+    emails = [s["email"] for s in client.get("/students/").json()]
+    assert emails == ["existing@example.com", "ann@example.com"]
+
+
+def test_bulk_create_students_from_csv(client):
+    body = "first_name,last_name,email\nCara,Diaz,cara@example.com\nDan,Fox,not-an-email\n"
+    response = client.post("/students/bulk", content=body, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert [r["status"] for r in report["rows"]] == ["created", "invalid"]
+    assert report["rows"][1]["detail"].startswith("email")
+
+
+def test_bulk_create_students_rejects_non_array(client):
+    response = client.post("/students/bulk", json={"first_name": "Solo"})
+    assert response.status_code == 400
+
+
+def test_search_students_matches_substrings_via_index(client):
+    client.post("/students/bulk", json=[
+        {"first_name": "Johnny", "last_name": "Cash", "email": "jc@example.com"},
+        {"first_name": "Mary", "last_name": "Johnson", "email": "mary@example.com"},
+        {"first_name": "Ann", "last_name": "Lee", "email": "ann@example.com"},
+    ])
+
+    response = client.get("/students/search?query=JOHN")
+    assert response.status_code == 200
+    assert {s["first_name"] for s in response.json()} == {"Johnny", "Mary"}
+
+    assert len(client.get("/students/search?query=john&limit=1").json()) == 1
+    # Too short for a trigram: served by the ilike fallback
+    assert [s["first_name"] for s in client.get("/students/search?query=ee").json()] == ["Ann"]
+
+
+def test_search_index_follows_deletes(client):
+    client.post("/students/", json={"first_name": "Gone", "last_name": "Soon", "email": "gone@example.com"})
+    assert len(client.get("/students/search?query=gone").json()) == 1
+
+    with unit_of_work(TestingSessionLocal) as db:
+        crud.delete_student(db, 1)
+    assert client.get("/students/search?query=gone").json() == []
+
+
+def test_search_courses_by_code_or_title(client):
+    client.post("/instructors/", json={
+        "first_name": "Ada",
+        "last_name": "King",
+        "email": "ada@example.com",
+        "department": "Computer Science"
+    })
+    client.post("/courses/", json={"code": "CS101", "title": "Intro to CS", "credits": 3, "instructor_id": 1})
+    client.post("/courses/", json={"code": "MA201", "title": "Linear Algebra", "credits": 4, "instructor_id": 1})
+
+    assert [c["code"] for c in client.get("/courses/search?query=s10").json()] == ["CS101"]
+    assert [c["code"] for c in client.get("/courses/search?query=algebra").json()] == ["MA201"]
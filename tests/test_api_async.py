@@ -0,0 +1,130 @@
+# tests/test_api_async.py
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from sprint2 import api, api_async
+from sprint2.database import Base, async_unit_of_work
+
+
+@pytest.fixture
+def async_client():
+    """An app running the async routes against an in-memory aiosqlite DB."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    sessions = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+    async def create_schema():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_schema())
+
+    async def override_get_async_db():
+        async with async_unit_of_work(sessions) as db:
+            yield db
+
+    app = FastAPI()
+    api_async.install(app)
+    app.dependency_overrides[api_async.get_async_db] = override_get_async_db
+    with TestClient(app) as c:
+        yield c
+    asyncio.run(engine.dispose())
+
+
+def test_install_swaps_sync_routes_for_async_ones():
+    app = FastAPI()
+    app.router.routes.extend(api.app.router.routes)
+    api_async.install(app)
+
+    endpoints = {
+        (route.path, method): route.endpoint
+        for route in app.routes if hasattr(route, "methods")
+        for method in route.methods
+    }
+    assert endpoints[("/students/", "GET")] is api_async.get_students
+    assert endpoints[("/students/bulk", "POST")] is api.bulk_create_students
+
+
+def test_async_routes_cover_the_grading_flow(async_client):
+    client = async_client
+    assert client.post("/students/", json={
+        "first_name": "Alice",
+        "last_name": "Wonder",
+        "email": "alice@example.com"
+    }).status_code == 200
+    client.post("/instructors/", json={
+        "first_name": "Dr.",
+        "last_name": "Brown",
+        "email": "dr.brown@example.com",
+        "department": "Mathematics"
+    })
+    course = client.post("/courses/", json={
+        "code": "MATH101",
+        "title": "Calculus I",
+        "credits": 4,
+        "instructor_id": 1
+    }).json()
+    assert course["instructor"]["last_name"] == "Brown"
+
+    enrollment = client.post("/enrollments/", json={"student_id": 1, "course_id": 1})
+    assert enrollment.status_code == 200, enrollment.text
+    assert enrollment.json()["student"]["first_name"] == "Alice"
+    assert client.post("/enrollments/", json={"student_id": 1, "course_id": 1}).status_code == 409
+
+    graded = client.put("/instructors/1/courses/1/students/1/grade?grade=4")
+    assert graded.json() == {"student_id": 1, "course_id": 1, "grade": 4, "version": 2}
+    assert graded.headers["ETag"] == '"2"'
+    stale = client.put("/enrollments/1/1/grade", json={"grade": 5}, headers={"If-Match": '"1"'})
+    assert (stale.status_code, stale.json()["detail"]["current"]["grade"]) == (409, 4)
+    assert client.put("/instructors/2/courses/1/students/1/grade?grade=4").status_code == 404
+
+    assert client.get("/students/1/grades").json() == [{"course": "Calculus I", "grade": 4}]
+    assert [s["first_name"] for s in client.get("/instructors/1/courses/1/students").json()] == ["Alice"]
+    assert client.get("/instructors/1/courses").json()[0]["code"] == "MATH101"
+    assert client.get("/courses/search?query=calc").json()[0]["code"] == "MATH101"
+    assert client.get("/students/search?query=wonder").json()[0]["id"] == 1
+
+    enrollments = client.get("/admin/enrollments").json()
+    assert enrollments[0]["course"]["instructor"]["department"] == "Mathematics"
+    assert enrollments[0]["grade"] == 4
+
+
+def test_async_students_are_paginated(async_client):
+    for i in range(3):
+        async_client.post("/students/", json={
+            "first_name": f"Student{i}",
+            "last_name": "Page",
+            "email": f"student{i}@example.com"
+        })
+    first = async_client.get("/students/?limit=2")
+    assert len(first.json()) == 2
+    rest = async_client.get(f"/students/?limit=2&after={first.headers['X-Next-Cursor']}")
+    assert [s["first_name"] for s in rest.json()] == ["Student2"]
+
+
+def test_async_routes_answer_conditional_gets(async_client):
+    async_client.post("/students/", json={"first_name": "Eve", "last_name": "Tag", "email": "eve@example.com"})
+    etag = async_client.get("/students/").headers["ETag"]
+    assert async_client.get("/students/", headers={"If-None-Match": etag}).status_code == 304
+
+    async_client.post("/students/", json={"first_name": "Fay", "last_name": "Tag", "email": "fay@example.com"})
+    assert async_client.get("/students/", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_async_routes_accept_sparse_fieldsets(async_client):
+    async_client.post("/instructors/", json={
+        "first_name": "Dr.", "last_name": "Brown", "email": "dr.brown@example.com", "department": "Mathematics"
+    })
+    async_client.post("/courses/", json={"code": "MATH101", "title": "Calculus I", "credits": 4, "instructor_id": 1})
+    async_client.post("/students/", json={"first_name": "Alice", "last_name": "Wonder", "email": "alice@example.com"})
+    async_client.post("/enrollments/", json={"student_id": 1, "course_id": 1})
+
+    enrollments = async_client.get("/admin/enrollments?fields=grade,course.code,course.instructor.last_name")
+    assert enrollments.json() == [{"grade": None, "course": {"code": "MATH101", "instructor": {"last_name": "Brown"}}}]
+    roster = async_client.get("/instructors/1/courses/1/students?fields=email")
+    assert roster.json() == [{"email": "alice@example.com"}]
+    assert roster.headers["ETag"]
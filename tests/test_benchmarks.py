@@ -0,0 +1,51 @@
+# tests/test_benchmarks.py
+import asyncio
+
+from benchmarks import run
+from sprint2.api import app, get_db
+
+
+def test_suite_covers_every_route(tmp_path):
+    result = asyncio.run(
+        run.run_suite(app, get_db, f"sqlite:///{tmp_path / 'bench.db'}", "small", 4, 2, warmup=2, repeats=2)
+    )
+
+    assert result["uncovered"] == []
+    assert 500 < result["meta"]["enrollments"] <= 1000
+    for name, route in result["routes"].items():
+        assert route["requests"] == 4
+        assert route["errors"] == 0, name
+        assert route["p50_ms"] <= route["p95_ms"] <= route["p99_ms"]
+
+
+def test_compare_flags_slower_routes():
+    baseline = {"routes": {
+        "GET /students/": {"p50_ms": 20.0, "p95_ms": 40.0, "errors": 0},
+        "GET /courses/": {"p50_ms": 1.0, "p95_ms": 2.0, "errors": 0},
+    }}
+    same = {"routes": {
+        "GET /students/": {"p50_ms": 27.0, "p95_ms": 90.0, "errors": 0},
+        # Four times the baseline, but within the noise floor
+        "GET /courses/": {"p50_ms": 4.0, "p95_ms": 8.0, "errors": 0},
+    }}
+    slower = {"routes": {
+        "GET /students/": {"p50_ms": 35.0, "p95_ms": 60.0, "errors": 1},
+        "GET /courses/": {"p50_ms": 9.0, "p95_ms": 9.0, "errors": 0},
+    }}
+
+    assert run.compare(same, baseline) == []
+    assert run.compare(slower, baseline) == [
+        "GET /students/: p50 20.00 -> 35.00 ms",
+        "GET /students/: errors 0 -> 1",
+        "GET /courses/: p50 1.00 -> 9.00 ms",
+    ]
+
+
+def test_routes_over_their_target_are_flagged():
+    result = {"routes": {
+        "GET /a (cold)": {"p95_ms": 900.0, "target_ms": 1000.0},
+        "GET /b (cold)": {"p95_ms": 1200.0, "target_ms": 1000.0},
+        "GET /c": {"p95_ms": 5000.0},
+    }}
+
+    assert run.missed_targets(result) == ["GET /b (cold): p95 1200.00 ms, target 1000 ms"]
@@ -0,0 +1,111 @@
+# tests/test_cache.py
+import time
+
+from sprint2.cache import MemoryBackend, response_cache
+from sprint2.querystats import assert_max_queries
+
+
+def seed(client):
+    for i in (1, 2):
+        client.post("/instructors/", json={
+            "first_name": "Prof.",
+            "last_name": f"Number{i}",
+            "email": f"prof{i}@example.com",
+            "department": "Physics"
+        })
+    client.post("/students/", json={"first_name": "Bob", "last_name": "Marley", "email": "bob@example.com"})
+    client.post("/students/", json={"first_name": "Ann", "last_name": "Lee", "email": "ann@example.com"})
+    client.post("/courses/", json={"code": "PHY101", "title": "Mechanics", "credits": 3, "instructor_id": 1})
+    client.post("/enrollments/", json={"student_id": 1, "course_id": 1})
+    client.post("/enrollments/", json={"student_id": 2, "course_id": 1})
+
+
+def test_repeated_reads_are_served_from_cache(client):
+    seed(client)
+    first = client.get("/students/1/grades")
+    assert first.headers["X-Cache"] == "MISS"
+
+    with assert_max_queries(0):
+        second = client.get("/students/1/grades")
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.content == first.content
+    assert response_cache.stats.hits >= 1
+
+
+def test_commit_evicts_only_affected_entries(client):
+    seed(client)
+    client.get("/instructors/1/courses")
+    client.get("/instructors/2/courses")
+
+    client.post("/courses/", json={"code": "PHY102", "title": "Optics", "credits": 3, "instructor_id": 1})
+
+    refreshed = client.get("/instructors/1/courses")
+    assert refreshed.headers["X-Cache"] == "MISS"
+    assert [c["code"] for c in refreshed.json()] == ["PHY101", "PHY102"]
+    assert client.get("/instructors/2/courses").headers["X-Cache"] == "HIT"
+
+
+def test_grade_changes_evict_student_grades(client):
+    seed(client)
+    assert client.get("/students/1/grades").json() == [{"course": "Mechanics", "grade": None}]
+
+    client.put("/enrollments/1/1/grade", json={"grade": 4})
+
+    assert client.get("/students/1/grades").json() == [{"course": "Mechanics", "grade": 4}]
+
+
+def test_unrelated_writes_keep_entries(client):
+    seed(client)
+    client.get("/students/2/grades")
+    client.get("/instructors/2/courses")
+
+    client.post("/students/", json={"first_name": "Cy", "last_name": "Young", "email": "cy@example.com"})
+
+    assert client.get("/students/2/grades").headers["X-Cache"] == "HIT"
+    assert client.get("/instructors/2/courses").headers["X-Cache"] == "HIT"
+
+
+def test_bulk_updates_evict_by_table(client):
+    seed(client)
+    client.get("/students/2/grades")
+
+    client.put("/instructors/1/courses/1/grades", json=[{"student_id": 2, "grade": 5}])
+
+    response = client.get("/students/2/grades")
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.json() == [{"course": "Mechanics", "grade": 5}]
+
+
+def test_memory_backend_bounds_entries_and_bytes():
+    backend = MemoryBackend(max_entries=2, max_bytes=10, ttl=60)
+    backend.set("a", b"1234", {("students", 1)}, backend.generation())
+    backend.set("b", b"1234", {("students", 2)}, backend.generation())
+    backend.get("a")
+    backend.set("c", b"1234", {("students", 3)}, backend.generation())
+    assert backend.get("b") is None  # least recently used
+    assert backend.get("a") == b"1234"
+
+    backend.set("d", b"12345678", {("students", 4)}, backend.generation())
+    assert backend.get("d") == b"12345678"
+    assert backend.get("a") is None and backend.get("c") is None
+    assert backend.stats.evictions == 3
+
+
+def test_memory_backend_expires_and_skips_stale_writes():
+    backend = MemoryBackend(ttl=0.01)
+    backend.set("a", b"x", {("courses", None)}, backend.generation())
+    time.sleep(0.02)
+    assert backend.get("a") is None
+
+    generation = backend.generation()
+    assert backend.invalidate({("courses", 7)}) == 0
+    backend.set("b", b"x", {("courses", None)}, generation)
+    assert backend.get("b") is None  # computed before the invalidation
+
+
+def test_table_wide_changes_match_any_row():
+    backend = MemoryBackend()
+    backend.set("one", b"x", {("students", 1)}, backend.generation())
+    backend.set("all", b"x", {("courses", None)}, backend.generation())
+    assert backend.invalidate({("students", None)}) == 1
+    assert backend.invalidate({("courses", 3)}) == 1
@@ -0,0 +1,74 @@
+# tests/test_database.py
+import logging
+
+import pytest
+from sqlalchemy import text
+
+from sprint2.config import Settings
+from sprint2.database import make_engine
+
+
+def test_prod_profile_applies_pragmas(tmp_path, caplog):
+    settings = Settings(database_url=f"sqlite:///{tmp_path / 'prod.db'}", profile="prod")
+    with caplog.at_level(logging.INFO, logger="sprint2.database"):
+        engine = make_engine(settings)
+        with engine.connect() as conn:
+            pragma = lambda name: conn.execute(text(f"PRAGMA {name}")).scalar()
+            assert pragma("journal_mode") == "wal"
+            assert pragma("synchronous") == 1  # NORMAL
+            assert pragma("foreign_keys") == 1
+            assert pragma("busy_timeout") == 5000
+    engine.dispose()
+
+    assert engine.echo is False
+    assert "profile=prod" in caplog.text
+    assert "'journal_mode': 'wal'" in caplog.text
+
+
+def test_dev_profile_keeps_sqlite_defaults(tmp_path):
+    engine = make_engine(Settings(database_url=f"sqlite:///{tmp_path / 'dev.db'}", profile="dev"))
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+    assert engine.echo is True
+    engine.dispose()
+
+
+def test_settings_read_env_file_and_environment_wins(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text(
+        "# deployment settings\n"
+        "STUCOMAS_PROFILE=prod\n"
+        "STUCOMAS_DATABASE_URL='postgresql://app@db/stucomas'\n"
+        "STUCOMAS_POOL_SIZE=3\n"
+    )
+    settings = Settings.from_env({"STUCOMAS_ENV_FILE": str(env_file), "STUCOMAS_POOL_SIZE": "7"})
+
+    assert settings.profile == "prod"
+    assert settings.async_database_url == "postgresql+asyncpg://app@db/stucomas"
+    assert settings.engine_profile.pool_size == 7
+    assert settings.engine_profile.pool_pre_ping is True
+    assert settings.engine_profile.echo is False
+
+
+def test_settings_reject_unknown_profile():
+    with pytest.raises(ValueError):
+        Settings(profile="staging")
+
+
+def test_settings_keep_an_explicit_zero():
+    unset = Settings.from_env({"STUCOMAS_ENV_FILE": "/nonexistent"})
+    zero = Settings.from_env({
+        "STUCOMAS_ENV_FILE": "/nonexistent",
+        "STUCOMAS_QUERY_BUDGET": "0",
+        "STUCOMAS_CACHE_MAX_ENTRIES": "0",
+        "STUCOMAS_CACHE_MAX_BYTES": "0",
+    })
+    assert (unset.query_budget, unset.cache_max_entries) == (Settings.query_budget, Settings.cache_max_entries)
+    assert (zero.query_budget, zero.cache_max_entries, zero.cache_max_bytes) == (0, 0, 0)
+
+
+def test_settings_default_to_a_quiet_profile():
+    settings = Settings.from_env({"STUCOMAS_ENV_FILE": "/nonexistent"})
+    assert settings.profile == "prod"
+    assert settings.engine_profile.echo is False
+    assert Settings.from_env({"STUCOMAS_ENV_FILE": "/nonexistent", "STUCOMAS_PROFILE": "dev"}).engine_profile.echo
@@ -0,0 +1,67 @@
+# tests/test_etags.py
+from sprint2.querystats import assert_max_queries
+
+
+def seed(client):
+    client.post("/instructors/", json={
+        "first_name": "Dr.",
+        "last_name": "Brown",
+        "email": "dr.brown@example.com",
+        "department": "Mathematics"
+    })
+    client.post("/students/", json={"first_name": "Alice", "last_name": "Wonder", "email": "alice@example.com"})
+    client.post("/courses/", json={"code": "MATH101", "title": "Calculus I", "credits": 4, "instructor_id": 1})
+    client.post("/enrollments/", json={"student_id": 1, "course_id": 1})
+
+
+def test_matching_if_none_match_skips_the_query(client):
+    seed(client)
+    first = client.get("/admin/enrollments")
+    etag = first.headers["ETag"]
+
+    with assert_max_queries(1) as statements:
+        response = client.get("/admin/enrollments", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert "table_versions" in statements[0]
+
+
+def test_commits_change_the_etag(client):
+    seed(client)
+    etag = client.get("/admin/enrollments").headers["ETag"]
+
+    client.put("/enrollments/1/1/grade", json={"grade": 5})
+
+    response = client.get("/admin/enrollments", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()[0]["grade"] == 5
+
+
+def test_etag_only_tracks_the_tables_a_route_reads(client):
+    seed(client)
+    etag = client.get("/instructors/1/courses").headers["ETag"]
+
+    client.put("/enrollments/1/1/grade", json={"grade": 5})
+    assert client.get("/instructors/1/courses", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/courses/", json={"code": "MATH102", "title": "Calculus II", "credits": 4, "instructor_id": 1})
+    assert client.get("/instructors/1/courses", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_bulk_writes_change_the_etag(client):
+    seed(client)
+    etag = client.get("/instructors/1/courses/1/students").headers["ETag"]
+
+    client.put("/instructors/1/courses/1/grades", json=[{"student_id": 1, "grade": 3}])
+
+    assert client.get("/instructors/1/courses/1/students", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_etag_depends_on_the_query_string(client):
+    seed(client)
+    full = client.get("/students/").headers["ETag"]
+    page = client.get("/students/?limit=1").headers["ETag"]
+    assert full != page
+    assert client.get("/students/?limit=1", headers={"If-None-Match": f'W/{full}, {page}'}).status_code == 304
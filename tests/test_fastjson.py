@@ -0,0 +1,88 @@
+# tests/test_fastjson.py
+from datetime import datetime
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+
+from sprint2 import fastjson, schemas
+from sprint2.cache import response_cache
+
+ROUTES = [
+    "/students/?limit=2",
+    "/students/search?query=chen",
+    "/instructors/1/courses/1/students",
+    "/admin/enrollments?limit=2",
+    "/instructors/1/courses",
+    "/students/1/grades",
+]
+
+
+def seed(client):
+    client.post("/instructors/", json={
+        "first_name": "Zoë", "last_name": "Çelik", "email": "zoe@example.com", "department": None
+    })
+    client.post("/courses/", json={"code": "PHY101", "title": "Mécanique \"quantique\"", "credits": 3, "instructor_id": 1})
+    client.post("/courses/", json={"code": "PHY102", "title": "Optics", "credits": 4, "instructor_id": 1})
+    for first, last in (("Li", "Chen"), ("Ana", "Müller"), ("Sam", "Chen")):
+        client.post("/students/", json={"first_name": first, "last_name": last, "email": f"{first}@example.com"})
+    for student in (1, 2, 3):
+        client.post("/enrollments/", json={"student_id": student, "course_id": 1})
+    client.put("/enrollments/1/1/grade", json={"grade": 5})
+
+
+@pytest.fixture
+def fast(monkeypatch):
+    monkeypatch.setattr(fastjson, "enabled", True)
+
+
+def fetch_all(client):
+    return {url: client.get(url) for url in ROUTES}
+
+
+def test_fast_mode_is_byte_compatible(client, monkeypatch):
+    seed(client)
+    standard = fetch_all(client)
+    response_cache.clear()
+    monkeypatch.setattr(fastjson, "enabled", True)
+    fast = fetch_all(client)
+
+    for url in ROUTES:
+        assert standard[url].status_code == 200, url
+        assert fast[url].content == standard[url].content, url
+        assert fast[url].headers["content-type"] == standard[url].headers["content-type"]
+        assert fast[url].headers.get("ETag") == standard[url].headers.get("ETag")
+        assert fast[url].headers.get("X-Next-Cursor") == standard[url].headers.get("X-Next-Cursor")
+    assert fast["/students/?limit=2"].headers["X-Next-Cursor"]
+
+
+def test_list_schemas_compile_to_plain_converters():
+    for model in (List[schemas.Student], List[schemas.Enrollment], List[schemas.Course]):
+        assert fastjson.Renderer(model).compiled
+
+
+def test_fast_mode_keeps_conditional_gets(client, fast):
+    seed(client)
+    first = client.get("/students/")
+    again = client.get("/students/", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.content == b""
+
+
+def test_odd_floats_fall_back_to_standard_bytes(fast):
+    renderer = fastjson.Renderer(schemas.StudentGPA)
+    for gpa in (3.75, 4, 1e-05, 1e16, None):
+        result = {"student_id": 1, "gpa": gpa, "graded_credits": 3}
+        assert renderer(result) == renderer.standard(result)
+    stats = fastjson.Renderer(schemas.CourseStats)
+    result = {"course_id": 1, "enrolled": 2, "graded": 1, "mean": 5.0, "histogram": {1: 0, 5: 1}}
+    assert stats(result) == stats.standard(result) == b'{"course_id":1,"enrolled":2,"graded":1,"mean":5.0,"histogram":{"1":0,"5":1}}'
+
+
+def test_unknown_types_use_the_type_adapter(fast):
+    class Event(BaseModel):
+        at: datetime
+
+    renderer = fastjson.Renderer(List[Event])
+    assert not renderer.compiled
+    assert renderer([{"at": datetime(2024, 1, 2, 3, 4, 5)}]) == b'[{"at":"2024-01-02T03:04:05"}]'
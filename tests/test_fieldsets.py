@@ -0,0 +1,83 @@
+# tests/test_fieldsets.py
+from sprint2 import fastjson
+from sprint2.querystats import assert_max_queries
+
+
+def seed(client):
+    client.post("/instructors/", json={
+        "first_name": "Prof.", "last_name": "Plum", "email": "plum@example.com", "department": "Physics"
+    })
+    client.post("/courses/", json={"code": "PHY101", "title": "Mechanics", "credits": 3, "instructor_id": 1})
+    for student_id, first in enumerate(("Ann", "Bob", "Cy"), start=1):
+        client.post("/students/", json={"first_name": first, "last_name": "Lee", "email": f"{first}@example.com"})
+        client.post("/enrollments/", json={"student_id": student_id, "course_id": 1})
+    client.put("/enrollments/1/1/grade", json={"grade": 4})
+
+
+def select_statements(statements):
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT") and "enrollments" in s]
+
+
+def test_fields_limit_response_and_columns(client):
+    seed(client)
+    with assert_max_queries(10) as statements:
+        response = client.get("/admin/enrollments?fields=grade,student.id,course.code")
+    assert response.status_code == 200
+    assert response.json()[0] == {"grade": 4, "student": {"id": 1}, "course": {"code": "PHY101"}}
+
+    (page,) = [s for s in select_statements(statements) if "students" in s]
+    assert "students.email" not in page
+    assert "courses.title" not in page
+    assert "instructors" not in page
+
+
+def test_whole_relationship_includes_nested_models(client):
+    seed(client)
+    response = client.get("/admin/enrollments?fields=course&limit=1")
+    assert response.json() == [{"course": {
+        "code": "PHY101", "title": "Mechanics", "credits": 3, "id": 1,
+        "instructor": {"first_name": "Prof.", "last_name": "Plum", "email": "plum@example.com",
+                       "department": "Physics", "id": 1},
+    }}]
+    # Parts of a field named whole are redundant
+    assert client.get("/admin/enrollments?fields=course.code,course&limit=1").json() == response.json()
+
+
+def test_unknown_fields_are_rejected(client):
+    seed(client)
+    assert client.get("/students/?fields=password").status_code == 400
+    assert client.get("/admin/enrollments?fields=grade.value").json() == {"detail": "Unknown field 'grade.value'."}
+    assert client.get("/students/?fields=,").status_code == 400
+
+
+def test_fields_keep_pagination_and_etags(client):
+    seed(client)
+    first = client.get("/students/?fields=email&limit=2")
+    assert first.json() == [{"email": "Ann@example.com"}, {"email": "Bob@example.com"}]
+    rest = client.get(f"/students/?fields=email&limit=2&after={first.headers['X-Next-Cursor']}")
+    assert rest.json() == [{"email": "Cy@example.com"}]
+    again = client.get("/students/?fields=email&limit=2", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert client.get("/students/?fields=id&limit=2").headers["ETag"] != first.headers["ETag"]
+
+
+def test_cached_routes_key_on_fields(client):
+    seed(client)
+    sparse = client.get("/instructors/1/courses?fields=code")
+    assert sparse.json() == [{"code": "PHY101"}]
+    assert client.get("/instructors/1/courses?fields=code").headers["X-Cache"] == "HIT"
+    assert client.get("/instructors/1/courses").json()[0]["instructor"]["last_name"] == "Plum"
+    assert client.get("/courses/search?query=mech&fields=id,title").json() == [{"id": 1, "title": "Mechanics"}]
+    found = client.get("/students/search?query=lee&fields=first_name").json()
+    assert sorted(found, key=lambda s: s["first_name"]) == [{"first_name": n} for n in ("Ann", "Bob", "Cy")]
+    assert client.get("/instructors/1/courses/1/students?fields=first_name").json() == [
+        {"first_name": "Ann"}, {"first_name": "Bob"}, {"first_name": "Cy"}
+    ]
+
+
+def test_fast_mode_renders_the_same_fields(client, monkeypatch):
+    seed(client)
+    url = "/admin/enrollments?fields=grade,course.instructor,student.last_name"
+    standard = client.get(url).content
+    monkeypatch.setattr(fastjson, "enabled", True)
+    assert client.get(url).content == standard
@@ -0,0 +1,136 @@
+# tests/test_groupcommit.py
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+from sqlalchemy.exc import OperationalError
+
+from sprint2 import changes, crud, groupcommit, models
+from sprint2.groupcommit import GroupCommitter
+from sprint2.metrics import registry
+
+
+@pytest.fixture
+def group_app(app_for):
+    return lambda: app_for(STUCOMAS_GROUP_COMMIT="on", STUCOMAS_GROUP_COMMIT_WINDOW_MS="20")
+
+
+@pytest.fixture
+def group_client(group_app):
+    with TestClient(group_app()) as client:
+        client.post("/instructors/", json={"first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com"})
+        client.post("/courses/", json={"code": "CS101", "title": "Intro", "credits": 3, "instructor_id": 1})
+        for n in range(20):
+            client.post("/students/", json={"first_name": f"S{n}", "last_name": "Doe", "email": f"s{n}@example.com"})
+        yield client
+
+
+def test_concurrent_writes_share_transactions(group_client):
+    commits = registry.value("stucomas_db_group_commits_total")
+    writes = registry.value("stucomas_db_group_commit_writes_total")
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        enrolled = list(pool.map(
+            lambda n: group_client.post("/enrollments/", json={"student_id": n, "course_id": 1}), range(1, 21)
+        ))
+        graded = list(pool.map(lambda n: group_client.put(f"/enrollments/{n}/1/grade", json={"grade": 4}), range(1, 21)))
+
+    assert [r.status_code for r in enrolled + graded] == [200] * 40
+    assert enrolled[0].json()["student"]["first_name"] == "S0"
+    assert graded[5].json()["grade"] == 4
+    assert registry.value("stucomas_db_group_commit_writes_total") - writes == 40
+    assert registry.value("stucomas_db_group_commits_total") - commits < 40
+    # The response cache and ETags heard about the batched writes
+    assert {e["grade"] for e in group_client.get("/admin/enrollments").json()} == {4}
+
+
+def test_errors_keep_their_status_and_spare_the_batch(group_client):
+    group_client.post("/enrollments/", json={"student_id": 1, "course_id": 1})
+    assert group_client.post("/enrollments/", json={"student_id": 1, "course_id": 1}).status_code == 409
+    assert group_client.put("/enrollments/2/1/grade", json={"grade": 3}).status_code == 404
+    assert group_client.put("/admin/students/3/courses/1/grade?grade=5").json()["grade"] == 5
+
+
+def test_a_failed_write_rolls_back_alone(group_client):
+    writer = group_client.app.state.writer
+    writer.window = 0.2
+    good = writer.submit(crud.enroll_student, 1, 1)
+    bad = writer.submit(crud.assign_grade, 2, 1, 3)
+    also_good = writer.submit(crud.assign_grade_by_admin, 3, 1, 2)
+
+    assert good.result().student_id == 1
+    with pytest.raises(HTTPException) as exc:
+        bad.result()
+    assert exc.value.status_code == 404
+    assert also_good.result().grade == 2
+    rows = group_client.get("/admin/enrollments").json()
+    assert sorted((e["student"]["id"], e["grade"]) for e in rows) == [(1, None), (3, 2)]
+
+
+def test_changes_are_published_after_the_real_commit(group_client):
+    writer: GroupCommitter = group_client.app.state.writer
+    published = []
+    seen_during_batch = []
+
+    def enroll(db, student_id):
+        enrollment = crud.enroll_student(db, student_id, 1)
+        seen_during_batch.append(list(published))
+        return enrollment
+
+    callback = changes.subscribe(published.append)
+    try:
+        writer.submit(enroll, 4).result()
+    finally:
+        changes._subscribers.remove(callback)
+
+    assert seen_during_batch == [[]]
+    assert ("enrollments", (4, 1)) in set().union(*published)
+    with writer.engine.connect() as connection:
+        assert connection.scalar(select(models.Enrollment.student_id)) == 4
+
+
+def test_group_commit_is_off_by_default(client):
+    assert client.app.state.writer is None
+
+
+def test_a_batch_that_cannot_begin_fails_every_write(group_client, monkeypatch):
+    writer = group_client.app.state.writer
+    writer.window = 0.2
+
+    def locked(conn, cursor, statement, *args):
+        if statement == "BEGIN IMMEDIATE":
+            raise OperationalError(statement, (), Exception("database is locked"))
+
+    event.listen(writer.engine, "before_cursor_execute", locked)
+    try:
+        futures = [writer.submit(crud.enroll_student, n, 1) for n in (1, 2)]
+        for future in futures:
+            with pytest.raises(OperationalError, match="database is locked"):
+                future.result(timeout=5)
+    finally:
+        event.remove(writer.engine, "before_cursor_execute", locked)
+    assert group_client.post("/enrollments/", json={"student_id": 1, "course_id": 1}).status_code == 200
+
+
+def test_run_gives_up_on_a_write_that_never_commits(group_client):
+    writer = group_client.app.state.writer
+    writer.timeout = 0.05
+    writer.window = 1.0
+    with group_client.app.state.sessions() as db:
+        with pytest.raises(HTTPException) as exc:
+            groupcommit.run(writer, db, crud.enroll_student, 1, 1)
+    assert exc.value.status_code == 503
+
+
+def test_the_writer_comes_back_with_the_next_lifespan(group_app):
+    app = group_app()
+    with TestClient(app) as client:
+        client.post("/students/", json={"first_name": "Li", "last_name": "Chen", "email": "li@example.com"})
+    with pytest.raises(RuntimeError, match="stopped"):
+        app.state.writer.submit(crud.enroll_student, 1, 1)
+
+    with TestClient(app) as client:
+        client.post("/instructors/", json={"first_name": "A", "last_name": "L", "email": "a@example.com"})
+        client.post("/courses/", json={"code": "CS101", "title": "Intro", "credits": 3, "instructor_id": 1})
+        assert client.post("/enrollments/", json={"student_id": 1, "course_id": 1}).status_code == 200
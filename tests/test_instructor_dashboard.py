@@ -67,3 +67,54 @@ def test_instructor_can_assign_grade():
     assert response.status_code == 200
     data = response.json()
     assert data["grade"] == 2
+
+
+def test_instructor_can_upload_grades_in_bulk():
+    """A whole course can be graded in one request; strangers are reported back."""
+    setup_test_data()
+    client.post("/students/", json={
+        "first_name": "Bert",
+        "last_name": "Wonder",
+        "email": "bert@example.com"
+    })
+    client.post("/enrollments/", json={"student_id": 2, "course_id": 1})
+
+    response = client.put("/instructors/1/courses/1/grades", json=[
+        {"student_id": 1, "grade": 4},
+        {"student_id": 2, "grade": 5},
+        {"student_id": 99, "grade": 3},
+    ])
+    assert response.status_code == 200, response.text
+    assert response.json() == {"updated": 2, "not_enrolled": [99]}
+
+    grades = {e["student"]["id"]: e["grade"] for e in client.get("/admin/enrollments").json()}
+    assert grades == {1: 4, 2: 5}
+
+
+def test_instructor_bulk_grades_from_csv():
+    setup_test_data()
+    response = client.put(
+        "/instructors/1/courses/1/grades",
+        content="student_id,grade\n1,3\n",
+        headers={"Content-Type": "text/csv"},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["updated"] == 1
+
+
+def test_instructor_bulk_grades_reject_out_of_range_batch():
+    """One invalid grade rejects the whole batch before anything is written."""
+    setup_test_data()
+    response = client.put("/instructors/1/courses/1/grades", json=[
+        {"student_id": 1, "grade": 4},
+        {"student_id": 1, "grade": 9},
+    ])
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["row"] == 1
+    assert client.get("/admin/enrollments").json()[0]["grade"] is None
+
+
+def test_bulk_grades_require_course_ownership():
+    setup_test_data()
+    response = client.put("/instructors/2/courses/1/grades", json=[{"student_id": 1, "grade": 4}])
+    assert response.status_code == 404
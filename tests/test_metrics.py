@@ -0,0 +1,129 @@
+# tests/test_metrics.py
+import gc
+import threading
+
+import fastapi.routing
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from sprint2.config import Settings
+from sprint2.metrics import BUCKETS, Registry, instrument_engine, pool_gauges, registry, render
+
+
+def sample(body: str, series: str) -> float:
+    for line in body.splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+@pytest.fixture
+def metered(app_for):
+    """An app on its own database, so its engine is the one serving the requests."""
+    with TestClient(app_for()) as client:
+        yield client
+
+
+def test_metrics_endpoint_reports_routes(metered):
+    client = metered
+    client.post("/students/", json={"first_name": "Bob", "last_name": "Marley", "email": "bob@example.com"})
+    before = client.get("/metrics").text
+    client.get("/students/")
+    client.get("/students/")
+    client.get("/no/such/route")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert "# TYPE stucomas_http_request_duration_seconds histogram" in body
+
+    requests = 'stucomas_http_requests_total{method="GET",route="/students/",status="200"}'
+    assert sample(body, requests) - sample(before, requests) == 2
+    count = 'stucomas_http_request_duration_seconds_count{method="GET",route="/students/"}'
+    inf = 'stucomas_http_request_duration_seconds_bucket{method="GET",route="/students/",le="+Inf"}'
+    assert sample(body, inf) == sample(body, count) >= 2
+    assert sample(body, 'stucomas_http_requests_total{method="GET",route="<unmatched>",status="404"}') >= 1
+    # The POST served a response model out of a committed transaction
+    assert sample(body, 'stucomas_http_db_seconds_total{method="POST",route="/students/"}') > 0
+    assert sample(body, 'stucomas_http_serialization_seconds_total{method="POST",route="/students/"}') > 0
+    assert sample(body, "stucomas_db_commits_total") >= 1
+    assert "stucomas_cache_hits_total" in body
+
+
+def test_registry_loses_no_increments_across_threads():
+    counters = Registry()
+
+    def work():
+        for _ in range(10000):
+            counters.inc("hits", (("route", "/x"),))
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counters.value("hits", route="/x") == 80000
+
+
+def test_registry_folds_in_the_counts_of_finished_threads():
+    counters = Registry()
+    for _ in range(50):
+        thread = threading.Thread(target=counters.inc, args=("hits",))
+        thread.start()
+        thread.join()
+    gc.collect()
+    assert counters._shards == {}
+    assert counters.value("hits") == 50
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Registry()
+    labels = (("method", "GET"), ("route", "/x"))
+    for seconds in (0.001, 0.02, 0.02, 30):
+        histogram.observe("stucomas_http_request_duration_seconds", labels, seconds)
+    body = render(histogram.totals(), {})
+    prefix = 'stucomas_http_request_duration_seconds_bucket{method="GET",route="/x",le='
+    assert sample(body, prefix + '"0.005"}') == 1
+    assert sample(body, prefix + '"0.025"}') == 3
+    assert sample(body, prefix + f'"{BUCKETS[-1]}"}}') == 3
+    assert sample(body, prefix + '"+Inf"}') == 4
+    assert sample(body, 'stucomas_http_request_duration_seconds_count{method="GET",route="/x"}') == 4
+
+
+def test_pool_checkouts_and_gauges(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=1, max_overflow=2)
+    pool_metrics = Registry()
+    instrument_engine(engine, pool_metrics)
+
+    with engine.connect() as first, engine.connect() as second:
+        first.execute(text("SELECT 1"))
+        second.execute(text("SELECT 1"))
+        gauges = pool_gauges(engine)
+        assert gauges["stucomas_db_pool_checked_out"] == 2
+        assert gauges["stucomas_db_pool_size"] == 1
+    engine.dispose()
+
+    assert pool_metrics.value("stucomas_db_pool_checkouts_total") == 2
+    assert pool_metrics.value("stucomas_db_pool_connects_total") == 2
+    assert pool_metrics.value("stucomas_db_pool_overflow_checkouts_total") == 1
+    assert pool_metrics.value("stucomas_db_pool_wait_seconds_total") > 0
+
+
+def test_only_the_apps_own_engine_and_routes_are_instrumented(metered, tmp_path):
+    other = create_engine(f"sqlite:///{tmp_path / 'other.db'}")
+    commits = registry.value("stucomas_db_commits_total")
+    with other.begin() as connection:
+        connection.execute(text("CREATE TABLE t (x INTEGER)"))
+    other.dispose()
+
+    assert registry.value("stucomas_db_commits_total") == commits
+    assert fastapi.routing.serialize_response.__module__ == "fastapi.routing"
+    assert not hasattr(fastapi.routing.serialize_response, "__wrapped__")
+
+
+def test_metrics_can_be_switched_off():
+    assert Settings.from_env({"STUCOMAS_ENV_FILE": "/nonexistent"}).metrics_enabled is True
+    assert Settings.from_env({"STUCOMAS_ENV_FILE": "/nonexistent", "STUCOMAS_METRICS": "off"}).metrics_enabled is False
@@ -0,0 +1,48 @@
+# tests/test_migrations.py
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, inspect
+
+from sprint2 import search, startup
+from sprint2.database import Base
+
+
+def alembic_config(url):
+    # No config file, so Alembic leaves the app's logging configuration alone
+    config = Config()
+    config.set_main_option("script_location", str(startup.ALEMBIC_INI.parent / "alembic"))
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def test_enrollment_version_migration_round_trips(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    engine = create_engine(url)
+    # The current schema, aggregate triggers included
+    Base.metadata.create_all(bind=engine)
+    config = alembic_config(url)
+    command.stamp(config, "head")
+    try:
+        command.downgrade(config, "9d2f6b1e8c37")
+        assert "version" not in {column["name"] for column in inspect(engine).get_columns("enrollments")}
+        command.upgrade(config, "head")
+        assert "version" in {column["name"] for column in inspect(engine).get_columns("enrollments")}
+        startup.verify_schema(engine)
+    finally:
+        engine.dispose()
+
+
+def test_autogenerate_leaves_the_search_indexes_alone(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'current.db'}")
+    Base.metadata.create_all(bind=engine)
+    try:
+        with engine.connect() as connection:
+            unfiltered = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+            context = MigrationContext.configure(connection, opts={"include_object": search.include_object})
+            filtered = compare_metadata(context, Base.metadata)
+    finally:
+        engine.dispose()
+    assert {"students_fts", "courses_fts_data"} <= {diff[1].name for diff in unfiltered if diff[0] == "remove_table"}
+    assert filtered == []
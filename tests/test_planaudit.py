@@ -0,0 +1,76 @@
+# tests/test_planaudit.py
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from sprint2 import crud_async, planaudit
+from sprint2.database import Base
+from sprint2.seed import SeedConfig
+from tests.conftest import engine
+
+
+def test_capture_records_crud_statements_by_function(client):
+    with planaudit.capture() as statements:
+        client.post("/instructors/", json={
+            "first_name": "Ada", "last_name": "Byron", "email": "ada@example.com", "department": "Mathematics"
+        })
+        client.post("/courses/", json={"code": "MAT101", "title": "Calculus", "credits": 4, "instructor_id": 1})
+        client.get("/instructors/1/courses")
+        with engine.connect() as connection:
+            connection.exec_driver_sql("SELECT count(*) FROM courses")
+
+    functions = {statement.function for statement in statements.values()}
+    assert {"sprint2.crud.create_course", "sprint2.crud.get_courses_by_instructor"} <= functions
+    assert not any("count(*)" in s.sql for s in statements.values())
+
+
+def test_capture_follows_the_async_path():
+    async def run():
+        async_engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(bind=async_engine)() as db:
+            with planaudit.capture() as statements:
+                await crud_async.get_students(db, limit=10)
+        await async_engine.dispose()
+        return statements
+
+    assert {s.function for s in asyncio.run(run()).values()} == {"sprint2.crud_async.get_students"}
+
+
+def test_audit_reports_scans_sorts_and_index_hints(tmp_path):
+    audited = planaudit.seeded_engine(tmp_path / "audit.db", SeedConfig(students=300, instructors=12, courses=40))
+    statements = {
+        s.key: s for s in (
+            planaudit.Statement("by_name", "SELECT students.id FROM students WHERE students.first_name = ? "
+                                           "ORDER BY students.last_name", ("Ana",)),
+            planaudit.Statement("by_email", "SELECT students.id FROM students WHERE students.email = ?", ("a@b",)),
+        )
+    }
+    try:
+        report = planaudit.audit(audited, statements)
+    finally:
+        audited.dispose()
+
+    by_function = {entry["function"]: entry["findings"] for entry in report.values()}
+    assert by_function["by_email"] == []
+    assert [(f["kind"], f["detail"]) for f in by_function["by_name"]] == [
+        ("scan", "SCAN students"),
+        ("missing-index", "students(first_name, last_name)"),
+        ("temp-btree", "USE TEMP B-TREE FOR ORDER BY"),
+    ]
+
+
+def test_fingerprint_ignores_in_list_length():
+    assert planaudit.fingerprint("SELECT 1 WHERE x IN (?, ?)") == planaudit.fingerprint("SELECT 1\nWHERE x IN (?, ?, ?)")
+
+
+def test_compare_reports_only_new_findings():
+    scan = {"kind": "scan", "table": "students", "detail": "SCAN students"}
+    sort = {"kind": "temp-btree", "detail": "USE TEMP B-TREE FOR ORDER BY"}
+    baseline = {"statements": {"a 1": {"findings": [scan]}}}
+    result = {"statements": {"a 1": {"findings": [scan, sort]}, "b 2": {"findings": [scan]}}}
+
+    assert planaudit.compare(baseline, baseline) == []
+    assert planaudit.compare(result, baseline) == [dict(sort, statement="a 1"), dict(scan, statement="b 2")]
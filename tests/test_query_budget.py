@@ -0,0 +1,81 @@
+# tests/test_query_budget.py
+import logging
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from sprint2 import querystats
+from sprint2.database import unit_of_work
+from sprint2.querystats import assert_max_queries
+from tests.conftest import TestingSessionLocal, override_get_db
+
+
+def seed_course_with_students(client, count):
+    client.post("/instructors/", json={
+        "first_name": "Dr.",
+        "last_name": "Brown",
+        "email": "dr.brown@example.com",
+        "department": "Mathematics"
+    })
+    client.post("/instructors/", json={
+        "first_name": "Dr.",
+        "last_name": "Green",
+        "email": "dr.green@example.com",
+        "department": "Mathematics"
+    })
+    client.post("/courses/", json={"code": "MATH101", "title": "Calculus I", "credits": 4, "instructor_id": 1})
+    client.post("/courses/", json={"code": "MATH102", "title": "Calculus II", "credits": 4, "instructor_id": 2})
+    client.post("/students/bulk", json=[
+        {"first_name": f"Student{i}", "last_name": "Count", "email": f"s{i}@example.com"}
+        for i in range(count)
+    ])
+    for i in range(1, count + 1):
+        client.post("/enrollments/", json={"student_id": i, "course_id": 1})
+        client.post("/enrollments/", json={"student_id": i, "course_id": 2})
+
+
+def test_responses_report_query_count_and_db_time(client):
+    response = client.get("/students/")
+    assert int(response.headers["X-DB-Queries"]) >= 1
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+
+
+# Routes with an ETag spend one extra query reading the change counters
+@pytest.mark.parametrize("path, budget", [
+    ("/students/1/grades", 1),
+    ("/instructors/1/courses", 2),
+    ("/instructors/1/courses/1/students", 3),
+    ("/admin/enrollments", 2),
+    ("/courses/search?query=calc", 1),
+])
+def test_read_routes_do_not_issue_n_plus_one_queries(client, path, budget):
+    seed_course_with_students(client, 5)
+    with assert_max_queries(budget):
+        response = client.get(path)
+    assert response.status_code == 200
+
+
+def test_assert_max_queries_lists_the_statements():
+    with unit_of_work(TestingSessionLocal) as db:
+        with pytest.raises(AssertionError, match="2 queries executed, expected at most 1"):
+            with assert_max_queries(1):
+                db.execute(text("SELECT 1"))
+                db.execute(text("SELECT 2"))
+
+
+def test_over_budget_requests_are_logged(caplog):
+    app = FastAPI()
+    querystats.install(app, budget=1)
+
+    @app.get("/chatty")
+    def chatty(db=Depends(override_get_db)):
+        for _ in range(3):
+            db.execute(text("SELECT 1"))
+        return {}
+
+    with caplog.at_level(logging.WARNING, logger="sprint2.querystats"):
+        response = TestClient(app).get("/chatty")
+    assert response.headers["X-DB-Queries"] == "3"
+    assert "GET /chatty ran 3 queries (budget 1" in caplog.text
@@ -0,0 +1,144 @@
+# tests/test_replica.py
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+
+from sprint2 import database
+
+
+@pytest.fixture
+def copied(tmp_path, app_for):
+    """An app reading from a copy of its primary that only refreshes when told to."""
+    app = app_for(
+        STUCOMAS_REPLICA_URL=f"sqlite:///{tmp_path / 'replica.db'}",
+        STUCOMAS_REPLICA_REFRESH_SECONDS="3600",
+    )
+    with TestClient(app) as writer:
+        yield app, writer, TestClient(app)
+
+
+def names(client, url="/students/"):
+    return [s["first_name"] for s in client.get(url).json()]
+
+
+def test_reads_go_to_the_replica_until_it_catches_up(copied):
+    app, writer, reader = copied
+    response = writer.post("/students/", json={"first_name": "Li", "last_name": "Chen", "email": "li@example.com"})
+    assert response.status_code == 200
+    assert database.LAST_COMMIT_COOKIE in response.cookies
+
+    # Another client reads the copy taken at startup; the writer reads its own write from the primary
+    assert names(reader) == []
+    assert names(writer) == ["Li"]
+
+    app.state.replica.refresh()
+    assert names(reader) == ["Li"]
+    assert app.state.replica.serves(float(writer.cookies[database.LAST_COMMIT_COOKIE]))
+
+
+def test_the_cache_never_answers_with_what_the_replica_is_behind_on(copied):
+    app, writer, reader = copied
+    writer.post("/instructors/", json={"first_name": "Ada", "last_name": "L", "email": "ada@example.com"})
+    app.state.replica.refresh()
+    assert reader.get("/instructors/1/courses").json() == []
+
+    writer.post("/courses/", json={"code": "CS101", "title": "Intro", "credits": 3, "instructor_id": 1})
+    # Read from the stale copy, but not stored: it predates the course
+    stale = reader.get("/instructors/1/courses")
+    assert stale.json() == [] and stale.headers["X-Cache"] == "MISS"
+    assert reader.get("/instructors/1/courses").headers["X-Cache"] == "MISS"
+    # The writer reads its own write from the primary
+    fresh = writer.get("/instructors/1/courses")
+    assert [c["code"] for c in fresh.json()] == ["CS101"] and fresh.headers["X-Cache"] == "MISS"
+
+    app.state.replica.refresh()
+    assert [c["code"] for c in reader.get("/instructors/1/courses").json()] == ["CS101"]
+    assert reader.get("/instructors/1/courses").headers["X-Cache"] == "HIT"
+
+
+def test_a_client_newer_than_the_replica_skips_cached_responses(copied):
+    app, writer, reader = copied
+    writer.post("/instructors/", json={"first_name": "Ada", "last_name": "L", "email": "ada@example.com"})
+    app.state.replica.refresh()
+    reader.get("/instructors/1/courses")
+    assert reader.get("/instructors/1/courses").headers["X-Cache"] == "HIT"
+
+    writer.post("/students/", json={"first_name": "Li", "last_name": "Chen", "email": "li@example.com"})
+    assert writer.get("/instructors/1/courses").headers["X-Cache"] == "MISS"
+    assert reader.get("/instructors/1/courses").headers["X-Cache"] == "HIT"
+
+
+def test_a_read_only_uri_on_the_primary_file_is_never_behind(tmp_path, app_for):
+    app = app_for(STUCOMAS_REPLICA_URL=f"sqlite:///file:{tmp_path / 'app.db'}?mode=ro&uri=true")
+    replica_statements = []
+
+    def record(conn, cursor, statement, *args):
+        replica_statements.append(statement)
+
+    event.listen(app.state.replica.engine, "before_cursor_execute", record)
+    with TestClient(app) as writer:
+        writer.post("/students/", json={"first_name": "Li", "last_name": "Chen", "email": "li@example.com"})
+        assert replica_statements == []
+        assert names(TestClient(app)) == ["Li"]
+        assert names(writer) == ["Li"]
+    assert replica_statements
+    with pytest.raises(Exception, match="readonly"):
+        with app.state.replica.engine.begin() as connection:
+            connection.exec_driver_sql("DELETE FROM students")
+
+
+def test_without_a_replica_url_everything_uses_the_primary(app_for):
+    app = app_for()
+    assert app.state.replica is None
+    with TestClient(app) as client:
+        response = client.post("/students/", json={"first_name": "Li", "last_name": "Chen", "email": "li@example.com"})
+        assert database.LAST_COMMIT_COOKIE not in response.cookies
+        assert names(client) == ["Li"]
+
+
+def test_the_replica_keeps_refreshing_across_lifespans(tmp_path, app_for):
+    app = app_for(
+        STUCOMAS_REPLICA_URL=f"sqlite:///{tmp_path / 'replica.db'}",
+        STUCOMAS_REPLICA_REFRESH_SECONDS="3600",
+    )
+    with TestClient(app):
+        pass
+    with TestClient(app) as writer:
+        writer.post("/students/", json={"first_name": "Li", "last_name": "Chen", "email": "li@example.com"})
+        assert app.state.replica.behind_on({("students", None)})
+        app.state.replica.refresh()
+        assert names(TestClient(app)) == ["Li"]
+
+
+def test_only_successful_writes_are_stamped(copied):
+    app, writer, reader = copied
+    student = {"first_name": "Li", "last_name": "Chen", "email": "li@example.com"}
+    assert database.LAST_COMMIT_COOKIE in reader.post("/students/", json=student).headers["set-cookie"]
+    assert "set-cookie" not in reader.post("/students/", json=student).headers
+    assert "set-cookie" not in reader.get("/students/").headers
+
+
+def test_the_replica_engine_only_reads(tmp_path, app_for):
+    # A primary file not in WAL mode yet, read through a mode=ro URI before the app ever wrote to it
+    create_engine(f"sqlite:///{tmp_path / 'app.db'}").dispose()
+    app = app_for(STUCOMAS_REPLICA_URL=f"sqlite:///file:{tmp_path / 'app.db'}?mode=ro&uri=true")
+    with TestClient(app) as client:
+        assert names(client) == []
+        with app.state.replica.engine.connect() as connection:
+            assert connection.exec_driver_sql("PRAGMA query_only").scalar() == 1
+            assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+
+
+def test_a_copied_replica_refuses_writes(copied):
+    app, writer, reader = copied
+    with pytest.raises(Exception, match="readonly"):
+        with app.state.replica.engine.begin() as connection:
+            connection.exec_driver_sql("DELETE FROM students")
+    writer.post("/students/", json={"first_name": "Li", "last_name": "Chen", "email": "li@example.com"})
+    app.state.replica.refresh()
+    assert names(reader) == ["Li"]
+
+
+def test_async_mode_says_it_ignores_the_replica(tmp_path, app_for, caplog):
+    app_for(STUCOMAS_DB_MODE="async", STUCOMAS_REPLICA_URL=f"sqlite:///{tmp_path / 'replica.db'}")
+    assert "async routes ignore STUCOMAS_REPLICA_URL" in caplog.text
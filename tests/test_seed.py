@@ -0,0 +1,75 @@
+# tests/test_seed.py
+import pytest
+from sqlalchemy import create_engine, text
+
+from sprint2 import etags, seed, startup
+
+
+def seeded(path, **overrides):
+    engine = create_engine(f"sqlite:///{path}")
+    config = seed.SeedConfig(**{"students": 300, "instructors": 12, "courses": 40, "avg_enrollments": 6, "seed": 7, **overrides})
+    return engine, seed.seed(engine, config)
+
+
+def dump(engine):
+    with engine.connect() as conn:
+        return [
+            conn.execute(text(f"SELECT * FROM {table} ORDER BY 1, 2")).all()
+            for table in ("instructors", "courses", "students", "enrollments")
+        ]
+
+
+def test_same_arguments_give_the_same_rows(tmp_path):
+    first, report = seeded(tmp_path / "a.db")
+    second, _ = seeded(tmp_path / "b.db")
+    third, _ = seeded(tmp_path / "c.db", seed=8)
+
+    assert report.enrollments > 1000
+    assert dump(first) == dump(second)
+    assert dump(first)[3] != dump(third)[3]
+
+
+def test_rows_respect_the_schema_constraints(tmp_path):
+    engine, report = seeded(tmp_path / "seed.db")
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(DISTINCT email) FROM students")).scalar() == 300
+        assert conn.execute(text("SELECT count(DISTINCT code || '/' || instructor_id) FROM courses")).scalar() == 40
+        assert conn.execute(text("SELECT count(*) FROM enrollments WHERE grade NOT BETWEEN 1 AND 5")).scalar() == 0
+        assert conn.execute(text("SELECT count(*) FROM enrollments")).scalar() == report.enrollments
+
+
+def test_search_and_aggregates_are_rebuilt(tmp_path):
+    engine, report = seeded(tmp_path / "seed.db")
+    with engine.begin() as conn:
+        assert conn.execute(text("SELECT sum(enrolled) FROM course_stats")).scalar() == report.enrollments
+        assert conn.execute(text("""SELECT count(*) FROM students_fts WHERE students_fts MATCH '"students.uni"'""")).scalar() == 300
+        # Triggers are back for later writes
+        conn.execute(text("DELETE FROM enrollments WHERE course_id = 1"))
+        assert conn.execute(text("SELECT enrolled FROM course_stats WHERE course_id = 1")).scalar() == 0
+
+
+def test_refuses_to_seed_twice_without_reset(tmp_path):
+    engine, _ = seeded(tmp_path / "seed.db")
+    with pytest.raises(ValueError):
+        seed.seed(engine, seed.SeedConfig())
+    assert seed.seed(engine, seed.SeedConfig(students=5, courses=3, instructors=2), reset=True).students == 5
+
+
+def test_a_seeded_database_passes_the_schema_check(tmp_path):
+    engine, _ = seeded(tmp_path / "seed.db")
+    startup.verify_schema(engine)
+
+    seed.seed(engine, seed.SeedConfig(students=5, courses=3, instructors=2), reset=True)
+    startup.verify_schema(engine)
+
+
+def test_seeding_moves_every_table_version(tmp_path):
+    engine, _ = seeded(tmp_path / "seed.db")
+    with engine.connect() as conn:
+        first = dict(conn.execute(etags.versions_statement(["students", "courses", "enrollments", "instructors"])).all())
+    assert first == {"students": 1, "courses": 1, "enrollments": 1, "instructors": 1}
+
+    seed.seed(engine, seed.SeedConfig(students=5, courses=3, instructors=2), reset=True)
+    with engine.connect() as conn:
+        # Kept across the reset: an ETag taken before it must not match the new rows
+        assert dict(conn.execute(etags.versions_statement(list(first))).all()) == {name: 2 for name in first}
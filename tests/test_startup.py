@@ -0,0 +1,62 @@
+# tests/test_startup.py
+import gc
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect, text
+
+from sprint2 import startup
+from sprint2.api import create_app
+from sprint2.database import Base
+
+
+def test_import_touches_no_database(tmp_path):
+    env = dict(os.environ, STUCOMAS_ENV_FILE="/nonexistent", STUCOMAS_PROFILE="prod",
+               STUCOMAS_DATABASE_URL=f"sqlite:///{tmp_path / 'import.db'}")
+    subprocess.run([sys.executable, "-c", "import sprint2.api"], env=env, check=True)
+    assert not (tmp_path / "import.db").exists()
+
+
+def test_verify_refuses_a_database_behind_head(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+    with pytest.raises(startup.SchemaError, match="alembic upgrade head"):
+        startup.verify_schema(engine)
+    engine.dispose()
+
+
+def test_verify_accepts_a_database_at_head(settings_for):
+    settings = settings_for(STUCOMAS_SCHEMA_CHECK="verify")
+    engine = create_engine(settings.database_url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        for head in startup.alembic_heads():
+            connection.execute(text("INSERT INTO alembic_version VALUES (:head)"), {"head": head})
+    engine.dispose()
+
+    with TestClient(create_app(settings)) as client:
+        assert client.get("/students/").status_code == 200
+
+
+def test_create_mode_builds_the_schema_at_startup(tmp_path, settings_for):
+    settings = settings_for()
+    app = create_app(settings)
+    assert not (tmp_path / "app.db").exists()
+    with TestClient(app):
+        pass
+    assert "students" in inspect(create_engine(settings.database_url)).get_table_names()
+
+
+def test_prefork_freezes_the_warmed_heap(app_for):
+    app = app_for(STUCOMAS_PROFILE="test", STUCOMAS_SCHEMA_CHECK="off")
+    gc.unfreeze()
+    assert gc.get_freeze_count() == 0
+    try:
+        startup.prefork(app)
+        assert gc.get_freeze_count() > 0
+        assert app.openapi_schema is not None
+    finally:
+        gc.unfreeze()
@@ -0,0 +1,172 @@
+# tests/test_writes.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from sprint2 import crud, models
+from sprint2.config import Settings
+from sprint2.database import Base, make_engine, unit_of_work
+from tests.conftest import engine
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    """Sessions on a file database under the test profile, which enforces foreign keys like every profile."""
+    engine = make_engine(Settings(database_url=f"sqlite:///{tmp_path / 'writes.db'}", profile="test"))
+    Base.metadata.create_all(bind=engine)
+    make = sessionmaker(bind=engine)
+    with make() as db:
+        db.add(models.Instructor(first_name="Ada", last_name="Lovelace", email="ada@example.com"))
+        db.add(models.Course(code="CS101", title="Intro", credits=3, instructor_id=1))
+        db.add(models.Student(first_name="Li", last_name="Chen", email="li@example.com"))
+        db.commit()
+    yield make
+    engine.dispose()
+
+
+def statements(db):
+    """A list collecting every statement `db`'s engine runs from now on."""
+    seen = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda conn, cursor, sql, *args: seen.append(sql))
+    return seen
+
+
+def test_duplicates_are_conflicts(client):
+    student = {"first_name": "Li", "last_name": "Chen", "email": "li@example.com"}
+    assert client.post("/students/", json=student).status_code == 200
+    duplicate = client.post("/students/", json=student)
+    assert duplicate.status_code == 409
+    assert duplicate.json()["detail"] == "Student with this email already exists."
+
+    client.post("/instructors/", json={"first_name": "Ada", "last_name": "L", "email": "ada@example.com"})
+    client.post("/courses/", json={"code": "CS101", "title": "Intro", "credits": 3, "instructor_id": 1})
+    assert client.post("/enrollments/", json={"student_id": 1, "course_id": 1}).status_code == 200
+    again = client.post("/enrollments/", json={"student_id": 1, "course_id": 1})
+    assert (again.status_code, again.json()["detail"]) == (409, "Already enrolled.")
+
+
+@pytest.mark.parametrize("profile", ["dev", "test", "prod"])
+def test_every_profile_rejects_enrollments_for_missing_rows(app_for, profile):
+    with TestClient(app_for(STUCOMAS_PROFILE=profile)) as client:
+        response = client.post("/enrollments/", json={"student_id": 999, "course_id": 999})
+        assert (response.status_code, response.json()["detail"]) == (404, "Student or course not found.")
+        assert client.get("/admin/enrollments").json() == []
+
+
+def test_each_write_is_one_statement(sessions):
+    with sessions() as db:
+        seen = statements(db)
+        enrollment = crud.enroll_student(db, 1, 1)
+        assert enrollment.grade is None
+        assert crud.assign_grade(db, 1, 1, 4).grade == 4
+        assert crud.assign_grade_by_admin(db, 1, 1, 5).grade == 5
+        assert enrollment.grade == 5
+
+    writes = [sql for sql in seen if "table_versions" not in sql]
+    assert len(writes) == 3, writes
+    assert not any(sql.lstrip().upper().startswith("SELECT") for sql in writes)
+
+
+def test_concurrent_enrollments_get_one_success_and_conflicts(sessions):
+    start = threading.Barrier(8)
+
+    def enroll(_):
+        start.wait()
+        try:
+            with unit_of_work(sessions) as db:
+                return crud.enroll_student(db, 1, 1).student_id
+        except HTTPException as exc:
+            return exc.status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = sorted(pool.map(enroll, range(8)))
+    assert results == [1] + [409] * 7
+
+
+def test_constraint_violations_map_to_client_errors(sessions):
+    with sessions() as db:
+        with pytest.raises(HTTPException) as missing:
+            crud.enroll_student(db, 99, 1)
+        assert (missing.value.status_code, missing.value.detail) == (404, "Student or course not found.")
+
+        with pytest.raises(HTTPException) as missing:
+            crud.assign_grade_by_admin(db, 1, 99, 3)
+        assert missing.value.status_code == 404
+
+        with pytest.raises(HTTPException) as bad:
+            crud.assign_grade_by_admin(db, 1, 1, 7)
+        assert (bad.value.status_code, bad.value.detail) == (400, "Grade must be between 1 and 5.")
+
+        with pytest.raises(HTTPException) as absent:
+            crud.assign_grade(db, 1, 1, 7)
+        assert absent.value.status_code == 404
+        assert db.query(models.Enrollment).count() == 0
+
+
+def test_if_match_protects_against_lost_updates(client):
+    client.post("/students/", json={"first_name": "Li", "last_name": "Chen", "email": "li@example.com"})
+    client.post("/instructors/", json={"first_name": "Ada", "last_name": "L", "email": "ada@example.com"})
+    client.post("/courses/", json={"code": "CS101", "title": "Intro", "credits": 3, "instructor_id": 1})
+    client.post("/enrollments/", json={"student_id": 1, "course_id": 1})
+    assert client.get("/admin/enrollments").json()[0]["version"] == 1
+
+    first = client.put("/enrollments/1/1/grade", json={"grade": 3}, headers={"If-Match": '"1"'})
+    assert (first.status_code, first.json()["version"], first.headers["ETag"]) == (200, 2, '"2"')
+
+    # A second grader still holding version 1
+    stale = client.put("/enrollments/1/1/grade", json={"grade": 5}, headers={"If-Match": '"1"'})
+    assert stale.status_code == 409
+    assert stale.headers["ETag"] == '"2"'
+    assert stale.json()["detail"]["current"] == {"student_id": 1, "course_id": 1, "grade": 3, "version": 2}
+
+    retried = client.put("/instructors/1/courses/1/students/1/grade?grade=5", headers={"If-Match": stale.headers["ETag"]})
+    assert (retried.status_code, retried.json()["grade"], retried.headers["ETag"]) == (200, 5, '"3"')
+    # Without If-Match the last write wins, and still moves the version on
+    assert client.put("/enrollments/1/1/grade", json={"grade": 2}).json()["version"] == 4
+
+    assert client.put("/enrollments/1/1/grade", json={"grade": 2}, headers={"If-Match": "soon"}).status_code == 400
+    assert client.put("/enrollments/2/1/grade", json={"grade": 2}, headers={"If-Match": '"1"'}).status_code == 404
+
+
+def test_every_grade_write_bumps_the_version(sessions):
+    with sessions() as db:
+        crud.enroll_student(db, 1, 1)
+        assert crud.assign_grade_by_admin(db, 1, 1, 3).version == 2
+        crud.bulk_assign_grades_by_instructor(db, 1, 1, [{"student_id": 1, "grade": 4}])
+        with pytest.raises(HTTPException) as stale:
+            crud.assign_grade_by_instructor(db, 1, 1, 1, 5, version=2)
+        assert stale.value.detail["current"]["version"] == 3
+
+
+def test_a_request_is_one_transaction(client):
+    commits = []
+
+    def count(conn):
+        commits.append(conn)
+
+    event.listen(engine, "commit", count)
+    try:
+        client.post("/instructors/", json={"first_name": "Ada", "last_name": "L", "email": "ada@example.com"})
+        assert len(commits) == 1
+        assert client.post("/courses/", json={"code": "CS101", "title": "Intro", "credits": 3, "instructor_id": 1}).json()["id"] == 1
+        assert len(commits) == 2
+        assert client.put("/enrollments/1/1/grade", json={"grade": 3}).status_code == 404
+        assert len(commits) == 2
+    finally:
+        event.remove(engine, "commit", count)
+
+
+def test_a_failed_unit_of_work_leaves_nothing_behind(sessions):
+    with pytest.raises(HTTPException) as missing:
+        with unit_of_work(sessions) as db:
+            crud.create_student(db, "Ana", "Silva", "ana@example.com")
+            crud.enroll_student(db, 2, 99)
+    assert missing.value.status_code == 404
+
+    with sessions() as db:
+        assert db.query(models.Student).filter_by(email="ana@example.com").count() == 0